@@ -0,0 +1,104 @@
+"""
+SBERT inference backends: throughput and score drift.
+
+    PYTHONPATH=src python benchmarks/bench_backends.py [--pairs 200] [--max-drift 0.01] [torch int8 onnx]
+
+For each backend (see nlp/inference.py) it times encodes/sec over the
+fixture corpus, then swaps the backend into the model registry and
+computes semantic_match_score for every resume/JD pair. Scores are
+compared against the fp32 torch run; the script exits non-zero if any
+backend drifts more than --max-drift. The onnx backend needs onnx and
+onnxruntime installed and exports the graph on first use.
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from ats_nlp.nlp import score
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.embedding_cache import EmbeddingCache
+from ats_nlp.nlp.inference import BACKENDS, load_sentence_model
+from ats_nlp.nlp.model_registry import MODELS, SBERT_DIM, SBERT_MODEL
+
+SKILLS = ["java", "spring boot", "python", "react", "node.js", "docker", "kubernetes", "aws", "azure",
+          "sql", "postgresql", "mongodb", "microservices", "terraform", "pandas", "pytorch", "figma", "excel"]
+ROLES = ["backend engineer", "data scientist", "frontend developer", "devops engineer", "product designer",
+         "data analyst"]
+SENTENCES = [
+    "Built {a} services deployed with {b} for a payments platform.",
+    "Migrated legacy batch jobs to {a} and cut infrastructure costs.",
+    "Led a team delivering {a} and {b} features to enterprise customers.",
+    "Designed data pipelines on {a}; on-call for {b} clusters.",
+    "Prototyped dashboards in {a} and presented findings to stakeholders.",
+]
+
+
+def fixture_corpus(n, seed=0):
+    """Deterministic (resume, jd) pairs: half on-topic, half mismatched roles."""
+    rnd = random.Random(seed)
+    pairs = []
+    for i in range(n):
+        skills = rnd.sample(SKILLS, rnd.randint(3, 7))
+        jd_skills = skills[:3] if i % 2 == 0 else rnd.sample(SKILLS, 3)
+        resume = " ".join(rnd.choice(SENTENCES).format(a=rnd.choice(skills), b=rnd.choice(skills))
+                          for _ in range(rnd.randint(4, 12)))
+        jd = (f"We are hiring a {rnd.choice(ROLES)} with experience in {', '.join(jd_skills)}. "
+              f"{rnd.choice(SENTENCES).format(a=jd_skills[0], b=jd_skills[1])}")
+        pairs.append((resume, jd))
+    return pairs
+
+
+def run(backend, pairs, lemmas):
+    model = load_sentence_model(SBERT_MODEL, backend)
+    texts = [lemmas[t] for pair in pairs for t in pair]
+    model.encode(texts[:32], convert_to_numpy=True, normalize_embeddings=True)  # warm-up
+    start = time.perf_counter()
+    model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    rate = len(texts) / (time.perf_counter() - start)
+
+    MODELS.replace("sbert", model)
+    score.EMBED_CACHE = EmbeddingCache(f"bench-{backend}", dim=SBERT_DIM)  # no vectors from another backend
+    scores = []
+    for resume, jd in pairs:
+        r, j = DocumentContext(resume), DocumentContext(jd)
+        r.lemmas, j.lemmas = lemmas[resume], lemmas[jd]
+        scores.append(score.semantic_match_score(r, j))
+    return rate, np.array(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("backends", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--max-drift", type=float, default=0.01)
+    args = parser.parse_args()
+
+    pairs = fixture_corpus(args.pairs)
+    lemmas = {t: DocumentContext(t).lemmas for pair in pairs for t in pair}
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = run(backend, pairs, lemmas)
+        except ImportError as e:
+            print(f"{backend:6s} skipped: {e}")
+
+    base_rate, base_scores = results["torch"]
+    failed = False
+    print(f"{len(pairs)} pairs, {SBERT_MODEL}")
+    print(f"{'backend':8s} {'enc/sec':>9s} {'speedup':>8s} {'max drift':>10s} {'mean drift':>11s}")
+    for backend, (rate, scores) in results.items():
+        drift = np.abs(scores - base_scores)
+        failed |= bool(drift.max() > args.max_drift)
+        print(f"{backend:8s} {rate:9.1f} {rate / base_rate:7.2f}x {drift.max():10.4f} {drift.mean():11.4f}")
+    if failed:
+        print(f"score drift above {args.max_drift}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Weak-label bootstrapping benchmark.
+
+    PYTHONPATH=src python benchmarks/bench_bootstrap.py [FILES] [--workers N]
+
+Writes FILES synthetic resumes (default 5000) to a temp directory and times:
+the old labeller (one regex per keyword, serial, full JSONL rewrite), a
+full bootstrap_directory run, a no-op rerun, and a rerun after 1% of the
+files changed and 1% were added. Checks that every emitted span set is
+overlap-free and that every old span either appears in the new output or
+overlaps one that does.
+"""
+import argparse
+import json
+import random
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from ats_nlp.nlp.bootstrap_ner import CERT_KEYWORDS, SKILL_KEYWORDS, TITLE_KEYWORDS, bootstrap_directory
+
+WORDS = ("built led team platform cloud data pipelines customers reliability design review mentor senior "
+         "staff lead web software backend").split()
+KEYWORDS = CERT_KEYWORDS + SKILL_KEYWORDS + [f"software {t}" for t in TITLE_KEYWORDS]
+
+
+def legacy_label(text):
+    entities = []
+    for kw in CERT_KEYWORDS:
+        for m in re.finditer(rf"\b{re.escape(kw)}\b", text, flags=re.IGNORECASE):
+            entities.append([m.start(), m.end(), "CERTIFICATION"])
+    for kw in TITLE_KEYWORDS:
+        for m in re.finditer(rf"\b\w*{kw}\w*\b", text, flags=re.IGNORECASE):
+            entities.append([m.start(), m.end(), "TITLE"])
+    for kw in SKILL_KEYWORDS:
+        for m in re.finditer(rf"\b{re.escape(kw)}\b", text, flags=re.IGNORECASE):
+            entities.append([m.start(), m.end(), "SKILL_PHRASE"])
+    return {"text": text, "entities": entities}
+
+
+def legacy_directory(input_dir, output_file):
+    with open(output_file, "w", encoding="utf-8") as out:
+        for path in Path(input_dir).glob("*.txt"):
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            out.write(json.dumps(legacy_label(text)) + "\n")
+
+
+def resume(rnd):
+    words = []
+    for _ in range(rnd.randint(300, 900)):
+        words.append(rnd.choice(KEYWORDS) if rnd.random() < 0.06 else rnd.choice(WORDS))
+    return " ".join(words)
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    print(f"{label:32s} {time.perf_counter() - start:8.2f} s")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="?", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    tmp = Path(tempfile.mkdtemp(prefix="bench-bootstrap-"))
+    raw = tmp / "raw"
+    raw.mkdir()
+    try:
+        for i in range(args.files):
+            (raw / f"r{i:06d}.txt").write_text(resume(rnd), encoding="utf-8")
+        print(f"{args.files} resumes, {sum(p.stat().st_size for p in raw.iterdir()) / 1e6:.1f} MB")
+
+        timed("legacy (per-keyword, serial)", legacy_directory, raw, tmp / "legacy.jsonl")
+        out = tmp / "new.jsonl"
+        timed("combined regex + pool (full)", bootstrap_directory, str(raw), str(out), workers=args.workers)
+        stats = timed("rerun, nothing changed", bootstrap_directory, str(raw), str(out), workers=args.workers)
+        assert stats["labelled"] == 0 and not stats["compacted"]
+
+        n = max(1, args.files // 100)
+        for i in range(n):
+            (raw / f"r{i:06d}.txt").write_text(resume(rnd), encoding="utf-8")
+            (raw / f"new{i:06d}.txt").write_text(resume(rnd), encoding="utf-8")
+        stats = timed("rerun, 1% changed + 1% new", bootstrap_directory, str(raw), str(out), workers=args.workers)
+        assert stats["changed"] == n and stats["new"] == n and stats["records"] == args.files + n
+
+        legacy = {json.loads(line)["text"]: json.loads(line)["entities"] for line in open(tmp / "legacy.jsonl")}
+        dropped = 0
+        for line in open(out):
+            rec = json.loads(line)
+            spans = sorted(rec["entities"])
+            assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:])), "overlapping spans"
+            if rec["text"] in legacy:
+                kept = {(s, e) for s, e, _ in spans}
+                dropped += sum(1 for s, e, _ in legacy[rec["text"]]
+                               if (s, e) not in kept and not any(s < ke and ks < e for ks, ke in kept))
+        print(f"spans overlap-free; legacy spans with no counterpart: {dropped}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
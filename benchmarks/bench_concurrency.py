@@ -0,0 +1,56 @@
+"""
+Latency under concurrent load, in-process through the ASGI app.
+
+    PYTHONPATH=src python benchmarks/bench_concurrency.py
+    ATS_MICROBATCH=0 PYTHONPATH=src python benchmarks/bench_concurrency.py   # baseline
+
+Fires waves of /nlp/analyze requests (distinct texts, so the embedding
+cache does not hide model work) at concurrency 1..50 and reports p50/p99.
+With micro-batching on, p99 should stay roughly flat as concurrency grows.
+"""
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from ats_nlp.main import app
+
+LEVELS = [1, 10, 25, 50]
+WAVES = 4
+JD = "Backend engineer with Java, Spring Boot, Kubernetes, AWS and PostgreSQL experience."
+
+
+def _body(i: int) -> dict:
+    text = (f"Candidate {i}\nExperience\nBuilt Java services #{i} on Kubernetes and AWS.\n"
+            f"Skills\nJava, Docker, SQL, Git, project {i}")
+    return {"payload": {"text": text}, "req": {"resume": {"text": text}, "jobDescription": JD}}
+
+
+async def _one(client: httpx.AsyncClient, i: int) -> float:
+    start = time.perf_counter()
+    r = await client.post("/nlp/analyze", json=_body(i))
+    r.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _one(client, -1)  # warm-up
+        seq = 0
+        print(f"{'concurrency':>11} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+        for level in LEVELS:
+            lat = []
+            start = time.perf_counter()
+            for _ in range(WAVES):
+                lat += await asyncio.gather(*(_one(client, seq + j) for j in range(level)))
+                seq += level
+            wall = time.perf_counter() - start
+            lat.sort()
+            p99 = lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+            print(f"{level:>11} {statistics.median(lat) * 1000:>8.1f} {p99 * 1000:>8.1f} {len(lat) / wall:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
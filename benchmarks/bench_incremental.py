@@ -0,0 +1,129 @@
+"""
+Re-analysis after a single-section edit: section cache on (incremental)
+against off (everything recomputed).
+
+    PYTHONPATH=src python benchmarks/bench_incremental.py [--resumes 24] [--repeat 3]
+
+Runs what /nlp/analyze runs (extract_resume, then score_resume against a
+JD context parsed once) on English resumes with section headers from
+corpus.py. Typical builder edits are applied, each touching a single
+section: reword an experience bullet, add a skill, rewrite the summary,
+change the graduation year, add a certification. Every edited resume is
+analysed with the section cache off and on, alternating, each time on an
+empty cache filled only by the unedited resume. The embedding cache stays
+on in both modes, as in the service. The script prints p50/p95 latency
+per edit and the sections that were recomputed. Experience edits gain
+little: that section holds most of the text.
+"""
+import argparse
+import os
+import re
+import time
+from collections import Counter, defaultdict
+
+os.environ.setdefault("ATS_MICROBATCH", "0")
+os.environ.setdefault("ATS_WARMUP", "blocking")
+
+import numpy as np
+
+from corpus import job_descriptions, resumes
+
+from ats_nlp.models import ResumePayload
+from ats_nlp.nlp import section_cache
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.result_cache import ResultCache
+from ats_nlp.nlp.section_cache import recomputed_sections
+from ats_nlp.nlp.skills import SkillsEngine
+from ats_nlp.pipeline import extract_resume, score_resume
+
+
+def _after_header(header, addition):
+    """Edit that appends ``addition`` to the first line under ``header``."""
+    pattern = re.compile(rf"^({header}\n[^\n]*)", re.MULTILINE)
+    return lambda text: pattern.sub(lambda m: m.group(1) + addition, text, count=1)
+
+
+EDITS = {
+    "experience bullet": lambda text: text.replace("• ", "• Reworded: ", 1),
+    "add skill": _after_header("Skills", ", rust"),
+    "rewrite summary": _after_header("Summary", " Open to relocation and remote work."),
+    "graduation year": lambda text: re.sub(r"(B\.Sc\. [^\n]*, )(\d{4})", lambda m: m.group(1) + "2019", text, count=1),
+    "add certification": lambda text: _add_certification(text),
+}
+
+CERTIFICATION = "CKA: Certified Kubernetes Administrator"
+
+
+def _add_certification(text):
+    if "\nCertifications\n" in text:
+        return text.replace("\nCertifications\n", f"\nCertifications\n{CERTIFICATION}\n", 1)
+    return text.rstrip("\n") + f"\n\nCertifications\n{CERTIFICATION}\n"
+
+
+def analyze(text, jd, engine):
+    """What /nlp/analyze runs for one resume; jd is (context, required skills)."""
+    ctx = DocumentContext(text)
+    extracted = extract_resume(ResumePayload(text=text), ctx, engine)
+    score_resume(extracted.normalized_skills, ctx, jd[0], jd[1])
+    return ctx
+
+
+def fresh_cache(entries):
+    section_cache.SECTION_CACHE = ResultCache(max_entries=entries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs = [d for d in resumes(args.resumes * 6, args.seed) if d["language"] == "en" and d["layout"] == "rich"]
+    docs = docs[:args.resumes]
+    jds = job_descriptions(4, args.seed)
+    engine = SkillsEngine(db_path="data/skills_db.txt")
+    jd_contexts = []
+    for jd in jds:
+        ctx = DocumentContext(jd["text"])
+        ctx.lemma_tokens  # parsed once, like a registered job
+        jd_contexts.append((ctx, jd["requiredSkills"]))
+    print(f"{len(docs)} resumes ({sum(len(d['text']) for d in docs) / len(docs):.0f} chars avg), "
+          f"{len(EDITS)} edits")
+    fresh_cache(0)
+    analyze(docs[0]["text"], jd_contexts[0], engine)  # model loads
+
+    samples = defaultdict(list)
+    recomputed = defaultdict(Counter)
+    for _ in range(args.repeat):
+        for i, doc in enumerate(docs):
+            jd = jd_contexts[i % len(jd_contexts)]
+            for name, edit in EDITS.items():
+                edited = edit(doc["text"])
+                if edited == doc["text"]:
+                    continue
+                for incremental in (False, True):
+                    fresh_cache(16384 if incremental else 0)
+                    analyze(doc["text"], jd, engine)  # the saved resume before the edit
+                    start = time.perf_counter()
+                    ctx = analyze(edited, jd, engine)
+                    samples[(name, doc["length"], incremental)].append(time.perf_counter() - start)
+                    if incremental:
+                        recomputed[(name, doc["length"])][", ".join(recomputed_sections(ctx))] += 1
+
+    print(f"\n{'edit':18s} {'length':6s} {'n':>4s} {'full p50':>9s} {'incr p50':>9s} {'full p95':>9s} "
+          f"{'incr p95':>9s} {'speedup':>8s}  recomputed")
+    for name in EDITS:
+        for length in ("short", "long"):
+            full, incr = samples.get((name, length, False)), samples.get((name, length, True))
+            if not full:
+                continue
+            full_ms, incr_ms = np.array(full) * 1000, np.array(incr) * 1000
+            sections, _ = recomputed[(name, length)].most_common(1)[0]
+            print(f"{name:18s} {length:6s} {len(full_ms):4d} {np.percentile(full_ms, 50):9.2f} "
+                  f"{np.percentile(incr_ms, 50):9.2f} {np.percentile(full_ms, 95):9.2f} "
+                  f"{np.percentile(incr_ms, 95):9.2f} {np.median(full_ms) / np.median(incr_ms):7.1f}x  {sections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Text normalization benchmark.
+
+    PYTHONPATH=src python benchmarks/bench_normalize.py [PAGES] [FUZZ]
+
+Times the old clean_text (NFKC + eight sequential regex/replace passes)
+against normalize.normalize (one combined regex over whitespace/bullet
+runs, plus the offset map) on a synthetic resume of PAGES pages (default
+25) with bullets, CRLF line ends, tabs, ligatures and odd spaces, and
+compares str.translate with the str.replace chain kept for the phone
+pre-pass. Checks that outputs are identical and that entity offsets map
+back to the original text, then runs a differential check: FUZZ random
+strings (default 100000) drawn from the characters the cleaner rewrites
+must clean exactly as the legacy clean_text did.
+"""
+import random
+import re
+import sys
+import time
+import unicodedata
+
+from ats_nlp.nlp.normalize import PHONE_REPLACEMENTS, normalize, phone_text
+
+REPEAT = 20
+# The legacy clean_text patterns, verbatim (not derived from normalize.py, so a change there shows up)
+CTRL = r"[\u0000-\u0008\u000B\u000C\u000E-\u001F]"
+BULLETS = re.compile(r"[•·●■▪▶►●⦿◆➤➣➢]")
+ARROWS = re.compile(r"[➔→⇒➤➣➢]")
+# What the fuzzer draws from: everything either cleaner rewrites, plus NFKC-affected and plain chars
+FUZZ_ALPHABET = ("•·●■▪▶►●⦿◆➤➣➢➔→⇒\uf09f \t\n\r\x00\x07\x0b\x0c\x1f\u00a0\u2009\u2002\u2013"
+                 "ﬁﬃ²Ａé\u0301aZ-.@")
+
+LINES = [
+    "Senior Software Engineer — Acme Corp\t\t2019 – 2024",
+    "• Led migration of a monolith to microservices on Kubernetes (AWS EKS).",
+    "●   Built CI/CD pipelines with Jenkins and GitHub Actions;   infrastructure in Terraform.",
+    "➤ Reduced p99 latency by 40%  →  improved eﬃciency of the ﬁnance platform.",
+    "Phone: +1 (415) 555 0134   Email: jane.doe@example.com",
+    "  Mentored a team of 5 engineers; introduced code review standards.",
+    "",
+    "",
+    "",
+]
+
+
+def legacy_clean(text, keep_case=False):
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(CTRL, " ", text)
+    text = BULLETS.sub(" - ", text)
+    text = ARROWS.sub(" - ", text)
+    text = text.replace("\r", "\n")
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" +\n", "\n", text)
+    text = text.strip()
+    if not keep_case:
+        text = text.lower()
+    return text
+
+
+def legacy_phone_prepass(text):
+    return (text.replace("\u00A0", " ").replace("\u2009", " ").replace("\u2002", " ")
+            .replace("\u2013", "-").replace("\u2014", "-").replace("\uFF08", "(").replace("\uFF09", ")"))
+
+
+def fuzz(n, seed=0):
+    """Differential check of normalize() against legacy_clean on n random strings."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        text = "".join(rnd.choice(FUZZ_ALPHABET) for _ in range(rnd.randint(0, 24)))
+        keep_case = bool(i % 2)
+        new, _ = normalize(text, keep_case)
+        assert new == legacy_clean(text, keep_case), f"normalize() differs from the legacy clean_text on {text!r}"
+
+
+def long_resume(pages, seed=0):
+    rnd = random.Random(seed)
+    lines = [rnd.choice(LINES) for _ in range(pages * 55)]  # ~55 lines per page
+    return "\r\n".join(lines)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        out = fn(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000, out
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    fuzz_n = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    text = long_resume(pages)
+    print(f"{pages} pages, {len(text):,} chars")
+
+    for keep_case in (True, False):
+        old_ms, old = timed(legacy_clean, text, keep_case)
+        new_ms, (new, offsets) = timed(normalize, text, keep_case)
+        assert new == old, "normalize() output differs from the legacy clean_text"
+        print(f"clean keep_case={keep_case!s:5s}: legacy {old_ms:7.2f} ms  single-pass {new_ms:7.2f} ms  "
+              f"({old_ms / new_ms:.1f}x)")
+
+    cleaned, offsets = normalize(text, keep_case=True)
+    table = str.maketrans(dict(PHONE_REPLACEMENTS))
+    old_ms, old = timed(legacy_phone_prepass, cleaned)
+    new_ms, new = timed(phone_text, cleaned)
+    tr_ms, translated = timed(str.translate, cleaned, table)
+    assert new == old == translated
+    print(f"phone pre-pass        : legacy {old_ms:7.2f} ms  phone_text  {new_ms:7.2f} ms  translate {tr_ms:7.2f} ms")
+
+    # every email found in the cleaned text maps back to the same string in the original
+    emails = list(re.finditer(r"[\w.]+@[\w.]+", cleaned))
+    assert all(text[slice(*offsets.span(m.start(), m.end()))] == m.group() for m in emails)
+    print(f"offset map: {len(emails)} email spans mapped back exactly")
+
+    fuzz(fuzz_n)
+    print(f"differential check: {fuzz_n:,} fuzzed strings clean exactly as the legacy clean_text")
+
+
+if __name__ == "__main__":
+    main()
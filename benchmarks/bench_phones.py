@@ -0,0 +1,96 @@
+"""
+Phone extraction benchmark and regression check.
+
+    PYTHONPATH=src python benchmarks/bench_phones.py [N]
+
+Builds N synthetic resumes (default 300, some of them 20+ pages) with
+phone numbers in many formats in the header and the body, next to dates,
+years, zip codes, salaries, times and extensions. Compares the old
+extraction (PhoneNumberMatcher over the whole text with "US", then again
+with no region if nothing was found) with entities.find_phones (regex
+pre-scan, matcher on candidate windows only). Fails on any difference and
+reports the time per resume for both.
+"""
+import random
+import sys
+import time
+
+import phonenumbers
+
+from ats_nlp.nlp.entities import find_phones
+from ats_nlp.nlp.normalize import phone_text
+
+PHONES = [
+    "+1 (415) 555-0134", "415.555.0134", "(212) 555 0199", "+44 20 7946 0958", "+91 98765 43210",
+    "+49 30 901820", "+33 1 42 68 53 00", "020 7946 0958", "+1-800-555-0199 ext. 42", "555-0134",
+    "+61 2 9374 4000", "+86 10 6552 9988", "（415）555–0134", "+1 415 555 0134", "+290 2222",
+    "tel:+14155550134", "Phone:4155550134", "+7 495 123-45-67",
+]
+NOISE = [
+    "Jan 2019 – Mar 2024", "2019-2024", "ZIP 94103-1234", "salary 120,000-150,000 USD", "ISBN 978-3-16-148410-0",
+    "meeting at 2024-05-01 10:30", "pp. 123-145 (2019)", "ID 12345678", "v1.2.3.4", "Room 4155550",
+    "order #5550134", "lat 37.7749, lon -122.4194", "GPA 3.8/4.0", "12/05/2021",
+]
+WORDS = ("built services data team platform cloud led migration pipelines on call customers reliability "
+         "design review mentor python java kubernetes").split()
+
+
+def resume(rnd, pages):
+    header = [f"Jane Doe | jane@example.com | {rnd.choice(PHONES)}"]
+    if rnd.random() < 0.3:
+        header.append(f"Mobile {rnd.choice(PHONES)}")
+    body = []
+    for _ in range(pages * 40):
+        line = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 14)))
+        r = rnd.random()
+        if r < 0.15:
+            line += " " + rnd.choice(NOISE)
+        elif r < 0.17:
+            line += " call " + rnd.choice(PHONES)
+        body.append(line)
+    return "\n".join(header + ["Experience"] + body)
+
+
+def legacy_phones(text):
+    phones = []
+    for match in phonenumbers.PhoneNumberMatcher(text, "US"):
+        try:
+            phones.append(phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164))
+        except Exception:
+            continue
+    if not phones:
+        for match in phonenumbers.PhoneNumberMatcher(text, None):
+            try:
+                phones.append(phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164))
+            except Exception:
+                continue
+    return phones
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rnd = random.Random(0)
+    texts = [phone_text(resume(rnd, rnd.choice([1, 2, 3, 25]))) for _ in range(n)]
+    texts += [phone_text(f"{p}\n{q}") for p in PHONES + NOISE for q in NOISE]  # short, dense edge cases
+
+    start = time.perf_counter()
+    old = [legacy_phones(t) for t in texts]
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [[e164 for e164, _, _ in find_phones(t, "US")] for t in texts]
+    new_s = time.perf_counter() - start
+
+    diffs = [(i, o, m) for i, (o, m) in enumerate(zip(old, new)) if o != m]
+    chars = sum(map(len, texts))
+    print(f"{len(texts)} texts, {chars:,} chars, {sum(map(len, old))} phones found")
+    print(f"legacy full-text matcher : {legacy_s / len(texts) * 1000:8.2f} ms/resume")
+    print(f"candidate windows        : {new_s / len(texts) * 1000:8.2f} ms/resume  ({legacy_s / new_s:.1f}x)")
+    for i, o, m in diffs[:5]:
+        print(f"MISMATCH text {i}: legacy={o} windows={m}")
+    if diffs:
+        sys.exit(f"{len(diffs)} mismatches")
+    print("regression: identical results")
+
+
+if __name__ == "__main__":
+    main()
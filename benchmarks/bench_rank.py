@@ -0,0 +1,98 @@
+"""
+Candidate ranking throughput.
+
+    PYTHONPATH=src python benchmarks/bench_rank.py [N]
+
+Ranks N synthetic resumes against one JD two ways: a loop of
+semantic_match_score + compute_ats_score (what N /nlp/score calls cost)
+and rank_candidates (batched parse, batched encode, matrix similarity),
+and reports candidates/sec for each. It then ranks against the JD
+registered as a JobProfile (what /nlp/match runs) and exits 1 if the
+warmed profile still holds a spaCy Doc.
+"""
+import random
+import sys
+import time
+
+from spacy.tokens import Doc
+
+from ats_nlp.nlp import score
+from ats_nlp.nlp.context import DocumentContext, parse_contexts
+from ats_nlp.nlp.jobs import JobProfile
+
+SKILLS = ["java", "spring boot", "python", "react", "node.js", "docker", "kubernetes", "aws",
+          "azure", "gcp", "sql", "postgresql", "mongodb", "microservices", "git", "terraform"]
+JD = ("Backend engineer: Java and Spring Boot microservices on Kubernetes and AWS, "
+      "PostgreSQL, Terraform, CI/CD. Education in computer science; strong skills in testing.")
+SENTENCES = [
+    "Built {a} services deployed with {b} for a payments platform.",
+    "Migrated legacy batch jobs to {a} and cut costs by 30%.",
+    "Led a team of {n} engineers delivering {a} and {b} features.",
+    "Designed data pipelines on {a}; on-call for {b} clusters.",
+]
+
+
+def synthetic_resumes(n, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        skills = rnd.sample(SKILLS, rnd.randint(3, 9))
+        lines = [rnd.choice(SENTENCES).format(a=rnd.choice(skills), b=rnd.choice(skills), n=rnd.randint(2, 9))
+                 for _ in range(rnd.randint(8, 25))]
+        out.append(("Experience\n" + "\n".join(lines) + "\nSkills\n" + ", ".join(skills), skills))
+    return out
+
+
+def held_docs(value, seen=None):
+    """Number of spaCy Docs reachable from value through attributes and containers."""
+    seen = set() if seen is None else seen
+    if id(value) in seen or isinstance(value, (str, bytes, int, float, type(None))):
+        return 0
+    seen.add(id(value))
+    if isinstance(value, Doc):
+        return 1
+    if isinstance(value, dict):
+        children = list(value.values())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        children = list(value)
+    else:
+        children = list(getattr(value, "__dict__", {}).values())
+        children += [getattr(value, slot, None) for slot in getattr(type(value), "__slots__", ())]
+    return sum(held_docs(child, seen) for child in children)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    resumes = synthetic_resumes(n)
+    required = ["java", "kubernetes"]
+
+    # cold caches on both sides: distinct texts per run
+    score.EMBED_CACHE.max_bytes = 0
+    start = time.perf_counter()
+    jd = DocumentContext(JD)
+    for text, skills in resumes:
+        score.compute_ats_score(skills, jd, required, semantic=score.semantic_match_score(text, jd))
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    contexts = [DocumentContext(text) for text, _ in resumes]
+    parse_contexts(contexts)
+    ranked = score.rank_candidates(contexts, [s for _, s in resumes], DocumentContext(JD), required, top_k=10)
+    batched = time.perf_counter() - start
+
+    print(f"N={n}")
+    print(f"per-candidate loop : {loop:7.2f} s  {n / loop:8.1f} candidates/sec")
+    print(f"rank_candidates    : {batched:7.2f} s  {n / batched:8.1f} candidates/sec")
+    print("top-3:", [(i, total) for i, total, *_ in ranked[:3]])
+
+    job = JobProfile("bench", JD, required).warm()
+    start = time.perf_counter()
+    score.rank_candidates(contexts, [s for _, s in resumes], job, required, top_k=10)
+    print(f"against a JobProfile: {time.perf_counter() - start:7.2f} s")
+    docs = held_docs(job)
+    if docs:
+        sys.exit(f"warmed JobProfile still holds {docs} spaCy Doc(s)")
+
+
+if __name__ == "__main__":
+    main()
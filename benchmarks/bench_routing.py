@@ -0,0 +1,130 @@
+"""
+Section routing (routing.py) against whole-text processing, per resume kind.
+
+    PYTHONPATH=src python benchmarks/bench_routing.py [--resumes 48] [--jds 6] [--repeat 3]
+
+For every resume of the deterministic corpus (corpus.py) it counts what
+each stage is fed with routing off and on: spaCy tokens through the entity
+components, characters through skills matching, and lemma tokens that
+reach the embedding model. Without routing the model reads only the first
+256 word pieces of the lemmatized text; those are counted with the model's
+tokenizer when it has one, else estimated at 1.5 pieces per lemma. It then
+times entity extraction, skills matching and semantic_match_score on fresh
+contexts in both modes (embedding cache off) and prints p50 latencies.
+Routing only applies to resumes whose section headers are recognized
+(English "rich" layout in this corpus); the others are processed whole.
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+
+os.environ.setdefault("ATS_MICROBATCH", "0")
+os.environ.setdefault("ATS_SECTION_CACHE_SIZE", "0")  # every section is parsed
+
+import numpy as np
+
+from corpus import job_descriptions, resumes
+
+from ats_nlp.nlp import routing, score
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.embedding_cache import EmbeddingCache
+from ats_nlp.nlp.entities import extract_contacts_and_entities
+from ats_nlp.nlp.model_registry import SBERT_DIM, sbert, spacy_pipeline
+from ats_nlp.nlp.skills import SkillsEngine
+from ats_nlp.pipeline import extract_skills
+
+MODEL_WINDOW = 256  # word pieces MiniLM reads
+
+
+def _pieces(texts):
+    tokenizer = getattr(sbert(), "tokenizer", None)
+    if tokenizer is None:
+        return [int(len(t.split()) * 1.5) for t in texts]
+    return [len(tokenizer.tokenize(t)) for t in texts]
+
+
+def counts(doc, nlp):
+    """What each stage reads for one resume, whole text vs routed."""
+    ctx = DocumentContext(doc["text"])
+    tokens = lambda text: len(nlp.tokenizer(text))
+    section = lambda part: ctx.cleaned[part.start:part.end]
+    lemmas = ctx.lemmas.split()
+    chunks = score.resume_chunks(ctx)
+    (whole_pieces,) = _pieces([ctx.lemmas])
+    embedded_whole = min(len(lemmas), int(len(lemmas) * MODEL_WINDOW / whole_pieces)) if whole_pieces else 0
+    return {
+        "ner_tokens": (tokens(ctx.cleaned), sum(tokens(section(p)) for p in ctx.routed_parts("ner"))),
+        "skills_chars": (len(ctx.cleaned), sum(len(section(p)) for p in ctx.routed_parts("skills"))),
+        "embedded_lemmas": (embedded_whole, sum(n for _, n in chunks)),
+        "lemmas": len(lemmas),
+    }
+
+
+def timings(docs, jds, engine, repeat):
+    """(routing on?, stage) -> samples (s); both modes alternate per resume so drift hits them alike."""
+    out = defaultdict(list)
+    for _ in range(repeat):
+        for i, doc in enumerate(docs):
+            jd = DocumentContext(jds[i % len(jds)]["text"])
+            score.document_embedding(jd)  # the JD side is the same in both modes
+            for mode in (False, True):
+                routing.ROUTING = mode
+                ctx = DocumentContext(doc["text"])
+                ctx.cleaned
+                start = time.perf_counter()
+                extract_contacts_and_entities(ctx)
+                entities = time.perf_counter() - start
+                start = time.perf_counter()
+                extract_skills(ctx, engine)
+                skills = time.perf_counter() - start
+                start = time.perf_counter()
+                score.semantic_match_score(ctx, jd)  # includes the token components routing left for later
+                semantic = time.perf_counter() - start
+                for stage, value in (("entities", entities), ("skills", skills), ("semantic", semantic),
+                                     ("total", entities + skills + semantic)):
+                    out[(mode, stage)].append(value)
+    routing.ROUTING = True
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=48)
+    parser.add_argument("--jds", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs, jds = resumes(args.resumes, args.seed), job_descriptions(args.jds, args.seed)
+    kinds = defaultdict(list)
+    for doc in docs:
+        kinds[(doc["length"], "en" if doc["language"] == "en" else "other", doc["layout"])].append(doc)
+    nlp = spacy_pipeline()
+    engine = SkillsEngine(db_path="data/skills_db.txt")
+    score.EMBED_CACHE = EmbeddingCache("bench-routing", dim=SBERT_DIM, max_bytes=0)  # every encode is real
+    timings(docs[:4], jds, engine, 1)  # model loads
+
+    print(f"routes: {routing.routes_id()}\n")
+    print(f"{'':22s} {'n':>3s} {'NER tokens':>19s} {'skills chars':>19s} {'embedded lemmas':>19s}")
+    for kind, group in sorted(kinds.items()):
+        rows = [counts(doc, nlp) for doc in group]
+        cells = []
+        for key in ("ner_tokens", "skills_chars", "embedded_lemmas"):
+            whole, routed = (sum(r[key][j] for r in rows) / len(rows) for j in (0, 1))
+            cells.append(f"{whole:7.0f} -> {routed:7.0f}{'':3s}")
+        lemmas = sum(r["lemmas"] for r in rows) / len(rows)
+        print(f"{'/'.join(kind):22s} {len(group):3d} " + " ".join(cells) + f"  (of {lemmas:.0f})")
+
+    print(f"\n{'p50 ms':22s} {'':3s} " + "".join(f"{s:>21s}" for s in ("entities", "skills", "semantic", "total")))
+    for kind, group in sorted(kinds.items()):
+        results = timings(group, jds, engine, args.repeat)
+        cells = []
+        for stage in ("entities", "skills", "semantic", "total"):
+            whole, routed = (np.percentile(results[(m, stage)], 50) * 1000 for m in (False, True))
+            cells.append(f"{whole:8.2f} -> {routed:8.2f}")
+        print(f"{'/'.join(kind):22s} {len(group):3d} " + " ".join(f"{c:>20s}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
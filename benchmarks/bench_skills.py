@@ -0,0 +1,124 @@
+"""
+Skills matching benchmark.
+
+    PYTHONPATH=src python benchmarks/bench_skills.py
+
+Times the exact-match stage of SkillsEngine.extract for skills DBs from
+100 to 50k entries (the old per-skill substring scan vs the compiled trie),
+then full extract() with the q-gram pruned fuzzy pass against the old
+per-skill partial_ratio loop, and checks both return the same skills on a
+corpus of resumes with injected typos.
+"""
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from rapidfuzz import fuzz
+
+from ats_nlp.nlp.skill_index import ExactSkillMatcher
+from ats_nlp.nlp.skills import SkillsEngine
+
+SIZES = [100, 1_000, 10_000, 50_000]
+REPEAT = 20
+
+SYLLABLES = ["ka", "lo", "ri", "ten", "sor", "flu", "mix", "dat", "ops", "net",
+             "py", "go", "web", "ql", "js", "stack", "cloud", "ml", "ai", "lab"]
+
+RESUME = """
+Senior Software Engineer with 8 years building microservices in Java and Python.
+Skills: Java, Spring Boot, Python, Docker, Kubernetes, AWS, Terraform, CI/CD,
+PostgreSQL, MongoDB, REST API design, Git, Linux, React and Node.js.
+Experience
+- Led migration of a monolith to microservices on Kubernetes (AWS EKS).
+- Built CI/CD pipelines with Jenkins and GitHub Actions; infrastructure in Terraform.
+- Mentored a team of 5 engineers; introduced code review and testing standards.
+"""
+
+
+def synthetic_skills(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    base = Path("data/skills_db.txt")
+    skills = [s.strip().lower() for s in base.read_text().splitlines() if s.strip()] if base.exists() else []
+    seen = set(skills)
+    while len(skills) < n:
+        words = ["".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+                 for _ in range(rnd.randint(1, 3))]
+        s = " ".join(words)
+        if s not in seen:
+            seen.add(s)
+            skills.append(s)
+    return skills[:n]
+
+
+def legacy_extract(db, text, threshold=90):
+    text_l = text.lower()
+    return sorted(s for s in db if s in text_l or fuzz.partial_ratio(s, text_l) >= threshold)
+
+
+def engine_for(db):
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(db))
+    try:
+        return SkillsEngine(db_path=f.name)
+    finally:
+        os.unlink(f.name)
+
+
+def typo_corpus(db, n_docs=50, seed=1):
+    """Resumes mentioning DB skills verbatim, with a typo, or glued into other words."""
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        parts = [RESUME]
+        for skill in rnd.sample(db, min(15, len(db))):
+            mode = rnd.random()
+            if mode < 0.4 and len(skill) > 4:
+                i = rnd.randrange(len(skill))
+                skill = skill[:i] + rnd.choice("abcdexyz") + skill[i + 1:]
+            elif mode < 0.6:
+                skill = skill.replace(" ", "") + "ing"
+            parts.append(skill)
+        docs.append(", ".join(parts))
+    return docs
+
+
+def _time(fn, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    text = (RESUME * 10).lower()  # ~ a long resume
+    print(f"{'skills':>8} {'build ms':>10} {'substring ms':>14} {'trie ms':>10}")
+    for n in SIZES:
+        db = synthetic_skills(n)
+        t0 = time.perf_counter()
+        matcher = ExactSkillMatcher(db)
+        build = (time.perf_counter() - t0) * 1000
+
+        legacy = _time(lambda: [s for s in db if s in text])
+        trie = _time(lambda: matcher.find(text))
+
+        # the trie only reports boundary-aligned hits, a subset of substring hits
+        assert matcher.find(text) <= {s for s in db if s in text}
+        print(f"{n:>8} {build:>10.1f} {legacy:>14.2f} {trie:>10.2f}")
+
+    print()
+    print(f"{'skills':>8} {'legacy extract ms':>18} {'extract ms':>11} {'regressions':>12}")
+    for n in SIZES:
+        db = synthetic_skills(n)
+        engine = engine_for(db)
+        docs = typo_corpus(db)
+        mismatches = sum(engine.extract(d) != legacy_extract(db, d) for d in docs)
+        legacy = _time(lambda: legacy_extract(db, text), repeat=1 if n > 1_000 else 5)
+        new = _time(lambda: engine.extract(text))
+        print(f"{n:>8} {legacy:>18.1f} {new:>11.2f} {mismatches:>12}")
+        assert mismatches == 0, f"fuzzy index changed extract() output on {mismatches} docs"
+
+
+if __name__ == "__main__":
+    main()
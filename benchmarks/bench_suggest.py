@@ -0,0 +1,67 @@
+"""
+Term suggestion benchmark.
+
+    PYTHONPATH=src python benchmarks/bench_suggest.py
+
+Compares the old suggest_relevant_terms (encode every JD token, one
+cos_sim call per token, full sort) with the vocabulary-matrix version
+(one matrix-vector product + argpartition), and checks the top terms agree.
+"""
+import time
+
+from sentence_transformers import util
+
+from ats_nlp.nlp import score
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.model_registry import sbert
+from ats_nlp.nlp.skills import SkillsEngine
+
+JD = """
+We are hiring a Senior Backend Engineer to design and operate microservices on
+Kubernetes. You will own Java and Spring Boot services, PostgreSQL schemas and
+Kafka pipelines, drive CI/CD with Terraform and GitHub Actions, mentor engineers,
+and partner with product on observability, reliability and cost. Experience with
+AWS, Docker, Redis, gRPC and distributed tracing is a strong plus.
+"""
+RESUME_SKILLS = ["java", "spring boot", "docker", "sql", "git"]
+REPEAT = 20
+
+
+def legacy_suggest(resume_skills, jd_tokens, top_n=5):
+    cand = set(s.lower() for s in resume_skills)
+    embeddings = sbert().encode(jd_tokens, convert_to_tensor=True)
+    resume_emb = sbert().encode(" ".join(sorted(cand)) or " ", convert_to_tensor=True)
+    sims = []
+    for tok, emb in zip(jd_tokens, embeddings):
+        if tok in cand:
+            continue
+        sims.append((tok, float(util.cos_sim(resume_emb, emb.unsqueeze(0)).item())))
+    ranked = sorted(sims, key=lambda x: x[1], reverse=True)
+    return [tok for tok, _ in ranked[:top_n]]
+
+
+def main():
+    skills = SkillsEngine(db_path="data/skills_db.txt")
+    score.TERM_VOCAB.load_or_build(None, skills.all(), score.encode)
+
+    jd = DocumentContext(JD)
+    tokens = sorted(jd.lemma_tokens)
+    score.TERM_VOCAB.add(tokens, score.encode)  # steady state: JD terms already promoted
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        old = legacy_suggest(RESUME_SKILLS, tokens)
+    legacy_ms = (time.perf_counter() - start) / REPEAT * 1000
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        new = score.suggest_relevant_terms(RESUME_SKILLS, DocumentContext(JD))
+    new_ms = (time.perf_counter() - start) / REPEAT * 1000
+
+    print(f"legacy: {legacy_ms:8.2f} ms  {old}")
+    print(f"matrix: {new_ms:8.2f} ms  {new}  (includes the JD parse)")
+    print(f"top-5 overlap: {len(set(old) & set(new))}/5")
+
+
+if __name__ == "__main__":
+    main()
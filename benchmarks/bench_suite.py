@@ -0,0 +1,245 @@
+"""
+Stage-level and end-to-end benchmark suite with baseline regression checks.
+
+    PYTHONPATH=src python benchmarks/bench_suite.py [--resumes 120] [--jds 12] [--requests 60]
+        [--save-baseline benchmarks/baseline.json] [--baseline benchmarks/baseline.json]
+        [--tolerance 0.2] [--json results.json] [--by-kind] [--no-check]
+
+Uses the deterministic corpus from corpus.py. For every resume it times
+each pipeline stage on its own: clean_text, detect_language,
+split_sections, extract_contacts_and_entities, SkillsEngine.extract,
+semantic_match_score, suggest_relevant_terms and compute_ats_score. The
+embedding cache is off and JD contexts are rebuilt per call (lemmas
+preset), so each stage pays its own cost once. It then sends requests to
+/nlp/extract, /nlp/score, /nlp/analyze and /nlp/rank through the ASGI app
+in-process (result cache off, models warmed up first). It reports
+p50/p95/p99 latency and throughput.
+
+Every run also times a fixed CPU calibration loop. When it differs from
+the baseline's by more than 30% (another machine), baseline numbers are
+scaled by the ratio, so a baseline saved elsewhere still compares. The
+run is then checked against --baseline (default: benchmarks/baseline.json)
+and the script exits 1 when any p50 is more than --tolerance above the
+baseline, or any p95 more than twice that. A missing baseline is an error
+too, so a check never passes by comparing against nothing: save one with
+the real models on the target machine (--save-baseline), or pass
+--no-check to only report.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+os.environ.setdefault("ATS_RESULT_CACHE_SIZE", "0")  # measure the pipeline, not the cache
+os.environ.setdefault("ATS_SECTION_CACHE_SIZE", "0")
+os.environ.setdefault("ATS_WARMUP", "blocking")
+
+import numpy as np
+
+from corpus import job_descriptions, resumes
+
+from ats_nlp.nlp import score
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.embedding_cache import EmbeddingCache
+from ats_nlp.nlp.entities import extract_contacts_and_entities
+from ats_nlp.nlp.model_registry import SBERT_DIM
+from ats_nlp.nlp.preprocess import clean_text, detect_language
+from ats_nlp.nlp.sections import split_sections
+from ats_nlp.nlp.skills import SkillsEngine
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+STAGES = ["clean_text", "detect_language", "split_sections", "extract_contacts_and_entities",
+          "SkillsEngine.extract", "semantic_match_score", "suggest_relevant_terms", "compute_ats_score"]
+KIND_STAGES = ["clean_text", "split_sections", "extract_contacts_and_entities", "SkillsEngine.extract"]
+
+
+def calibrate():
+    """Best-of-7 ms for a fixed mix of Python, regex and numpy work (machine speed reference)."""
+    text = "Senior engineer, Java/Python, 2019 – 2024; led 12 people. " * 4000
+    matrix = np.random.default_rng(0).random((256, 384), dtype=np.float32)
+    best = float("inf")
+    for _ in range(7):
+        start = time.perf_counter()
+        sum(len(w) for w in text.split())
+        len(re.findall(r"\b\w+\b", text))
+        sorted(text.split(), key=len)
+        for _ in range(200):
+            matrix @ matrix[0]
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+class Timings:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.kinds = defaultdict(list)
+
+    def time(self, name, fn, *args, kind=None, **kwargs):
+        start = time.perf_counter()
+        out = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.samples[name].append(elapsed)
+        if kind is not None:
+            self.kinds[(name, kind)].append(elapsed)
+        return out
+
+    def summary(self):
+        out = {}
+        for name, values in self.samples.items():
+            ms = np.array(values) * 1000
+            out[name] = {
+                "n": len(ms),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "per_sec": round(len(ms) / (ms.sum() / 1000), 2) if ms.sum() else None,
+            }
+        return out
+
+
+def run_stages(docs, jds, timings):
+    engine = SkillsEngine(db_path="data/skills_db.txt")
+    jd_lemmas = {jd["text"]: DocumentContext(jd["text"]).lemmas for jd in jds}
+
+    def fresh_jd(jd):
+        ctx = DocumentContext(jd["text"])
+        ctx.lemmas = jd_lemmas[jd["text"]]
+        return ctx
+
+    for i, doc in enumerate(docs):
+        text, jd, kind = doc["text"], jds[i % len(jds)], (doc["length"], doc["language"], doc["layout"])
+        cleaned = timings.time("clean_text", clean_text, text, keep_case=True, kind=kind)
+        lang = timings.time("detect_language", detect_language, text, kind=kind)
+        sections = timings.time("split_sections", split_sections, cleaned, kind=kind)
+        timings.time("extract_contacts_and_entities", extract_contacts_and_entities,
+                     DocumentContext(text), language=lang, kind=kind)
+        skills = timings.time("SkillsEngine.extract", engine.extract, cleaned, sections.skills, kind=kind)
+
+        resume = DocumentContext(text)
+        resume.lemmas  # the parse belongs to extraction, not to scoring
+        semantic = timings.time("semantic_match_score", score.semantic_match_score, resume, fresh_jd(jd))
+        timings.time("suggest_relevant_terms", score.suggest_relevant_terms, skills, fresh_jd(jd))
+        timings.time("compute_ats_score", score.compute_ats_score, skills, fresh_jd(jd), jd["requiredSkills"],
+                     semantic)
+
+
+def run_endpoints(docs, jds, requests, timings):
+    from fastapi.testclient import TestClient
+    from ats_nlp.main import app
+
+    with TestClient(app) as client:
+        logging.getLogger("ats-nlp").setLevel(logging.WARNING)
+
+        def post(name, path, body):
+            response = timings.time(name, client.post, path, json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} -> {response.status_code}: {response.text[:200]}")
+            return response
+
+        client.post("/nlp/extract", json={"text": docs[0]["text"]})  # first-request overheads
+        for i in range(requests):
+            doc, jd = docs[i % len(docs)], jds[i % len(jds)]
+            payload = {"fileName": f"{doc['id']}.txt", "text": doc["text"]}
+            extracted = post("POST /nlp/extract", "/nlp/extract", payload).json()
+            scored = {"resume": {**payload, "normalized_skills": extracted["normalized_skills"]},
+                      "jobDescription": jd["text"], "requiredSkills": jd["requiredSkills"]}
+            post("POST /nlp/score", "/nlp/score", scored)
+            post("POST /nlp/analyze", "/nlp/analyze", {"payload": payload, "req": scored})
+            if i % 5 == 0:
+                batch = [{"text": d["text"]} for d in docs[i:i + 10]]
+                post("POST /nlp/rank (10 resumes)", "/nlp/rank",
+                     {"jobDescription": jd["text"], "requiredSkills": jd["requiredSkills"], "resumes": batch})
+
+
+def compare(results, calibration_ms, baseline, tolerance):
+    ratio = calibration_ms / baseline["meta"]["calibration_ms"]
+    # within +-30% it is the same machine and the ratio is mostly noise; scaling would only add to it
+    scale = ratio if abs(ratio - 1) > 0.3 else 1.0
+    regressions = []
+    print(f"\nbaseline from {baseline['meta'].get('created')} (machine speed ratio {ratio:.2f}, "
+          f"scaling by {scale:.2f})")
+    for name, base in baseline["results"].items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric, tol in (("p50_ms", tolerance), ("p95_ms", 2 * tolerance)):
+            limit = base[metric] * scale * (1 + tol)
+            change = current[metric] / (base[metric] * scale) - 1 if base[metric] else 0.0
+            flag = "REGRESSION" if current[metric] > limit else ""
+            if flag:
+                regressions.append(f"{name} {metric}")
+            if flag or metric == "p50_ms":
+                print(f"  {name:36s} {metric:7s} {base[metric] * scale:9.2f} -> {current[metric]:9.2f} ms "
+                      f"({change:+.0%}) {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=120)
+    parser.add_argument("--jds", type=int, default=12)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages-only", action="store_true")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", type=Path, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", type=Path, default=None)
+    parser.add_argument("--by-kind", action="store_true")
+    parser.add_argument("--no-check", action="store_true", help="report only, no baseline comparison")
+    args = parser.parse_args()
+
+    docs, jds = resumes(args.resumes, args.seed), job_descriptions(args.jds, args.seed)
+    print(f"{len(docs)} resumes ({sum(len(d['text']) for d in docs) / len(docs):.0f} chars avg), {len(jds)} JDs")
+    calibration_ms = calibrate()
+
+    score.EMBED_CACHE = EmbeddingCache("bench-suite", dim=SBERT_DIM, max_bytes=0)  # every encode is real
+    warm = Timings()
+    run_stages(docs[:4], jds, warm)  # model loads, lazy compilation
+    timings = Timings()
+    run_stages(docs, jds, timings)
+    if not args.stages_only:
+        run_endpoints(docs, jds, args.requests, timings)
+    results = timings.summary()
+
+    print(f"\n{'':36s} {'n':>5s} {'mean':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'per sec':>9s}")
+    for name, r in results.items():
+        print(f"{name:36s} {r['n']:5d} {r['mean_ms']:9.2f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['per_sec']:9.1f}")
+    print(f"calibration: {calibration_ms:.2f} ms")
+
+    if args.by_kind:
+        print(f"\np50 ms by resume kind\n{'':20s}" + "".join(f"{s[:16]:>18s}" for s in KIND_STAGES))
+        for kind in sorted({k for _, k in timings.kinds}):
+            row = [np.percentile(timings.kinds[(s, kind)], 50) * 1000 for s in KIND_STAGES]
+            print(f"{'/'.join(kind):20s}" + "".join(f"{v:18.2f}" for v in row))
+
+    meta = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "machine": platform.machine(), "calibration_ms": round(calibration_ms, 3),
+            "resumes": args.resumes, "jds": args.jds, "requests": args.requests, "seed": args.seed}
+    if args.json:
+        args.json.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+        print(f"baseline saved to {args.save_baseline}")
+        return
+
+    if args.no_check:
+        return
+    if not args.baseline.exists():
+        sys.exit(f"no baseline at {args.baseline}: save one with --save-baseline, or pass --no-check")
+    regressions = compare(results, calibration_ms, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
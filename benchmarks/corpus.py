@@ -0,0 +1,119 @@
+"""
+Deterministic synthetic resume / JD corpus for the benchmarks.
+
+    from corpus import job_descriptions, resumes
+
+``resumes(n, seed)`` mixes short (1 page) and long (6-10 pages), English
+and non-English (de/fr/es), section-rich (headers, bullets, contacts) and
+section-poor (one block of prose) resumes; each item records its kind so
+results can be broken down by it. ``job_descriptions(n, seed)`` builds JDs
+with required skills. The same seed always yields the same texts.
+"""
+import random
+
+SKILLS = ["java", "spring boot", "python", "react", "node.js", "docker", "kubernetes", "aws", "azure", "gcp",
+          "sql", "postgresql", "mongodb", "microservices", "terraform", "pandas", "pytorch", "git", "ci/cd",
+          "kafka", "redis", "typescript", "figma", "excel", "tableau"]
+TITLES = ["Software Engineer", "Senior Backend Developer", "Data Scientist", "DevOps Engineer",
+          "Frontend Developer", "Data Analyst", "Engineering Manager", "Solutions Architect"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Stark Industries", "Wayne Enterprises"]
+SCHOOLS = ["Stanford University", "TU Munich", "University of Toronto", "ETH Zurich", "MIT"]
+CITIES = ["San Francisco, CA", "Berlin", "London", "Toronto", "Madrid", "Paris"]
+NAMES = ["Jane Doe", "John Smith", "Maria Garcia", "Lukas Müller", "Aisha Khan", "Chen Wei"]
+PHONES = ["+1 (415) 555-0134", "+49 30 901820", "+44 20 7946 0958", "+33 1 42 68 53 00", "(212) 555 0199"]
+
+SENTENCES = {
+    "en": [
+        "Built {a} services deployed with {b} for a payments platform serving two million users.",
+        "Migrated legacy batch jobs to {a} and cut infrastructure costs by {n}%.",
+        "Led a team of {n} engineers delivering {a} and {b} features to enterprise customers.",
+        "Designed data pipelines on {a}; on-call for {b} clusters in production.",
+        "Introduced {a} code review standards and mentored junior developers.",
+    ],
+    "de": [
+        "Entwicklung von {a}-Diensten mit {b} für eine Zahlungsplattform mit zwei Millionen Nutzern.",
+        "Migration von Batch-Jobs nach {a}; Infrastrukturkosten um {n}% gesenkt.",
+        "Leitung eines Teams von {n} Entwicklern für {a}- und {b}-Funktionen.",
+        "Aufbau von Datenpipelines mit {a}; Rufbereitschaft für {b}-Cluster.",
+    ],
+    "fr": [
+        "Conception de services {a} déployés avec {b} pour une plateforme de paiement.",
+        "Migration des traitements par lots vers {a}, réduction des coûts de {n}%.",
+        "Direction d'une équipe de {n} ingénieurs livrant des fonctionnalités {a} et {b}.",
+        "Mise en place de pipelines de données sur {a}; astreinte sur les clusters {b}.",
+    ],
+    "es": [
+        "Desarrollo de servicios {a} desplegados con {b} para una plataforma de pagos.",
+        "Migración de procesos por lotes a {a}, reduciendo costes un {n}%.",
+        "Dirección de un equipo de {n} ingenieros que entrega funciones de {a} y {b}.",
+        "Diseño de flujos de datos en {a}; guardias para clústeres de {b}.",
+    ],
+}
+HEADERS = {
+    "en": ("Summary", "Experience", "Education", "Skills", "Certifications", "Projects"),
+    "de": ("Profil", "Berufserfahrung", "Ausbildung", "Kenntnisse", "Zertifikate", "Projekte"),
+    "fr": ("Profil", "Expérience", "Formation", "Compétences", "Certifications", "Projets"),
+    "es": ("Resumen", "Experiencia", "Educación", "Habilidades", "Certificaciones", "Proyectos"),
+}
+LENGTHS = ("short", "long")
+# English is half of real traffic
+LANGUAGE_MIX = ("en", "de", "en", "fr", "en", "es")
+LAYOUTS = ("rich", "poor")
+
+
+def _sentence(rnd, lang, skills):
+    return rnd.choice(SENTENCES[lang]).format(a=rnd.choice(skills), b=rnd.choice(skills), n=rnd.randint(3, 40))
+
+
+def _resume(rnd, length, lang, layout):
+    skills = rnd.sample(SKILLS, rnd.randint(5, 12))
+    jobs = rnd.randint(2, 3) if length == "short" else rnd.randint(12, 20)
+    bullets = (3, 5) if length == "short" else (8, 14)
+    if layout == "poor":
+        body = " ".join(_sentence(rnd, lang, skills) for _ in range(jobs * rnd.randint(*bullets)))
+        return f"{rnd.choice(NAMES)}\n{body}\n"
+
+    summary, experience, education, skills_h, certs, projects = HEADERS[lang]
+    name = rnd.choice(NAMES)
+    lines = [name, f"{name.split()[0].lower()}@example.com | {rnd.choice(PHONES)} | {rnd.choice(CITIES)}", "",
+             summary, _sentence(rnd, lang, skills), "", experience]
+    for _ in range(jobs):
+        start = rnd.randint(2005, 2021)
+        lines.append(f"{rnd.choice(TITLES)} — {rnd.choice(COMPANIES)}\t{start} – {start + rnd.randint(1, 4)}")
+        lines += [f"• {_sentence(rnd, lang, skills)}" for _ in range(rnd.randint(*bullets))]
+        lines.append("")
+    lines += [education, f"B.Sc. Computer Science, {rnd.choice(SCHOOLS)}, {rnd.randint(2000, 2018)}", "",
+              skills_h, ", ".join(skills), ""]
+    if rnd.random() < 0.6:
+        lines += [certs, "AWS Certified Solutions Architect – Associate", ""]
+    if rnd.random() < 0.5:
+        lines += [projects] + [f"● {_sentence(rnd, lang, skills)}" for _ in range(3)]
+    return "\n".join(lines)
+
+
+def resumes(n, seed=0):
+    """n resume dicts (id, text, length, language, layout), cycling through every kind."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        length, layout = LENGTHS[i % 2], LAYOUTS[(i // 2) % 2]
+        lang = LANGUAGE_MIX[(i // 4) % len(LANGUAGE_MIX)]
+        out.append({"id": f"r{i:05d}", "text": _resume(rnd, length, lang, layout),
+                    "length": length, "language": lang, "layout": layout})
+    return out
+
+
+def job_descriptions(n, seed=0):
+    """n JD dicts (id, text, requiredSkills)."""
+    rnd = random.Random(seed + 1)
+    out = []
+    for i in range(n):
+        required = rnd.sample(SKILLS, 4)
+        nice = rnd.sample([s for s in SKILLS if s not in required], 3)
+        text = (f"{rnd.choice(TITLES)} at {rnd.choice(COMPANIES)} ({rnd.choice(CITIES)}).\n"
+                f"We are looking for an engineer with strong experience in {', '.join(required)}. "
+                f"Nice to have: {', '.join(nice)}. "
+                + " ".join(_sentence(rnd, "en", required + nice) for _ in range(rnd.randint(4, 10)))
+                + "\nRequirements: degree in computer science or equivalent; excellent communication skills.")
+        out.append({"id": f"jd{i:04d}", "text": text, "requiredSkills": required})
+    return out
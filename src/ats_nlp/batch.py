@@ -0,0 +1,319 @@
+"""
+Offline batch extraction (and scoring) over a corpus, without HTTP.
+
+    python -m ats_nlp.batch INPUT OUTPUT_DIR [--jd jd.txt --required-skills python,docker]
+        [--workers N] [--chunk-size 64] [--shard-size 10000] [--include-text] [--restart]
+
+INPUT is a directory of .txt resumes or a JSONL file of ResumePayload
+records (an optional "id" is echoed back). Every document goes through the
+same extract_resume / score_resume as the API, on a process pool whose
+workers load the models once. Results are written to OUTPUT_DIR/part-NNNNN.jsonl
+(``--shard-size`` documents each, in whole chunks). OUTPUT_DIR/progress.jsonl records every
+finished chunk, so rerunning the same command after an interruption skips
+what is done and truncates shards back to their last recorded chunk. At
+the end, per-stage throughput is printed and saved to OUTPUT_DIR/summary.json.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Workers are single-threaded pipelines: no micro-batcher threads (they do not survive
+# fork), and one torch thread each since the parallelism comes from the processes.
+os.environ.setdefault("ATS_MICROBATCH", "0")
+os.environ.setdefault("ATS_TORCH_THREADS", "1")
+# every section of a corpus is seen once; caching them would only cost memory
+os.environ.setdefault("ATS_SECTION_CACHE_SIZE", "0")
+
+from ats_nlp.models import ResumePayload
+from ats_nlp.nlp.context import DocumentContext, parse_contexts
+from ats_nlp.nlp.metrics import STAGE_SECONDS
+from ats_nlp.nlp.model_registry import MODELS
+from ats_nlp.nlp.score import TERM_VOCAB, TERM_VOCAB_DIR, resume_embeddings
+from ats_nlp.nlp.skills import SkillsEngine
+from ats_nlp.pipeline import extract_resume, score_resume
+
+Item = Tuple[int, str, str]  # (document index, "path" | "line", value)
+
+_WORKER: Dict = {}
+
+
+def _init_worker(skills_db: str, jd_text: Optional[str], required_skills: List[str], include_text: bool) -> None:
+    threads = os.environ.get("ATS_TORCH_THREADS")
+    try:
+        import torch
+        torch.set_num_threads(int(threads))
+    except (ImportError, TypeError, ValueError):
+        pass
+    MODELS.warm_up(["spacy"] + (["sbert"] if jd_text else []))
+    if jd_text:
+        TERM_VOCAB.load(TERM_VOCAB_DIR)
+    _WORKER.update(
+        skills=SkillsEngine(db_path=skills_db),
+        jd=DocumentContext(jd_text) if jd_text else None,  # parsed and embedded once per worker
+        required=required_skills,
+        include_text=include_text,
+        stages={},
+    )
+
+
+def _load(kind: str, value: str, index: int) -> Tuple[str, ResumePayload]:
+    if kind == "path":
+        name = os.path.basename(value)
+        return name, ResumePayload(fileName=name, text=Path(value).read_text(encoding="utf-8", errors="ignore"))
+    raw = json.loads(value)
+    payload = ResumePayload.model_validate(raw)
+    return str(raw.get("id") or payload.fileName or index), payload
+
+
+def _stage_delta() -> Dict[str, Tuple[int, float]]:
+    """Stage counts/seconds since the previous call in this worker."""
+    totals = {labels[0]: value for labels, value in STAGE_SECONDS.totals().items()}
+    last = _WORKER["stages"]
+    _WORKER["stages"] = totals
+    return {stage: (n - last.get(stage, (0, 0.0))[0], s - last.get(stage, (0, 0.0))[1])
+            for stage, (n, s) in totals.items()}
+
+
+def _run_chunk(task: Tuple[int, List[Item]]) -> Tuple[int, str, int, int, Dict[str, Tuple[int, float]]]:
+    """Extract (and score) one chunk; returns its JSONL, document and error counts and stage timings."""
+    chunk, items = task
+    records: List[Dict] = [{"id": str(index), "fileName": None} for index, _, _ in items]
+    docs = []
+    for pos, (index, kind, value) in enumerate(items):
+        try:
+            record_id, payload = _load(kind, value, index)
+            records[pos] = {"id": record_id, "fileName": payload.fileName}
+            if not payload.text:
+                raise ValueError("text is required")
+            docs.append((pos, payload, DocumentContext(payload.text)))
+        except Exception as e:
+            records[pos]["error"] = str(e)
+
+    try:
+        parse_contexts([ctx for _, _, ctx in docs], ner=True)
+    except Exception:
+        pass  # parsed one by one below, so only the broken document fails
+    done = []
+    for pos, payload, ctx in docs:
+        try:
+            extracted = extract_resume(payload, ctx, _WORKER["skills"])
+            records[pos]["extracted"] = extracted.model_dump(exclude=None if _WORKER["include_text"] else {"text"})
+            done.append((pos, extracted, ctx))
+        except Exception as e:
+            records[pos]["error"] = str(e)
+
+    jd = _WORKER["jd"]
+    if jd is not None and done:
+        try:
+            parse_contexts([ctx for _, _, ctx in done])  # lemmas: the token components, one call for the chunk
+            resume_embeddings([ctx for _, _, ctx in done])  # one encode call for the chunk
+        except Exception:
+            pass
+        for pos, extracted, ctx in done:
+            try:
+                records[pos]["score"] = score_resume(extracted.normalized_skills, ctx, jd,
+                                                     _WORKER["required"]).model_dump()
+            except Exception as e:
+                records[pos]["error"] = str(e)
+
+    errors = sum("error" in r for r in records)
+    lines = "".join(json.dumps(r) + "\n" for r in records)
+    return chunk, lines, len(items), errors, _stage_delta()
+
+
+def iter_items(path: Path) -> Iterator[Item]:
+    """Documents in a stable order: sorted .txt names, or non-blank JSONL lines."""
+    if path.is_dir():
+        with os.scandir(path) as entries:
+            names = sorted(e.name for e in entries if e.name.endswith(".txt") and e.is_file())
+        for i, name in enumerate(names):
+            yield i, "path", os.path.join(path, name)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        for i, line in enumerate(lines):
+            yield i, "line", line
+
+
+class Checkpoint:
+    """
+    Progress of one batch run inside its output directory: run.json holds
+    the parameters, progress.jsonl one line per finished chunk (its shard
+    and that shard's size after the write). Opening an existing run
+    truncates every shard to its last recorded size, dropping output of
+    chunks that were written but not recorded.
+    """
+
+    def __init__(self, out_dir: Path, params: Dict, restart: bool = False):
+        self.out_dir = out_dir
+        self.progress_path = out_dir / "progress.jsonl"
+        run_path = out_dir / "run.json"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if restart:
+            for path in [run_path, self.progress_path, out_dir / "summary.json", *out_dir.glob("part-*.jsonl")]:
+                path.unlink(missing_ok=True)
+        if run_path.exists() and json.loads(run_path.read_text()) != params:
+            raise SystemExit(f"{out_dir} holds a run with other parameters; use --restart or another directory")
+        run_path.write_text(json.dumps(params, indent=2))
+
+        self.done = set()
+        self.docs = self.errors = 0
+        ends: Dict[str, int] = {}
+        if self.progress_path.exists():
+            valid = 0
+            with open(self.progress_path, "rb") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # torn last line; cut below so new records do not follow it
+                    valid += len(line)
+                    self.done.add(rec["chunk"])
+                    self.docs += rec["docs"]
+                    self.errors += rec["errors"]
+                    ends[rec["shard"]] = max(ends.get(rec["shard"], 0), rec["end"])
+            with open(self.progress_path, "r+b") as f:
+                f.truncate(valid)
+        for shard in out_dir.glob("part-*.jsonl"):
+            with open(shard, "r+b") as f:
+                f.truncate(ends.get(shard.name, 0))
+        self._progress = open(self.progress_path, "a", encoding="utf-8")
+
+    def record(self, chunk: int, shard: str, end: int, docs: int, errors: int) -> None:
+        self._progress.write(json.dumps({"chunk": chunk, "shard": shard, "end": end, "docs": docs,
+                                         "errors": errors}) + "\n")
+        self._progress.flush()
+        self.done.add(chunk)
+        self.docs += docs
+        self.errors += errors
+
+    def close(self) -> None:
+        self._progress.close()
+
+
+def _dispatch(tasks, workers: int, init_args: tuple, on_result) -> None:
+    if workers == 1:
+        _init_worker(*init_args)
+        for task in tasks:
+            on_result(_run_chunk(task))
+        return
+    # bounded submission: the input is read only a few chunks ahead of the workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending = set()
+        try:
+            for task in tasks:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        on_result(future.result())
+                pending.add(pool.submit(_run_chunk, task))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    on_result(future.result())
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(prog="python -m ats_nlp.batch", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("input", type=Path, help="directory of .txt resumes or a JSONL file of ResumePayload")
+    parser.add_argument("output", type=Path, help="output directory (shards, progress, summary)")
+    parser.add_argument("--jd", type=Path, default=None, help="job description text file; enables scoring")
+    parser.add_argument("--required-skills", default="", help="comma-separated required skills for scoring")
+    parser.add_argument("--skills-db", default="data/skills_db.txt")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=64, help="documents per task (and per nlp.pipe call)")
+    parser.add_argument("--shard-size", type=int, default=10000, help="documents per output shard")
+    parser.add_argument("--include-text", action="store_true", help="keep the resume text in the output")
+    parser.add_argument("--restart", action="store_true", help="discard previous progress in OUTPUT_DIR")
+    args = parser.parse_args(argv)
+
+    jd_text = args.jd.read_text(encoding="utf-8") if args.jd else None
+    required = [s.strip() for s in args.required_skills.split(",") if s.strip()]
+    chunks_per_shard = max(1, args.shard_size // args.chunk_size)
+    params = {
+        "input": str(args.input.resolve()),
+        "chunk_size": args.chunk_size,
+        "chunks_per_shard": chunks_per_shard,
+        "jd_sha1": hashlib.sha1(jd_text.encode("utf-8")).hexdigest() if jd_text else None,
+        "required_skills": required,
+        "include_text": args.include_text,
+    }
+    checkpoint = Checkpoint(args.output, params, restart=args.restart)
+    resumed = checkpoint.docs
+    if checkpoint.done:
+        print(f"⏩ Resuming: {len(checkpoint.done)} chunks ({checkpoint.docs} documents) already done")
+
+    items = iter_items(args.input)
+    chunks = ((i, list(group)) for i, group in
+              enumerate(iter(lambda: list(itertools.islice(items, args.chunk_size)), [])))
+    tasks = (task for task in chunks if task[0] not in checkpoint.done)
+
+    stages: Dict[str, List[float]] = {}
+    started = last_report = time.perf_counter()
+
+    def on_result(result) -> None:
+        nonlocal last_report
+        chunk, lines, docs, errors, delta = result
+        shard = f"part-{chunk // chunks_per_shard:05d}.jsonl"
+        with open(args.output / shard, "ab") as f:
+            f.write(lines.encode("utf-8"))
+            end = f.tell()
+        checkpoint.record(chunk, shard, end, docs, errors)
+        for stage, (n, seconds) in delta.items():
+            total = stages.setdefault(stage, [0, 0.0])
+            total[0] += n
+            total[1] += seconds
+        now = time.perf_counter()
+        if now - last_report >= 10:
+            last_report = now
+            done = checkpoint.docs - resumed
+            print(f"… {checkpoint.docs} documents ({done / (now - started):.1f} docs/s, {checkpoint.errors} errors)")
+
+    try:
+        _dispatch(tasks, max(1, args.workers), (args.skills_db, jd_text, required, args.include_text), on_result)
+    except KeyboardInterrupt:
+        print(f"⏸️ Interrupted after {checkpoint.docs} documents; rerun the same command to resume", file=sys.stderr)
+        raise SystemExit(130)
+    finally:
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - started
+    processed = checkpoint.docs - resumed
+    summary = {
+        "documents": checkpoint.docs,
+        "processed": processed,
+        "errors": checkpoint.errors,
+        "workers": args.workers,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(processed / elapsed, 2) if elapsed else None,
+        # stage seconds are summed over workers (stages nest: e.g. entities include the spaCy parse)
+        "stages": {
+            stage: {"calls": n, "seconds": round(seconds, 3),
+                    "ms_per_call": round(1000 * seconds / n, 3) if n else None,
+                    "docs_per_sec": round(processed / seconds, 1) if seconds else None}
+            for stage, (n, seconds) in sorted(stages.items(), key=lambda kv: -kv[1][1]) if n
+        },
+    }
+    (args.output / "summary.json").write_text(json.dumps(summary, indent=2))
+
+    print(f"✅ {processed} documents in {elapsed:.1f}s ({summary['docs_per_sec']} docs/s, {args.workers} workers, "
+          f"{checkpoint.errors} errors total) → {args.output}")
+    print(f"{'stage':32s} {'calls':>9s} {'seconds':>10s} {'ms/call':>9s} {'docs/s':>10s}")
+    for stage, s in summary["stages"].items():
+        print(f"{stage:32s} {s['calls']:9d} {s['seconds']:10.2f} {s['ms_per_call'] or 0:9.3f} "
+              f"{s['docs_per_sec'] or 0:10.1f}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
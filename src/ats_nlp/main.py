@@ -1,23 +1,44 @@
+import json
 import logging
 import os
-from fastapi import FastAPI, HTTPException, Request
+import random
+import threading
+import time
+from functools import partial
+from typing import Callable, List
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
 
-from ats_nlp.models import ResumePayload, ScoreRequest, ScoreResponse
-from ats_nlp.nlp.preprocess import clean_text, detect_language
-from ats_nlp.nlp.sections import split_sections
-from ats_nlp.nlp.entities import extract_contacts_and_entities, load_custom_if_available
+from ats_nlp.models import (
+    BatchExtractItem, JobCreateRequest, JobMatch, JobMatchRequest, JobMatchResponse, JobResponse,
+    ModelVersions, RankedCandidate, RankRequest, RankResponse, ResumePayload, RetrainJob, ScoreRequest,
+    ScoreResponse, StreamExtractItem, StreamScoreItem
+)
+from ats_nlp.nlp.model_registry import (
+    CUSTOM_NER_DIR, MODELS, SBERT_BACKEND, SBERT_CACHE_ID, SPACY_MODEL, custom_ner_source, rss_mb
+)
+from ats_nlp.nlp.context import DocumentContext, parse_contexts, parser_stats
+from ats_nlp.nlp.routing import routes_id
 from ats_nlp.nlp.skills import SkillsEngine
-from ats_nlp.nlp.score import compute_ats_score, semantic_match_score
-from ats_nlp.nlp.bootstrap_ner import bootstrap_directory
-from ats_nlp.nlp.custom_ner import train_custom_ner, load_custom_ner
+from ats_nlp.nlp.score import (
+    EMBED_CACHE, ENCODE_BATCHER, TERM_VOCAB, TERM_VOCAB_DIR, compute_ats_score, document_embedding, encode,
+    rank_candidates, resume_embedding
+)
+from ats_nlp.nlp.jobs import JobProfile, JobRegistry
+from ats_nlp.nlp.vector_index import VectorIndex
+from ats_nlp.nlp.custom_ner import activate_version, current_version, list_versions
+from ats_nlp.nlp.retrain import RetrainJobs
+from ats_nlp.nlp.result_cache import ResultCache, content_key, etag_matches
+from ats_nlp.nlp.section_cache import SECTION_CACHE, recomputed_sections
+from ats_nlp.nlp.metrics import BATCH_SIZE, CONTENT_TYPE, METRICS
+from ats_nlp.nlp.streaming import NDJSON, DuplexStreamingResponse, stream_ndjson
+from ats_nlp.pipeline import extract_resume, extract_skills, score_resume
 
 # ---------- Enhanced Logging ----------
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.getenv("ATS_LOG_LEVEL", "INFO").upper(),
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     handlers=[
         logging.StreamHandler(),
@@ -25,17 +46,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ats-nlp")
 
-# Debug middleware to log all requests
-class DebugMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        logger.info(f"🔍 Request: {request.method} {request.url}")
-        logger.info(f"🔍 Headers: {dict(request.headers)}")
-        logger.info(f"🔍 Client: {request.client}")
-        
-        response = await call_next(request)
-        
-        logger.info(f"🔍 Response: {response.status_code}")
-        return response
+_STARTED = time.perf_counter()
+STARTUP = {"warmup": os.getenv("ATS_WARMUP", "background")}
+
+REQUEST_SECONDS = METRICS.histogram("ats_request_seconds", "HTTP request latency.", ["method", "route"])
+REQUESTS = METRICS.counter("ats_requests_total", "HTTP requests by response status.", ["method", "route", "status"])
+access_logger = logging.getLogger("ats-nlp.access")
+# One JSON line per sampled request; errors and slow requests are always logged
+LOG_SAMPLE_RATE = float(os.getenv("ATS_LOG_SAMPLE_RATE", "0.01"))
+SLOW_REQUEST_SECONDS = float(os.getenv("ATS_SLOW_REQUEST_MS", "1000")) / 1000.0
+
+class RequestMetricsMiddleware:
+    """
+    Times every request into ats_request_seconds / ats_requests_total,
+    labelled by route template (not raw path, so job ids do not explode the
+    series), and writes sampled structured access logs. Plain ASGI rather
+    than BaseHTTPMiddleware: no extra task or body buffering per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, scope["method"], route)
+            REQUESTS.inc(scope["method"], route, str(status))
+            if status >= 500 or elapsed >= SLOW_REQUEST_SECONDS or random.random() < LOG_SAMPLE_RATE:
+                headers = dict(scope.get("headers") or [])
+                access_logger.info(json.dumps({
+                    "method": scope["method"],
+                    "route": route,
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "client": scope["client"][0] if scope.get("client") else None,
+                    "request_id": headers.get(b"x-request-id", b"").decode("latin-1") or None,
+                    "content_length": int(headers.get(b"content-length", 0) or 0),
+                }))
 
 app = FastAPI(
     title="ATS NLP Service", 
@@ -45,8 +107,7 @@ app = FastAPI(
     debug=True  # Enable debug mode
 )
 
-# Add debug middleware first
-app.add_middleware(DebugMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 # CORS with more permissive settings for debugging
 app.add_middleware(
@@ -68,6 +129,26 @@ async def startup_event():
     logger.info(f"   - Health: /health")
     logger.info(f"   - Docs: /docs")
     logger.info(f"   - OpenAPI: /openapi.json")
+    STARTUP["ready_seconds"] = round(time.perf_counter() - _STARTED, 3)
+    # background: serve right away, models load on a thread (first requests may wait on them)
+    # blocking: load everything before accepting traffic; lazy: load on first use
+    if STARTUP["warmup"] == "blocking":
+        _warm_up()
+    elif STARTUP["warmup"] != "lazy":
+        threading.Thread(target=_warm_up, name="warmup", daemon=True).start()
+    else:
+        TERM_VOCAB.load(TERM_VOCAB_DIR)
+    # pick up custom NER versions activated by a retrain job or another worker
+    # (the custom NER is part of the spaCy pipeline, which is reassembled)
+    MODELS.watch(["spacy"], interval=float(os.getenv("ATS_MODEL_POLL_SECONDS", "5")))
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # keep JD terms promoted into the vocabulary during this run
+    try:
+        TERM_VOCAB.save(TERM_VOCAB_DIR)
+    except Exception as e:
+        logger.error(f"❌ Failed to save term vocabulary: {e}")
 
 # ---------- Globals ----------
 try:
@@ -77,15 +158,87 @@ except Exception as e:
     logger.error(f"❌ Failed to load skills engine: {e}")
     SKILLS = None
 
-try:
-    CUSTOM_NLP = load_custom_if_available("data/custom_ner")
-    if CUSTOM_NLP:
-        logger.info("✅ Custom NLP model loaded successfully")
+def _warm_up():
+    """Load spaCy (with the custom NER) and SBERT once, then fill the term vocabulary."""
+    start = time.perf_counter()
+    MODELS.warm_up()
+    source = custom_ner_source()
+    if source == "rules":
+        logger.info("ℹ️ No custom NLP model found, using keyword rules (this is OK)")
+    elif source:
+        logger.info(f"✅ Custom NLP model {source} loaded successfully")
     else:
         logger.info("ℹ️ No custom NLP model found (this is OK)")
+    try:
+        # encodes only skills missing from the persisted matrix
+        TERM_VOCAB.load_or_build(TERM_VOCAB_DIR, SKILLS.all() if SKILLS else [], encode)
+        logger.info(f"✅ Term vocabulary ready ({len(TERM_VOCAB)} terms)")
+    except Exception as e:
+        logger.error(f"❌ Failed to build term vocabulary: {e}")
+    STARTUP["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+# Extraction results by text + model/skills-DB version; ATS_RESULT_CACHE_DB shares them across workers
+EXTRACT_CACHE = ResultCache(
+    max_entries=int(os.getenv("ATS_RESULT_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("ATS_RESULT_CACHE_TTL", "3600")),
+    sqlite_path=os.getenv("ATS_RESULT_CACHE_DB") or None,
+)
+# Fields of ResumePayload produced by _extract (the rest is echoed from the request)
+EXTRACTED_FIELDS = {"sections", "entities", "normalized_skills", "language"}
+
+# NDJSON streaming endpoints: records in flight per request, and the longest accepted line
+STREAM_CONCURRENCY = int(os.getenv("ATS_STREAM_CONCURRENCY", "4"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("ATS_STREAM_MAX_LINE_BYTES", str(5 * 1024 * 1024)))
+
+# Pre-indexed job descriptions, persisted next to the job index (below) so that both survive
+# restarts together and are shared by all workers; ATS_JOB_REGISTRY_PATH="" keeps them in memory.
+JOB_INDEX_DIR = os.getenv("ATS_JOB_INDEX_DIR", "data/job_index")
+
+def _unindex_jobs(job_ids: list):
+    if JOB_INDEX is not None:
+        for job_id in job_ids:
+            JOB_INDEX.delete(job_id)
+
+JOBS = JobRegistry(
+    max_jobs=int(os.getenv("ATS_JOB_REGISTRY_SIZE", "1000")),
+    persist_path=os.getenv("ATS_JOB_REGISTRY_PATH", os.path.join(JOB_INDEX_DIR, "jobs.jsonl")) or None,
+    on_evict=_unindex_jobs,  # evicted jobs leave the index too
+)
+
+# Embedding index of every registered job for resume -> jobs matching.
+# Exact search by default; ATS_JOB_INDEX_NLIST > 0 trains an IVF layout once enough jobs exist.
+try:
+    JOB_INDEX = VectorIndex(JOB_INDEX_DIR, dim=EMBED_CACHE.dim,
+                            nprobe=int(os.getenv("ATS_JOB_INDEX_NPROBE", "8")))
+    JOB_INDEX_NLIST = int(os.getenv("ATS_JOB_INDEX_NLIST", "0"))
+    logger.info(f"✅ Job index loaded ({len(JOB_INDEX)} jobs, {JOB_INDEX.mode})")
 except Exception as e:
-    logger.error(f"❌ Error loading custom NLP: {e}")
-    CUSTOM_NLP = None
+    logger.error(f"❌ Failed to open job index: {e}")
+    JOB_INDEX = None
+
+def _resolve_job(req: ScoreRequest | RankRequest):
+    """The JD to score against: a registered JobProfile (by jobId) or the raw jobDescription."""
+    if req.jobId:
+        job = JOBS.get(req.jobId)
+        if job is None:
+            raise HTTPException(404, f"job {req.jobId} not found")
+        return job
+    if not req.jobDescription:
+        raise HTTPException(400, "jobDescription or jobId is required")
+    return DocumentContext(req.jobDescription)
+
+def _required_skills(req: ScoreRequest | RankRequest, jd) -> list:
+    if req.requiredSkills is not None:
+        return req.requiredSkills
+    return jd.required_skills if isinstance(jd, JobProfile) else []
+
+def _job_response(job: JobProfile) -> JobResponse:
+    return JobResponse(
+        jobId=job.job_id,
+        requiredSkills=job.required_skills,
+        terms=job.cached("terms", lambda: sorted(job.lemma_tokens)),
+        createdAt=job.created_at
+    )
 
 # Add a root endpoint with debug info
 @app.get("/")
@@ -102,7 +255,7 @@ def root():
             "working_dir": os.getcwd(),
             "python_path": os.environ.get('PYTHONPATH'),
             "skills_loaded": SKILLS is not None,
-            "custom_nlp_loaded": CUSTOM_NLP is not None
+            "custom_nlp_loaded": custom_ner_source() not in (None, "rules")
         }
     }
 
@@ -115,10 +268,55 @@ def health():
         "version": "2.3",
         "components": {
             "skills_engine": "ok" if SKILLS else "error",
-            "custom_nlp": "ok" if CUSTOM_NLP else "not_loaded"
-        }
+            "custom_nlp": custom_ner_source() or "not_loaded",
+            "sbert_backend": SBERT_BACKEND
+        },
+        "models": MODELS.stats(),
+        "startup": STARTUP,
+        "rss_mb": round(rss_mb(), 1),
+        "embedding_cache": EMBED_CACHE.stats(),
+        "result_cache": EXTRACT_CACHE.stats(),
+        "section_cache": SECTION_CACHE.stats(),
+        "schedulers": _scheduler_stats()
     }
 
+def _scheduler_stats() -> dict:
+    return {**({ENCODE_BATCHER.name: ENCODE_BATCHER.stats()} if ENCODE_BATCHER else {}), **parser_stats()}
+
+def _cache_stats() -> dict:
+    return {"embedding": EMBED_CACHE.stats(), "result": EXTRACT_CACHE.stats(), "section": SECTION_CACHE.stats()}
+
+# Read at scrape time from the same stats() that /health reports
+METRICS.callback("ats_cache_hits_total", "Cache hits by cache and tier.", lambda: [
+    ({"cache": name, "tier": tier}, stats[field])
+    for name, stats in _cache_stats().items()
+    for tier, field in (("memory", "hits"), ("disk", "disk_hits"), ("sqlite", "store_hits")) if field in stats
+], kind="counter")
+METRICS.callback("ats_cache_misses_total", "Cache misses by cache.", lambda: [
+    ({"cache": name}, stats["misses"]) for name, stats in _cache_stats().items()
+], kind="counter")
+METRICS.callback("ats_cache_hit_ratio", "Hits / lookups since start, by cache.", lambda: [
+    ({"cache": name}, stats["hit_rate"]) for name, stats in _cache_stats().items()
+])
+METRICS.callback("ats_cache_entries", "Entries held in memory, by cache.", lambda: [
+    ({"cache": name}, stats["entries"]) for name, stats in _cache_stats().items()
+])
+METRICS.callback("ats_batch_queue_depth", "Requests waiting for a micro-batch, by batcher.", lambda: [
+    ({"batcher": name}, stats["queue_depth"]) for name, stats in _scheduler_stats().items()
+])
+METRICS.callback("ats_model_ready", "1 when the model is loaded, by model and version.", lambda: [
+    ({"model": name, "version": str(info.get("version") or "")}, 1 if info["status"] == "ready" else 0)
+    for name, info in MODELS.stats().items()
+])
+METRICS.callback("ats_resident_memory_bytes", "Resident set size of this worker.", lambda: [
+    ({}, int(rss_mb() * 1024 * 1024))
+])
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format: stage/request latency histograms, batch sizes, caches, queues, models."""
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
+
 # Explicit OpenAPI endpoint
 @app.get("/openapi.json")
 def get_openapi():
@@ -134,112 +332,406 @@ def docs_redirect():
         status_code=200
     )
 
+def _extract(payload: ResumePayload, ctx: DocumentContext) -> ResumePayload:
+    return extract_resume(payload, ctx, SKILLS)
+
+def _extract_key(payload: ResumePayload) -> str:
+    """Everything an extraction depends on: the text, the phone region hint, the models/skills DB and the section routes."""
+    return content_key(
+        payload.text,
+        payload.metadata.region if payload.metadata else None,
+        SPACY_MODEL,
+        MODELS.stats()["spacy"].get("version"),
+        SKILLS.version if SKILLS else None,
+        routes_id()
+    )
+
+def _extract_etag(payload: ResumePayload, key: str) -> str:
+    # the response also echoes fileName and metadata
+    return content_key(key, payload.fileName, payload.metadata.model_dump() if payload.metadata else None)
+
+def _cached_extract(payload: ResumePayload, key: str) -> ResumePayload | None:
+    cached = EXTRACT_CACHE.get(key)
+    if cached is None:
+        return None
+    return ResumePayload(fileName=payload.fileName, text=payload.text, metadata=payload.metadata, **cached)
+
+def _store_extract(key: str, result: ResumePayload) -> None:
+    EXTRACT_CACHE.put(key, result.model_dump(include=EXTRACTED_FIELDS))
+
+def _not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """304 when the client already holds this representation; otherwise tag the response."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+    response.headers["ETag"] = f'"{etag}"'
+    return None
+
 @app.post("/nlp/extract", response_model=ResumePayload)
-def extract(payload: ResumePayload):
+def extract(payload: ResumePayload, request: Request, response: Response):
     if not payload.text:
         raise HTTPException(400, "text is required")
+    key = _extract_key(payload)
+    not_modified = _not_modified(request, response, _extract_etag(payload, key))
+    if not_modified is not None:
+        return not_modified
+    result = _cached_extract(payload, key)
+    if result is None:
+        result = _extract(payload, DocumentContext(payload.text))
+        _store_extract(key, result)
+    return result
 
-    lang = detect_language(payload.text)
-    cleaned = clean_text(payload.text, keep_case=True)  # preserve case for NER
+@app.post("/nlp/extract/batch", response_model=List[BatchExtractItem])
+def extract_batch(
+    payloads: List[ResumePayload],
+    batch_size: int = Query(64, ge=1, le=1024),
+    n_process: int = Query(1, ge=1, le=os.cpu_count() or 1)
+):
+    """
+    Extract many resumes in one call. Cleaning runs up front, NER runs as one
+    nlp.pipe over the whole list (``batch_size`` docs at a time, bypassing
+    the micro-batcher), and a failing item only fails its own entry.
+    Results come back in input order.
+    """
+    BATCH_SIZE.observe(len(payloads), "extract_batch")
+    results: List[BatchExtractItem] = []
+    contexts, keys = {}, {}
+    for i, payload in enumerate(payloads):
+        if not payload.text:
+            results.append(BatchExtractItem(index=i, fileName=payload.fileName, error="text is required"))
+            continue
+        keys[i] = _extract_key(payload)
+        cached = _cached_extract(payload, keys[i])
+        if cached is not None:
+            results.append(BatchExtractItem(index=i, fileName=payload.fileName, result=cached))
+            continue
+        try:
+            ctx = DocumentContext(payload.text)
+            ctx.cleaned  # clean stage runs up front, cached on the context
+            contexts[i] = ctx
+            results.append(BatchExtractItem(index=i, fileName=payload.fileName))
+        except Exception as e:
+            results.append(BatchExtractItem(index=i, fileName=payload.fileName, error=f"clean failed: {e}"))
+
+    try:
+        parse_contexts(contexts.values(), batch_size=batch_size, n_process=n_process, ner=True)
+    except Exception:
+        # fall back to per-item parsing so one bad document cannot sink the batch
+        logger.exception("Batched NER failed; parsing items individually")
 
-    sections = split_sections(cleaned)  # returns Sections Pydantic model
-    entities = extract_contacts_and_entities(cleaned)
+    for i, ctx in contexts.items():
+        try:
+            results[i].result = _extract(payloads[i], ctx)
+            _store_extract(keys[i], results[i].result)
+        except Exception as e:
+            logger.warning("Batch extract failed for item %s (%s): %s", i, payloads[i].fileName, e)
+            results[i].error = str(e)
 
-    # ✅ FIX: access attribute instead of dict.get()
-    found_skills = SKILLS.extract(cleaned, sections.skills)
+    logger.info("📦 Batch extract → %s items, %s failed", len(payloads), sum(r.error is not None for r in results))
+    return results
 
-    if not sections.skills and found_skills:
-        sections.skills = ", ".join(found_skills)
+def _stream_item(item_cls, run: Callable[[dict], object], index: int, line: bytes) -> str:
+    """One NDJSON output line for one input record; failures become the item's error."""
+    record_id = file_name = None
+    try:
+        if not line:
+            raise ValueError(f"record longer than {STREAM_MAX_LINE_BYTES} bytes")
+        raw = json.loads(line)
+        if not isinstance(raw, dict):
+            raise ValueError("record must be a JSON object")
+        resume = raw.get("resume") if isinstance(raw.get("resume"), dict) else raw
+        file_name = resume.get("fileName")
+        record_id = str(raw["id"]) if raw.get("id") is not None else file_name
+        item = item_cls(index=index, id=record_id, fileName=file_name, result=run(raw))
+    except HTTPException as e:
+        item = item_cls(index=index, id=record_id, fileName=file_name, error=str(e.detail))
+    except Exception as e:
+        item = item_cls(index=index, id=record_id, fileName=file_name, error=str(e))
+    return item.model_dump_json() + "\n"
 
-    return ResumePayload(
-        fileName=payload.fileName,
-        text=payload.text,
-        metadata=payload.metadata,
-        sections=sections,
-        entities=entities,
-        normalized_skills=found_skills,
-        language=lang
+def _extract_record(raw: dict) -> ResumePayload:
+    payload = ResumePayload.model_validate(raw)
+    if not payload.text:
+        raise ValueError("text is required")
+    key = _extract_key(payload)
+    result = _cached_extract(payload, key)
+    if result is None:
+        result = _extract(payload, DocumentContext(payload.text))
+        _store_extract(key, result)
+    return result
+
+def _score_record(raw: dict) -> ScoreResponse:
+    req = ScoreRequest.model_validate(raw)
+    if req.resume.normalized_skills is None and req.resume.text and SKILLS:
+        # raw resumes are extracted first (through the result cache), like /nlp/analyze
+        req.resume.normalized_skills = _extract_record(req.resume.model_dump()).normalized_skills
+    return score_endpoint(req)
+
+def _ndjson_response(request: Request, item_cls, run, concurrency: int, name: str) -> DuplexStreamingResponse:
+    def done(count: int):
+        logger.info("🌊 %s stream → %s records", name, count)
+    return DuplexStreamingResponse(
+        stream_ndjson(request, partial(_stream_item, item_cls, run), concurrency, STREAM_MAX_LINE_BYTES, done),
+        media_type=NDJSON
     )
 
+@app.post("/nlp/extract/stream", response_class=DuplexStreamingResponse)
+async def extract_stream(request: Request, concurrency: int = Query(STREAM_CONCURRENCY, ge=1, le=64)):
+    """
+    Bulk extraction over NDJSON: one ResumePayload per line in (an optional
+    "id" is echoed back), one StreamExtractItem per line out, in completion
+    order, while the upload is still arriving. At most ``concurrency``
+    records are in flight, so memory does not grow with the upload.
+    """
+    return _ndjson_response(request, StreamExtractItem, _extract_record, concurrency, "Extract")
+
 @app.post("/nlp/score", response_model=ScoreResponse)
 def score_endpoint(req: ScoreRequest):
     resume = req.resume
-    jd_text = req.jobDescription
+    jd = _resolve_job(req)  # registered jobs only pay for the resume side
 
-    # Now you can access all extracted fields:
-    # resume.text, resume.sections, resume.entities, resume.normalized_skills, etc.
-
-    # Example scoring logic (simplified; adapt as needed)
+    # Same semantic term as /nlp/rank and /nlp/analyze, so one resume/JD pair scores alike everywhere
     resume_skills = resume.normalized_skills or []
-    required_skills = []  # You might want to extract from JD or pass explicitly
-    semantic = 0.0  # Calculate semantic similarity between resume.text and jd_text
-
-    # Call your scoring function (update as needed to use new fields)
-    total, breakdown, missing, suggestions = compute_ats_score(
-        resume_skills=resume_skills,
-        jd_text=jd_text,
-        required_skills=required_skills,
-        semantic=semantic,
-        # Optionally, pass more fields for advanced scoring!
-        # entities=resume.entities, sections=resume.sections, etc.
-    )
+    required_skills = _required_skills(req, jd)
+    return score_resume(resume_skills, DocumentContext(resume.text or ""), jd, required_skills)
 
-    return ScoreResponse(
-        score=total,
-        matched_skills=breakdown["matched_skills"],
-        missing_keywords=missing,
-        suggested_terms=suggestions,
-        details=breakdown
-    )
+@app.post("/nlp/score/stream", response_class=DuplexStreamingResponse)
+async def score_stream(request: Request, concurrency: int = Query(STREAM_CONCURRENCY, ge=1, le=64)):
+    """
+    Bulk scoring over NDJSON: one ScoreRequest per line in, one
+    StreamScoreItem per line out (see /nlp/extract/stream). Resumes without
+    normalized_skills are extracted first. Register the JD once via
+    /nlp/jobs and send its jobId so it is not re-parsed per line.
+    """
+    return _ndjson_response(request, StreamScoreItem, _score_record, concurrency, "Score")
 
 @app.post("/nlp/analyze")
-def analyze(payload: ResumePayload, req: ScoreRequest | None = None):
+def analyze(payload: ResumePayload, request: Request, response: Response, req: ScoreRequest | None = None):
     logger.info("🔬 Analyze endpoint called")
-    extracted = extract(payload)
+    if not payload.text:
+        raise HTTPException(400, "text is required")
+
+    key = _extract_key(payload)
+    jd_ctx = _resolve_job(req) if req else None
+    etag = content_key(
+        _extract_etag(payload, key),
+        req.model_dump() if req else None,
+        # a jobId re-registered with another JD, the embedding model, JD terms promoted into the vocabulary
+        jd_ctx.created_at if isinstance(jd_ctx, JobProfile) else None,
+        SBERT_CACHE_ID,
+        len(TERM_VOCAB)
+    )
+    not_modified = _not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    # one spaCy pass per text: each resume section is tokenized once for NER
+    # and lemmas, the JD parse serves token matching, semantic score and
+    # suggestions. Sections seen before (an edit elsewhere in the resume)
+    # are not parsed at all: their artifacts come from the section cache.
+    extracted = _cached_extract(payload, key)
+    resume_ctx = DocumentContext(payload.text)
+    if extracted is None:
+        extracted = _extract(payload, resume_ctx)
+        _store_extract(key, extracted)
     if not req:
-        return {"extracted": extracted, "score": None}
+        return {"extracted": extracted, "score": None, "recomputed_sections": recomputed_sections(resume_ctx)}
+
+    score_response = score_resume(extracted.normalized_skills, resume_ctx, jd_ctx, _required_skills(req, jd_ctx))
 
-    # reuse the already-cleaned skills
-    resume_text_clean = clean_text(payload.text or "", remove_stopwords=True, lemmatize=True)
-    jd_text_clean = clean_text(req.job_description, remove_stopwords=True, lemmatize=True)
+    logger.info("ATS ANALYZE → File=%s | Score=%s | Missing=%s | Suggestions=%s",
+                payload.fileName, score_response.score, score_response.missing_keywords,
+                score_response.suggested_terms)
+    return {"extracted": extracted, "score": score_response, "recomputed_sections": recomputed_sections(resume_ctx)}
+
+@app.post("/nlp/rank", response_model=RankResponse)
+def rank(req: RankRequest):
+    """
+    Rank N resumes against one JD (text or jobId) and return the top-k with
+    score breakdowns. Resumes without normalized_skills are skill-extracted
+    first; all resumes are parsed with one nlp.pipe and embedded in batches.
+    """
+    jd = _resolve_job(req)
+    BATCH_SIZE.observe(len(req.resumes), "rank")
+    contexts = [DocumentContext(r.text) for r in req.resumes]
+    skills = []
+    for payload, ctx in zip(req.resumes, contexts):
+        if payload.normalized_skills is not None or not SKILLS:
+            skills.append(payload.normalized_skills or [])
+        else:
+            skills.append(extract_skills(ctx, SKILLS))
+    parse_contexts(contexts)
 
-    total, breakdown, missing, suggestions = compute_ats_score(
-        resume_skills=extracted.normalized_skills,
-        jd_text=jd_text_clean,
-        required_skills=req.required_skills,
-        semantic=semantic_match_score(resume_text_clean, jd_text_clean)
+    ranked = rank_candidates(contexts, skills, jd, _required_skills(req, jd), top_k=req.topK)
+    logger.info("🏁 Rank → %s candidates, top score %s", len(contexts), ranked[0][1] if ranked else None)
+    return RankResponse(
+        jobId=req.jobId,
+        total=len(contexts),
+        candidates=[
+            RankedCandidate(
+                index=i,
+                fileName=req.resumes[i].fileName,
+                score=total,
+                matched_skills=breakdown["matched_skills"],
+                missing_keywords=missing,
+                suggested_terms=suggestions,
+                details=breakdown
+            )
+            for i, total, breakdown, missing, suggestions in ranked
+        ]
     )
 
-    logger.info("ATS ANALYZE → File=%s | Score=%s | Missing=%s | Suggestions=%s",
-                payload.fileName, total, missing, suggestions)
-
-    score_response = ScoreResponse(
-        score=total,
-        matched_skills=breakdown["matched_skills"],
-        missing_keywords=missing,
-        suggested_terms=suggestions,
-        details=breakdown
+@app.post("/nlp/jobs", response_model=JobResponse)
+def create_job(req: JobCreateRequest):
+    """Clean, lemmatize and embed a JD once; score against it later by jobId."""
+    if not req.jobDescription:
+        raise HTTPException(400, "jobDescription is required")
+    required = req.requiredSkills
+    if required is None and SKILLS:
+        required = SKILLS.extract(req.jobDescription)
+    job = JOBS.create(req.jobDescription, required_skills=required, job_id=req.jobId)
+    if JOB_INDEX is not None:
+        JOB_INDEX.add(job.job_id, document_embedding(job), {
+            "requiredSkills": job.required_skills, "createdAt": job.created_at
+        })
+        if JOB_INDEX_NLIST and JOB_INDEX.mode == "exact" and len(JOB_INDEX) >= 40 * JOB_INDEX_NLIST:
+            JOB_INDEX.train(JOB_INDEX_NLIST)
+    logger.info("🗂️ Job registered → %s (%s required skills)", job.job_id, len(job.required_skills))
+    return _job_response(job)
+
+@app.get("/nlp/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"job {job_id} not found")
+    return _job_response(job)
+
+@app.delete("/nlp/jobs/{job_id}")
+def delete_job(job_id: str):
+    indexed = JOB_INDEX.delete(job_id) if JOB_INDEX is not None else False
+    if not JOBS.delete(job_id) and not indexed:
+        raise HTTPException(404, f"job {job_id} not found")
+    return {"status": "deleted", "jobId": job_id}
+
+@app.post("/nlp/jobs/match", response_model=JobMatchResponse)
+def match_jobs(req: JobMatchRequest):
+    """
+    Which registered jobs fit this resume: nearest jobs by embedding from the
+    job index (with metadata filters), then compute_ats_score breakdowns for
+    the shortlisted ones only, best ATS score first.
+    """
+    if JOB_INDEX is None:
+        raise HTTPException(503, "job index is not available")
+    if not req.resume.text:
+        raise HTTPException(400, "text is required")
+
+    resume_ctx = DocumentContext(req.resume.text)
+    skills = req.resume.normalized_skills
+    if skills is None:
+        skills = extract_skills(resume_ctx, SKILLS) if SKILLS else []
+    have = [s.lower() for s in skills]
+
+    def where(job_id: str, meta: dict) -> bool:
+        if job_id not in JOBS:  # in-memory registry after a restart, or evicted by another worker
+            return False
+        for key, values in (req.filters or {}).items():
+            present = {str(v).lower() for v in (meta.get(key) or [])}
+            if not all(v.lower() in present for v in values):
+                return False
+        if req.qualifiedOnly:
+            return all(any(r in s for s in have) for r in meta.get("requiredSkills") or [])
+        return True
+
+    shortlist = JOB_INDEX.search(resume_embedding(resume_ctx), k=max(3 * req.topK, 20), where=where,
+                                 nprobe=req.nprobe)
+    matches = []
+    for job_id, similarity, meta in shortlist:
+        job = JOBS.get(job_id)
+        if job is None:  # deleted since the search
+            continue
+        total, breakdown, missing, suggestions = compute_ats_score(
+            resume_skills=skills,
+            jd_text=job,
+            required_skills=job.required_skills,
+            semantic=max(0.0, min(1.0, similarity))
+        )
+        matches.append(JobMatch(
+            jobId=job_id,
+            similarity=round(similarity, 4),
+            score=total,
+            matched_skills=breakdown["matched_skills"],
+            missing_keywords=missing,
+            suggested_terms=suggestions,
+            details=breakdown
+        ))
+    matches.sort(key=lambda m: (-m.score, -m.similarity))
+    return JobMatchResponse(indexed=len(JOB_INDEX), mode=JOB_INDEX.mode, matches=matches[:req.topK])
+
+# Retraining runs in a separate process per job; status files are shared by all workers
+RETRAIN = RetrainJobs(CUSTOM_NER_DIR)
+
+def _model_versions() -> ModelVersions:
+    return ModelVersions(
+        current=current_version(CUSTOM_NER_DIR),
+        loaded=MODELS.stats()["spacy"].get("version"),
+        versions=list_versions(CUSTOM_NER_DIR)
     )
-    return {"extracted": extracted, "score": score_response}
 
-@app.post("/nlp/retrain")
+@app.post("/nlp/retrain", response_model=RetrainJob, status_code=202)
 def retrain():
     """
-    Self-learning pipeline:
+    Start the self-learning pipeline as a background job and return its id:
     1) Bootstrap weak labels from data/raw_resumes/*.txt -> data/custom_ner.jsonl
-    2) Train spaCy model -> data/custom_ner/
-    3) Hot-reload into memory
+    2) Train spaCy model -> a new version under data/custom_ner/
+    3) Activate it; every worker hot-swaps to it within ATS_MODEL_POLL_SECONDS
+    If a job is already running, that job is returned.
     """
     logger.info("🔄 Retrain endpoint called")
+    job = RETRAIN.start()
+    logger.info("🔄 Retrain job %s %s", job["jobId"], job["state"])
+    return RetrainJob(**job)
+
+@app.get("/nlp/retrain", response_model=List[RetrainJob])
+def list_retrain_jobs():
+    return [RetrainJob(**job) for job in RETRAIN.list()]
+
+@app.get("/nlp/retrain/versions", response_model=ModelVersions)
+def retrain_versions():
+    return _model_versions()
+
+@app.post("/nlp/retrain/rollback", response_model=ModelVersions)
+def rollback(version: str | None = Query(None, description="version to activate; default: the one before current")):
+    """Re-activate a kept custom NER version (by default the previous one) in every worker."""
+    versions = list_versions(CUSTOM_NER_DIR)
+    if version is None:
+        current = current_version(CUSTOM_NER_DIR)
+        older = versions[:versions.index(current)] if current in versions else []
+        if not older:
+            raise HTTPException(409, "no earlier custom NER version to roll back to")
+        version = older[-1]
     try:
-        bootstrap_directory("data/raw_resumes", "data/custom_ner.jsonl")
-        train_custom_ner(model_out="data/custom_ner", data_file="data/custom_ner.jsonl")
-        global CUSTOM_NLP
-        CUSTOM_NLP = load_custom_ner("data/custom_ner")
-        return {"status": "success", "message": "Custom NER retrained and reloaded"}
-    except Exception as e:
-        logger.exception("Retraining failed")
-        raise HTTPException(500, f"Retraining failed: {e}")
+        activate_version(CUSTOM_NER_DIR, version)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    MODELS.refresh("spacy")
+    logger.info("⏪ Custom NER rolled back to %s", version)
+    return _model_versions()
+
+@app.get("/nlp/retrain/{job_id}", response_model=RetrainJob)
+def get_retrain_job(job_id: str):
+    job = RETRAIN.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"retrain job {job_id} not found")
+    if job["state"] == "succeeded":
+        MODELS.refresh("spacy")  # no need to wait for the watcher in this worker
+    return RetrainJob(**job)
+
+@app.post("/nlp/retrain/{job_id}/cancel", response_model=RetrainJob)
+def cancel_retrain_job(job_id: str):
+    job = RETRAIN.cancel(job_id)
+    if job is None:
+        raise HTTPException(404, f"retrain job {job_id} not found")
+    logger.info("🛑 Retrain job %s → %s", job_id, job["state"])
+    return RetrainJob(**job)
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
 class Metadata(BaseModel):
     format: Optional[str] = None
     sizeKb: Optional[float] = None
+    region: Optional[str] = None  # ISO country (e.g. "GB") for phone numbers without a country code
 
 class Sections(BaseModel):
     education: Optional[str] = None
@@ -13,6 +14,12 @@ class Sections(BaseModel):
     certifications: Optional[str] = None
     projects: Optional[str] = None
 
+class EntitySpan(BaseModel):
+    label: str
+    text: str
+    start: int  # character offsets into the original (uncleaned) text
+    end: int
+
 class Entities(BaseModel):
     names: List[str] = []
     emails: List[str] = []
@@ -23,6 +30,7 @@ class Entities(BaseModel):
     certifications: List[str] = []
     titles: List[str] = []
     skill_phrases: List[str] = []
+    spans: List[EntitySpan] = []
 
 class ResumePayload(BaseModel):
     fileName: Optional[str] = None
@@ -35,11 +43,114 @@ class ResumePayload(BaseModel):
 
 class ScoreRequest(BaseModel):
     resume: ResumePayload
-    jobDescription: str
+    jobDescription: Optional[str] = None
+    jobId: Optional[str] = None  # a job registered via POST /nlp/jobs
+    requiredSkills: Optional[List[str]] = None
 
 class ScoreResponse(BaseModel):
     score: float
     matched_skills: List[str]
     missing_keywords: List[str]
     suggested_terms: List[str] = []
-    details: Dict[str, Any]
\ No newline at end of file
+    details: Dict[str, Any]
+
+class BatchExtractItem(BaseModel):
+    index: int
+    fileName: Optional[str] = None
+    result: Optional[ResumePayload] = None
+    error: Optional[str] = None
+
+# One NDJSON line of /nlp/extract/stream and /nlp/score/stream, in completion order;
+# index is the position of the record in the input, id its "id" (or its fileName)
+class StreamExtractItem(BaseModel):
+    index: int
+    id: Optional[str] = None
+    fileName: Optional[str] = None
+    result: Optional[ResumePayload] = None
+    error: Optional[str] = None
+
+class StreamScoreItem(BaseModel):
+    index: int
+    id: Optional[str] = None
+    fileName: Optional[str] = None
+    result: Optional[ScoreResponse] = None
+    error: Optional[str] = None
+
+
+class JobCreateRequest(BaseModel):
+    jobDescription: str
+    jobId: Optional[str] = None
+    requiredSkills: Optional[List[str]] = None
+
+class JobResponse(BaseModel):
+    jobId: str
+    requiredSkills: List[str]
+    terms: List[str] = []
+    createdAt: float
+
+
+class RankRequest(BaseModel):
+    jobDescription: Optional[str] = None
+    jobId: Optional[str] = None
+    requiredSkills: Optional[List[str]] = None
+    resumes: List[ResumePayload]
+    topK: int = Field(10, ge=1)
+
+class RankedCandidate(BaseModel):
+    index: int
+    fileName: Optional[str] = None
+    score: float
+    matched_skills: List[str]
+    missing_keywords: List[str]
+    suggested_terms: List[str] = []
+    details: Dict[str, Any]
+
+class RankResponse(BaseModel):
+    jobId: Optional[str] = None
+    total: int
+    candidates: List[RankedCandidate]
+
+
+class JobMatchRequest(BaseModel):
+    resume: ResumePayload
+    topK: int = Field(10, ge=1)
+    # metadata filters: every listed value must be present, e.g. {"requiredSkills": ["java"]}
+    filters: Optional[Dict[str, List[str]]] = None
+    # only jobs whose required skills the resume fully covers
+    qualifiedOnly: bool = False
+    nprobe: Optional[int] = Field(None, ge=1)
+
+class JobMatch(BaseModel):
+    jobId: str
+    similarity: float
+    score: float
+    matched_skills: List[str]
+    missing_keywords: List[str]
+    suggested_terms: List[str] = []
+    details: Dict[str, Any]
+
+class JobMatchResponse(BaseModel):
+    indexed: int
+    mode: str
+    matches: List[JobMatch]
+
+
+class RetrainJob(BaseModel):
+    jobId: str
+    # queued | running | succeeded | failed | cancelled
+    state: str
+    # bootstrap | train | activate while running
+    stage: Optional[str] = None
+    createdAt: float
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    # latest training epoch: {"epoch", "epochs", "loss"}
+    progress: Dict[str, Any] = {}
+    metrics: Dict[str, Any] = {}
+    version: Optional[str] = None
+    error: Optional[str] = None
+
+class ModelVersions(BaseModel):
+    current: Optional[str] = None
+    loaded: Optional[str] = None
+    versions: List[str]
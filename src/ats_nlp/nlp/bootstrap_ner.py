@@ -1,6 +1,11 @@
 import re
+import os
 import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 
 CERT_KEYWORDS = [
     "certified", "certification", "certificate", "pmp", "aws certified",
@@ -18,23 +23,171 @@ SKILL_KEYWORDS = [
     "terraform", "ci/cd", "devops"
 ]
 
+def _alternation(keywords: List[str]) -> str:
+    # longest first, so "aws certified" wins over "certified" at the same position
+    return "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+
+# One pass over the text, tried only at word starts; there the first group that
+# matches wins (CERTIFICATION, then TITLE, then SKILL_PHRASE), so spans never overlap.
+_LABEL_PATTERN = (
+    rf"\b(?=\w)(?:(?P<CERTIFICATION>(?:{_alternation(CERT_KEYWORDS)})\b)"
+    rf"|(?P<TITLE>\w*(?:{_alternation(TITLE_KEYWORDS)})\w*\b)"
+    rf"|(?P<SKILL_PHRASE>(?:{_alternation(SKILL_KEYWORDS)})\b))"
+)
+LABEL_RE = re.compile(_LABEL_PATTERN, re.IGNORECASE)
+# ~3x faster than IGNORECASE; used on text.lower() whenever lowercasing keeps every offset
+_LOWER_LABEL_RE = re.compile(_LABEL_PATTERN)
+# Changes whenever the keyword lists do; a manifest from other lists means relabelling everything
+LABELER_VERSION = hashlib.sha1(_LABEL_PATTERN.encode("utf-8")).hexdigest()[:12]
+
 def bootstrap_from_resume(text: str):
-    entities = []
-    for kw in CERT_KEYWORDS:
-        for m in re.finditer(rf"\b{re.escape(kw)}\b", text, flags=re.IGNORECASE):
-            entities.append([m.start(), m.end(), "CERTIFICATION"])
-    for kw in TITLE_KEYWORDS:
-        for m in re.finditer(rf"\b\w*{kw}\w*\b", text, flags=re.IGNORECASE):
-            entities.append([m.start(), m.end(), "TITLE"])
-    for kw in SKILL_KEYWORDS:
-        for m in re.finditer(rf"\b{re.escape(kw)}\b", text, flags=re.IGNORECASE):
-            entities.append([m.start(), m.end(), "SKILL_PHRASE"])
+    lowered = text.lower()
+    matches = _LOWER_LABEL_RE.finditer(lowered) if len(lowered) == len(text) else LABEL_RE.finditer(text)
+    entities = [[m.start(), m.end(), m.lastgroup] for m in matches]
     return {"text": text, "entities": entities}
 
-def bootstrap_directory(input_dir: str, output_file: str = "data/custom_ner.jsonl"):
-    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as out:
-        for path in Path(input_dir).glob("*.txt"):
-            text = path.read_text(encoding="utf-8", errors="ignore")
-            out.write(json.dumps(bootstrap_from_resume(text)) + "\n")
-    print(f"✅ Bootstrapped data saved to {output_file}")
\ No newline at end of file
+def _label_file(path: str) -> Tuple[str, str, Dict]:
+    data = Path(path).read_bytes()
+    record = bootstrap_from_resume(data.decode("utf-8", errors="ignore"))
+    return path, hashlib.sha1(data).hexdigest(), record
+
+def _write_json(path: Path, data: Dict) -> None:
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+def manifest_path(output_file: str) -> Path:
+    output = Path(output_file)
+    return output.with_name(f"{output.name}.manifest.json")
+
+def live_offsets(output_file: str) -> Optional[Set[int]]:
+    """
+    Byte offsets of the lines holding each resume's current record, from the
+    manifest; the JSONL also keeps dead records until it is compacted. None
+    when there is no manifest (or one without offsets): every line is live.
+    """
+    path = manifest_path(output_file)
+    if not path.exists():
+        return None
+    files = json.loads(path.read_text(encoding="utf-8")).get("files", {})
+    if not all("offset" in entry for entry in files.values()):
+        return None
+    return {entry["offset"] for entry in files.values()}
+
+def _compact(output_file: Path, files: Dict[str, Dict]) -> int:
+    """
+    Stream the JSONL into a new file that keeps only each resume's live
+    record, the line at the offset the manifest holds for it, and point the
+    manifest at the new offsets. Entries from before offsets were recorded
+    are matched on their record's source and sha1 instead.
+    """
+    by_offset = {entry["offset"]: name for name, entry in files.items() if "offset" in entry}
+    unplaced = len(by_offset) < len(files)
+    tmp = output_file.with_name(f"{output_file.name}.tmp-{os.getpid()}")
+    kept = 0
+    with open(output_file, "rb") as src, open(tmp, "wb") as out:
+        pos = 0
+        for line in src:
+            name = by_offset.get(pos)
+            pos += len(line)
+            if name is None and unplaced:
+                rec = json.loads(line)
+                entry = files.get(rec.get("source"))
+                if entry is not None and "offset" not in entry and entry["sha1"] == rec.get("sha1"):
+                    name = rec["source"]
+            if name is not None:
+                files[name]["offset"] = out.tell()
+                out.write(line)
+                kept += 1
+    os.replace(tmp, output_file)
+    for name in [n for n, entry in files.items() if "offset" not in entry]:
+        del files[name]  # no record found: relabelled on the next run
+    return kept
+
+def _append(output: Path, results, stats: Dict[str, os.stat_result], files: Dict[str, Dict]) -> Dict[str, int]:
+    counts = {"new": 0, "changed": 0}
+    with open(output, "ab") as out:
+        for path, sha1, record in results:
+            name = os.path.basename(path)
+            st = stats[path]
+            known = files.get(name)
+            if known is not None and known["sha1"] == sha1:
+                known.update(size=st.st_size, mtime=st.st_mtime)
+                continue  # touched but same content
+            counts["changed" if known is not None else "new"] += 1
+            files[name] = {"size": st.st_size, "mtime": st.st_mtime, "sha1": sha1, "offset": out.tell()}
+            out.write((json.dumps({**record, "source": name, "sha1": sha1}) + "\n").encode("utf-8"))
+    return counts
+
+def bootstrap_directory(input_dir: str, output_file: str = "data/custom_ner.jsonl",
+                        workers: Optional[int] = None) -> Dict:
+    """
+    Weak-label new or changed resumes in input_dir/*.txt and append them to output_file.
+
+    A manifest next to the output (``<output>.manifest.json``) remembers
+    size, mtime, sha1 and the byte offset of the live record per file:
+    files whose size and mtime are unchanged are not even read, and files
+    whose content hash is unchanged are not relabelled. Labelling runs on a
+    process pool. New and changed resumes are appended; the record a change
+    or a removal leaves behind stays in the file, dead (see live_offsets),
+    until dead records outnumber live ones and the JSONL is compacted in
+    one streaming pass. Returns counts for the run.
+    """
+    started = time.perf_counter()
+    output = Path(output_file)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    manifest_file = manifest_path(output_file)
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8")) if manifest_file.exists() else {}
+    files: Dict[str, Dict] = manifest.get("files", {})
+    records = manifest.get("records")  # lines in the JSONL, live or dead
+    size = output.stat().st_size if output.exists() else 0
+    if manifest.get("labeler") != LABELER_VERSION or size < manifest.get("output_size", 0):
+        # first run, other keyword lists, or a truncated file: every record is stale
+        files, records = {}, 0
+        output.write_text("", encoding="utf-8")
+    elif size > manifest.get("output_size", 0):
+        # records appended by a run that stopped before saving the manifest: none is referenced
+        os.truncate(output, manifest.get("output_size", 0))
+
+    seen, todo = set(), []
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt") or not entry.is_file():
+                continue
+            seen.add(entry.name)
+            st = entry.stat()
+            known = files.get(entry.name)
+            if known is None or known["size"] != st.st_size or known["mtime"] != st.st_mtime:
+                todo.append((entry.path, st))
+    removed = [name for name in files if name not in seen]
+    for name in removed:
+        del files[name]
+
+    workers = workers or os.cpu_count() or 1
+    paths = [path for path, _ in todo]
+    if workers > 1 and len(paths) >= 64:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_label_file, paths, chunksize=max(1, min(256, len(paths) // (workers * 4))))
+            labelled = _append(output, results, dict(todo), files)
+    else:
+        labelled = _append(output, map(_label_file, paths), dict(todo), files)
+
+    compacted = False
+    if records is None or not all("offset" in entry for entry in files.values()):
+        # manifest from before records and offsets were tracked
+        records, compacted = _compact(output, files), True
+    else:
+        records += labelled["new"] + labelled["changed"]
+        if records > 2 * len(files):
+            records, compacted = _compact(output, files), True
+    manifest = {"labeler": LABELER_VERSION, "files": files, "records": records,
+                "output_size": output.stat().st_size if output.exists() else 0}
+    _write_json(manifest_file, manifest)
+
+    stats = {"files": len(seen), "labelled": labelled["new"] + labelled["changed"], "new": labelled["new"],
+             "changed": labelled["changed"], "unchanged": len(seen) - labelled["new"] - labelled["changed"],
+             "removed": len(removed), "records": len(files), "dead_records": records - len(files),
+             "compacted": compacted, "seconds": round(time.perf_counter() - started, 3)}
+    print(f"✅ Bootstrapped data saved to {output_file} ({stats['labelled']} labelled, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed)")
+    return stats
@@ -0,0 +1,238 @@
+import threading
+from functools import cached_property
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar, Union
+import spacy
+from ats_nlp.nlp.metrics import stage_timer, timed
+from ats_nlp.nlp.model_registry import MODELS, spacy_pipeline, spacy_version
+from ats_nlp.nlp.normalize import OffsetMap, normalize
+from ats_nlp.nlp.routing import route
+from ats_nlp.nlp.scheduler import MicroBatcher, make_batcher
+from ats_nlp.nlp.sections import section_spans
+
+T = TypeVar("T")
+
+# Token-level work (lemmas, stop words) does not need entities (base or custom, see custom_ner.py)
+TOKEN_DISABLE = ("ner", "custom_ner", "custom_rules")
+
+# One micro-batcher per (pipeline version, disabled components) of the
+# registry's spaCy pipeline: concurrent requests' parses are coalesced into
+# nlp.pipe calls on a dedicated thread (see scheduler.py). Each entry keeps
+# the pipeline it wraps; a model swap closes the old version's batchers.
+_PARSERS: Dict[Tuple[str, Tuple[str, ...]], Tuple[spacy.Language, Optional[MicroBatcher]]] = {}
+_PARSERS_LOCK = threading.Lock()
+
+
+def _disabled(nlp: spacy.Language, disable: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(name for name in disable if name in nlp.pipe_names)
+
+
+def _entity_only(nlp: spacy.Language) -> Tuple[str, ...]:
+    """What to disable when only entities are wanted: all but the entity components and a tok2vec they listen to."""
+    keep = set(TOKEN_DISABLE)
+    for name, pipe in nlp.pipeline:
+        if keep.intersection(getattr(pipe, "listening_components", ())):
+            keep.add(name)
+    return tuple(name for name in nlp.pipe_names if name not in keep)
+
+
+def _parser_for(nlp: spacy.Language, disable: Tuple[str, ...]) -> Optional[MicroBatcher]:
+    """Batcher for the registry's current pipeline; any other (one swapped out mid-request, a test's) parses directly."""
+    if not MODELS.loaded("spacy") or nlp is not spacy_pipeline():
+        return None
+    key = (spacy_version(), disable)
+    entry = _PARSERS.get(key)
+    if entry is None or entry[0] is not nlp:
+        stale = None
+        with _PARSERS_LOCK:
+            entry = _PARSERS.get(key)
+            if entry is None or entry[0] is not nlp:  # a swap raced the version read: rebuild on the live pipeline
+                stale = entry
+                active = [p for p in nlp.pipe_names if p not in disable]
+                name = f"spacy:{nlp.meta.get('name', 'nlp')}:{'+'.join(active) or 'tokenizer'}"
+                entry = _PARSERS[key] = (nlp, make_batcher(name, lambda texts: list(nlp.pipe(texts, disable=disable))))
+        if stale is not None and stale[1] is not None:
+            stale[1].close()
+    return entry[1]
+
+
+def _drop_stale_parsers(model: str) -> None:
+    if model != "spacy":
+        return
+    version = spacy_version()
+    with _PARSERS_LOCK:
+        stale = [key for key in _PARSERS if key[0] != version]
+        batchers = [_PARSERS.pop(key)[1] for key in stale]
+    for batcher in batchers:
+        if batcher is not None:
+            batcher.close()
+
+
+MODELS.on_replace(_drop_stale_parsers)
+
+
+@timed("spacy_parse")
+def parse(
+    nlp: spacy.Language,
+    texts: List[Union[str, spacy.tokens.Doc]],
+    disable: Sequence[str] = (),
+    batch_size: Optional[int] = None
+) -> List[spacy.tokens.Doc]:
+    """
+    Parse texts with nlp, through its micro-batcher when micro-batching is on
+    and no ``batch_size`` is given (a caller that sets one already holds its
+    batch and gets a direct ``nlp.pipe`` with that size). ``disable`` skips
+    components for this call only, so token-only and NER callers share one
+    loaded pipeline. A Doc parsed before gets the enabled components run on
+    it in place, without tokenizing again.
+    """
+    disable = _disabled(nlp, disable)
+    batcher = _parser_for(nlp, disable) if batch_size is None else None
+    if batcher is not None:
+        return batcher(texts)
+    return list(nlp.pipe(texts, disable=disable, batch_size=batch_size))
+
+
+def parser_stats() -> Dict[str, Dict[str, Any]]:
+    return {b.name: b.stats() for _, b in list(_PARSERS.values()) if b is not None}
+
+
+class DocumentContext:
+    """
+    Per-request view of one text (a resume or a job description).
+
+    Every derived form -- cleaned text, spaCy Docs (one per section, see
+    ``parts``), lemmas, embeddings -- is computed lazily and at most once, so
+    the nlp/* stages can share a single parse instead of each re-running
+    spaCy on the same text.
+    """
+
+    def __init__(self, text: str, nlp: Optional[spacy.Language] = None):
+        self.text = text or ""
+        self._nlp = nlp
+        self._artifacts: Dict[str, Any] = {}
+
+    @cached_property
+    def _normalized(self) -> Tuple[str, OffsetMap]:
+        with stage_timer("normalize"):
+            return normalize(self.text, keep_case=True)
+
+    @cached_property
+    def cleaned(self) -> str:
+        """Normalized text, case preserved (what NER and section splitting see)."""
+        return self._normalized[0]
+
+    @cached_property
+    def offsets(self) -> OffsetMap:
+        """Maps positions in ``cleaned`` (and so in ``docs``, past their offsets) back to ``text``."""
+        return self._normalized[1]
+
+    @cached_property
+    def parts(self) -> List["Part"]:
+        """The sections of ``cleaned`` with the stages routed to each (routing.route), parsed one by one."""
+        return [Part(*routed) for routed in route(self.cleaned, section_spans(self.cleaned))]
+
+    def routed_parts(self, stage: str) -> List["Part"]:
+        return [part for part in self.parts if stage in part.stages]
+
+    def parse_parts(self, parts: List["Part"], entities: bool = False, tokens: bool = False) -> None:
+        """Parse these parts for entities (``part.doc``) and/or tokens (``part.lower``) where not done yet."""
+        _complete([(self, part) for part in parts], self._nlp or spacy_pipeline(), entities, tokens)
+
+    @cached_property
+    def docs(self) -> List[Tuple[int, spacy.tokens.Doc]]:
+        """
+        (offset into ``cleaned``, Doc) of every part, in text order, with
+        tokens, lemmas and tags of the lowercased text (as clean_text parses it).
+        """
+        self.parse_parts(self.parts, tokens=True)
+        return [(part.start, part.lower) for part in self.parts]
+
+    @cached_property
+    def lemmas(self) -> str:
+        """clean_text(text, remove_stopwords=True, lemmatize=True), section by section, from ``docs``."""
+        return " ".join(tok.lemma_.lower() for _, doc in self.docs for tok in doc if not tok.is_stop)
+
+    @cached_property
+    def lemma_tokens(self) -> Set[str]:
+        return set(self.lemmas.split())
+
+    def cached(self, name: str, factory: Callable[[], T]) -> T:
+        """Memoize an artifact owned by another module (e.g. an embedding) on this document."""
+        if name not in self._artifacts:
+            self._artifacts[name] = factory()
+        return self._artifacts[name]
+
+
+def as_context(text: Union[str, DocumentContext, None]) -> DocumentContext:
+    """Accept either raw text or an existing context, so callers can pass whichever they hold."""
+    if isinstance(text, DocumentContext):
+        return text
+    return DocumentContext(text or "")
+
+
+class Part:
+    """One section of a context's text: its entity Doc (cased) and token Doc (lowercased), once parsed."""
+    __slots__ = ("name", "start", "end", "stages", "doc", "lower")
+
+    def __init__(self, name: str, start: int, end: int, stages: FrozenSet[str]):
+        self.name, self.start, self.end, self.stages = name, start, end, stages
+        self.doc: Optional[spacy.tokens.Doc] = None
+        self.lower: Optional[spacy.tokens.Doc] = None
+
+
+def _complete(
+    todo: List[Tuple[DocumentContext, Part]],
+    nlp: spacy.Language,
+    entities: bool = False,
+    tokens: bool = False,
+    batch_size: Optional[int] = None,
+    n_process: int = 1
+) -> None:
+    """
+    Parse every part not parsed yet: the entity components on its cased
+    text (``part.doc``), the token components on its lowercased text
+    (``part.lower``). clean_text lowercases before lemmatizing, and tagging
+    cased text would give other tags and lemmas (capitalised words come out
+    PROPN and keep their surface form). Parts needing the same components
+    go through one ``nlp.pipe`` call.
+    """
+    jobs = []
+    if entities:
+        group = [(ctx, part) for ctx, part in todo if part.doc is None]
+        jobs.append(("doc", _entity_only(nlp), group, [ctx.cleaned[p.start:p.end] for ctx, p in group]))
+    if tokens:
+        group = [(ctx, part) for ctx, part in todo if part.lower is None]
+        jobs.append(("lower", TOKEN_DISABLE, group, [ctx.cleaned[p.start:p.end].lower() for ctx, p in group]))
+    for slot, disable, group, inputs in jobs:
+        if not group:
+            continue
+        disable = _disabled(nlp, disable)
+        if n_process > 1:
+            docs = nlp.pipe(inputs, batch_size=batch_size, n_process=n_process, disable=disable)
+        else:
+            docs = parse(nlp, inputs, disable=disable, batch_size=batch_size)
+        for (_, part), doc in zip(group, docs):
+            setattr(part, slot, doc)
+
+
+@timed("spacy_parse_batch")
+def parse_contexts(
+    contexts: Iterable[DocumentContext],
+    nlp: Optional[spacy.Language] = None,
+    batch_size: Optional[int] = None,
+    n_process: int = 1,
+    ner: bool = False
+) -> None:
+    """
+    Parse many contexts with one ``nlp.pipe`` call per set of components
+    instead of one pipeline call per document: all their parts for
+    ``docs``, or with ``ner=True`` their NER-routed parts for entities.
+    Whatever a part already holds is not parsed again. ``batch_size`` is
+    passed to ``nlp.pipe`` (see ``parse``); without it the call goes through
+    the micro-batcher.
+    """
+    if ner:
+        todo = [(ctx, part) for ctx in contexts for part in ctx.routed_parts("ner")]
+    else:
+        todo = [(ctx, part) for ctx in contexts for part in ctx.parts]
+    _complete(todo, nlp or spacy_pipeline(), entities=ner, tokens=not ner, batch_size=batch_size, n_process=n_process)
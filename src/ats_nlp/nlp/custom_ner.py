@@ -1,9 +1,34 @@
 from pathlib import Path
+import hashlib
 import json
+import os
+import random
+import re
+import shutil
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
 import spacy
-from spacy.tokens import DocBin
+from spacy.tokens import Doc, DocBin
+from spacy.training import Example
+from spacy.util import filter_spans, minibatch
+from thinc.api import compounding
 
 LABELS = ["CERTIFICATION", "TITLE", "SKILL_PHRASE"]
+# The trained component; named so it can sit next to the base model's own "ner"
+PIPE_NAME = "custom_ner"
+# Keyword entity ruler used in its place until a model has been trained
+RULER_NAME = "custom_rules"
+# nlp.meta key recording what add_custom_ner added: a version, "rules" or None
+META_KEY = "ats_custom_ner"
+# model_root/CURRENT names the active version directory (model_root/v20250101-120000-ab12cd)
+CURRENT = "CURRENT"
+# Tokenized training data: records are bucketed by the first SHARD_PREFIX hex digits of their
+# sha1, one .spacy DocBin per bucket, so where a record sits in the JSONL does not matter
+SHARD_DIR = os.getenv("ATS_NER_SHARD_DIR", "data/ner_shards")
+SHARD_PREFIX = 2
+# Written next to a trained model: which examples it has seen, for incremental fine-tuning
+TRAINING_STATE = "training.json"
+DEV_PERCENT = 10
 
 def _load_jsonl(path: str):
     with open(path, "r", encoding="utf-8") as f:
@@ -12,7 +37,7 @@ def _load_jsonl(path: str):
             yield rec["text"], rec["entities"]
 
 def _to_docbin(nlp, data_iter):
-    db = DocBin()
+    db = DocBin(store_user_data=True)
     for text, ents in data_iter:
         doc = nlp.make_doc(text)
         spans = []
@@ -21,33 +46,266 @@ def _to_docbin(nlp, data_iter):
                 span = doc.char_span(start, end, label=label)
                 if span is not None:
                     spans.append(span)
-        doc.ents = spans
+        doc.ents = filter_spans(spans)  # weak labels can overlap ("aws certified" / "certified")
         db.add(doc)
     return db
 
-def train_custom_ner(model_out="data/custom_ner", data_file="data/custom_ner.jsonl", base_model="en_core_web_sm"):
-    nlp = spacy.load(base_model)
-    ner = nlp.add_pipe("ner", last=True)
+def _record_offsets(path: str) -> Dict[str, Dict[str, int]]:
+    """
+    bucket -> {record sha1: byte offset of its line}, in one streaming pass
+    over the JSONL, skipping the dead records bootstrap_ner left behind.
+    """
+    from ats_nlp.nlp.bootstrap_ner import live_offsets
+    live = live_offsets(path)
+    buckets: Dict[str, Dict[str, int]] = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            record = line.strip()
+            if record and (live is None or offset in live):
+                sha1 = hashlib.sha1(record).hexdigest()
+                buckets.setdefault(sha1[:SHARD_PREFIX], {}).setdefault(sha1, offset)
+            offset += len(line)
+    return buckets
+
+def load_training_docs(nlp, data_file: str, shard_dir: str = SHARD_DIR,
+                       only: Optional[Set[str]] = None) -> Iterator[Doc]:
+    """
+    Gold docs for the JSONL records (those whose sha1 is in ``only``, if
+    given), tagged with the record's sha1 in ``doc.user_data``, one bucket at
+    a time. Each bucket's docs are cached in a .spacy file per tokenizer
+    (spaCy version, model, labels): only records missing from it are
+    tokenized, and it is rewritten only when its records changed, so one
+    edited or moved record costs one record, wherever it is in the file.
+    Duplicate lines give one doc. Caches of other tokenizers and buckets no
+    longer in the file are deleted.
+    """
+    salt = json.dumps([spacy.__version__, nlp.meta.get("name"), nlp.meta.get("version"), LABELS])
+    root = Path(shard_dir)
+    cache = root / hashlib.sha1(salt.encode("utf-8")).hexdigest()[:12]
+    cache.mkdir(parents=True, exist_ok=True)
+    for stale in root.iterdir():
+        if stale.suffix == ".spacy":
+            stale.unlink(missing_ok=True)  # flat shards of the line-sliced layout
+        elif stale.is_dir() and stale != cache and re.fullmatch(r"[0-9a-f]{12}", stale.name):
+            shutil.rmtree(stale, ignore_errors=True)
+    buckets = _record_offsets(data_file)
+    for stale in cache.glob("*.spacy"):
+        if stale.stem not in buckets:
+            stale.unlink(missing_ok=True)
+
+    with open(data_file, "rb") as f:
+        for prefix, offsets in sorted(buckets.items()):
+            if only is not None and only.isdisjoint(offsets):
+                continue
+            path = cache / f"{prefix}.spacy"
+            docs = {}
+            if path.exists():
+                docs = {d.user_data["sha1"]: d for d in DocBin().from_disk(path).get_docs(nlp.vocab)}
+            missing = [sha1 for sha1 in offsets if sha1 not in docs]
+            if missing:
+                records = []
+                for sha1 in missing:
+                    f.seek(offsets[sha1])
+                    records.append(json.loads(f.readline()))
+                fresh = _to_docbin(nlp, ((r["text"], r["entities"]) for r in records)).get_docs(nlp.vocab)
+                for sha1, doc in zip(missing, fresh):
+                    doc.user_data["sha1"] = sha1
+                    docs[sha1] = doc
+            if missing or len(docs) != len(offsets):
+                db = DocBin(store_user_data=True, docs=[docs[sha1] for sha1 in offsets])
+                tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+                db.to_disk(tmp)
+                os.replace(tmp, path)
+            for sha1 in offsets:
+                if only is None or sha1 in only:
+                    yield docs[sha1]
+
+def _is_dev(doc: Doc, dev_percent: int) -> bool:
+    """Train/dev by example hash, so an example stays on the same side on every run."""
+    return int(doc.user_data["sha1"][:8], 16) % 100 < dev_percent
 
+def _examples(nlp, docs: List[Doc]) -> List[Example]:
+    return [Example(nlp.make_doc(doc.text), doc) for doc in docs]
+
+def _dev_f(nlp, dev: List[Example]) -> float:
+    return float(nlp.evaluate(dev).get("ents_f") or 0.0) if dev else 0.0
+
+def _load_base(base_model: str, resume_from: Optional[Path]):
+    """(pipeline, example hashes it was trained on); fine-tunes resume_from when it has our component."""
+    if resume_from is not None:
+        nlp = spacy.load(resume_from)
+        state = Path(resume_from) / TRAINING_STATE
+        if PIPE_NAME in nlp.pipe_names and state.exists():
+            return nlp, set(json.loads(state.read_text(encoding="utf-8"))["trained_on"])
+    nlp = spacy.load(base_model)
+    ner = nlp.add_pipe("ner", name=PIPE_NAME, last=True)
     for label in LABELS:
         ner.add_label(label)
+    return nlp, set()
 
-    # Prepare data
-    train_db = _to_docbin(nlp, _load_jsonl(data_file))
-    Path(model_out).mkdir(parents=True, exist_ok=True)
+def train_custom_ner(model_out="data/custom_ner", data_file="data/custom_ner.jsonl", base_model="en_core_web_sm",
+                     epochs=20, patience=3, dropout=0.2, dev_percent=DEV_PERCENT, rehearse=0.5,
+                     resume_from: Optional[Path] = None, shard_dir: str = SHARD_DIR, seed=0,
+                     progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Train the custom NER component on data_file and save the pipeline to model_out.
 
-    optimizer = nlp.initialize()
+    Only the ``custom_ner`` pipe is updated; the base model's components keep
+    their weights. With ``resume_from`` (a model this function saved), the
+    previous weights are fine-tuned on examples that model has not seen,
+    mixed with a ``rehearse`` share of old ones so it does not forget them;
+    if nothing is new, nothing is trained or saved. Examples are shuffled
+    into compounding minibatches (4 -> 32) each epoch, and training stops
+    once the held-out dev F-score has not improved for ``patience`` epochs,
+    keeping the best epoch's weights. Returns the run's metrics.
+    """
+    started = time.perf_counter()
+    nlp, seen = _load_base(base_model, resume_from)
+    # one streamed pass; old training examples are kept as hashes and only the rehearsed ones loaded
+    new_docs, dev_docs, old = [], [], []
+    for doc in load_training_docs(nlp, data_file, shard_dir):
+        if _is_dev(doc, dev_percent):
+            dev_docs.append(doc)
+        elif doc.user_data["sha1"] in seen:
+            old.append(doc.user_data["sha1"])
+        else:
+            new_docs.append(doc)
+    metrics = {"examples": len(new_docs) + len(dev_docs) + len(old), "new_examples": len(new_docs),
+               "dev_examples": len(dev_docs),
+               "resumed_from": str(resume_from) if seen else None,
+               "load_seconds": round(time.perf_counter() - started, 3)}
+    if not new_docs:
+        return {**metrics, "epochs": 0, "train_seconds": round(time.perf_counter() - started, 3)}
 
-    # small iterations for bootstrap; increase with more data
-    for _ in range(10):
-        for doc in train_db.get_docs(nlp.vocab):
-            nlp.update([doc], sgd=optimizer)
+    rnd = random.Random(seed)
+    rehearsed = set(rnd.sample(old, min(len(old), int(len(new_docs) * rehearse))))
+    rehearsal = list(load_training_docs(nlp, data_file, shard_dir, only=rehearsed)) if rehearsed else []
+    train = _examples(nlp, new_docs + rehearsal)
+    dev = _examples(nlp, dev_docs)
 
+    with nlp.select_pipes(enable=[PIPE_NAME]):
+        ner = nlp.get_pipe(PIPE_NAME)
+        if not seen:
+            ner.initialize(lambda: train, nlp=nlp)  # the new component only; base weights stay
+        optimizer = nlp.create_optimizer()
+        best_f, best_epoch, best_weights = -1.0, 0, None
+        history = []
+        for epoch in range(1, epochs + 1):
+            epoch_start = time.perf_counter()
+            rnd.shuffle(train)
+            losses = {}
+            for batch in minibatch(train, size=compounding(4.0, 32.0, 1.001)):
+                nlp.update(batch, sgd=optimizer, drop=dropout, losses=losses)
+            seconds = time.perf_counter() - epoch_start
+            dev_f = _dev_f(nlp, dev)
+            stats = {"epoch": epoch, "epochs": epochs, "loss": round(losses.get(PIPE_NAME, 0.0), 4),
+                     "dev_f": round(dev_f, 4), "seconds": round(seconds, 3),
+                     "examples_per_sec": round(len(train) / seconds, 1) if seconds else None}
+            history.append(stats)
+            print(f"epoch {epoch:3d}  loss {stats['loss']:10.4f}  dev F {dev_f:.4f}  "
+                  f"{stats['seconds']:7.2f}s  {stats['examples_per_sec']} ex/s")
+            if progress:
+                progress(stats)
+            if not dev:  # nothing held out (tiny data): run every epoch
+                best_f, best_epoch = dev_f, epoch
+            elif dev_f > best_f:
+                best_f, best_epoch, best_weights = dev_f, epoch, ner.to_bytes()
+            elif epoch - best_epoch >= patience:
+                break
+        if best_weights is not None and best_epoch != history[-1]["epoch"]:
+            ner.from_bytes(best_weights)
+
+    Path(model_out).mkdir(parents=True, exist_ok=True)
     nlp.to_disk(model_out)
+    trained_on = sorted(seen | {d.user_data["sha1"] for d in new_docs})
+    (Path(model_out) / TRAINING_STATE).write_text(json.dumps({"base_model": base_model, "trained_on": trained_on}),
+                                                 encoding="utf-8")
     print(f"✅ Custom NER saved to {model_out}")
+    train_seconds = sum(h["seconds"] for h in history)
+    return {**metrics, "epochs": len(history), "best_epoch": best_epoch, "dev_f": round(best_f, 4),
+            "loss": history[-1]["loss"], "history": history,
+            "examples_per_sec": round(len(train) * len(history) / train_seconds, 1) if train_seconds else None,
+            "train_seconds": round(time.perf_counter() - started, 3)}
+
+def current_model_dir(model_root="data/custom_ner") -> Optional[Path]:
+    """Directory of the active model version; a model saved before versioning lives in model_root itself."""
+    root = Path(model_root)
+    pointer = root / CURRENT
+    if pointer.exists():
+        version = pointer.read_text(encoding="utf-8").strip()
+        return root / version if version and (root / version).is_dir() else None
+    return root if (root / "config.cfg").exists() else None
+
+def current_version(model_root="data/custom_ner") -> Optional[str]:
+    path = current_model_dir(model_root)
+    if path is None:
+        return None
+    return path.name if path != Path(model_root) else "unversioned"
+
+def list_versions(model_root="data/custom_ner") -> List[str]:
+    """Saved versions, oldest first (names sort by creation time)."""
+    root = Path(model_root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and p.name.startswith("v"))
+
+def activate_version(model_root: str, version: str) -> None:
+    """Point CURRENT at ``version``; readers see the old or the new pointer, never a partial one."""
+    root = Path(model_root)
+    if not (root / version).is_dir():
+        raise ValueError(f"unknown custom NER version {version!r}")
+    tmp = root / f".{CURRENT}.tmp-{os.getpid()}"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, root / CURRENT)
+
+def prune_versions(model_root: str, keep: int) -> List[str]:
+    """Delete all but the newest ``keep`` versions (never the active one); returns the deleted names."""
+    active = current_version(model_root)
+    versions = list_versions(model_root)
+    stale = [v for v in versions[:max(0, len(versions) - keep)] if v != active]
+    for version in stale:
+        shutil.rmtree(Path(model_root) / version, ignore_errors=True)
+    return stale
 
 def load_custom_ner(model_dir="data/custom_ner"):
-    p = Path(model_dir)
-    if p.exists() and any(p.iterdir()):
-        return spacy.load(model_dir)
-    return None
\ No newline at end of file
+    p = current_model_dir(model_dir)
+    if p is not None and any(p.iterdir()):
+        return spacy.load(p)
+    return None
+
+def keyword_patterns(skills: Iterable[str] = ()) -> List[Dict]:
+    """EntityRuler patterns for the labels the bootstrap step assigns (see bootstrap_ner.py), plus skills."""
+    from ats_nlp.nlp.bootstrap_ner import CERT_KEYWORDS, SKILL_KEYWORDS, TITLE_KEYWORDS
+    titles = "|".join(re.escape(kw) for kw in TITLE_KEYWORDS)
+    patterns = [{"label": "CERTIFICATION", "pattern": kw} for kw in CERT_KEYWORDS]
+    patterns.append({"label": "TITLE", "pattern": [{"LOWER": {"REGEX": rf"^\w*(?:{titles})\w*$"}}]})
+    patterns += [{"label": "SKILL_PHRASE", "pattern": kw} for kw in dict.fromkeys([*SKILL_KEYWORDS, *skills])]
+    return patterns
+
+def add_custom_ner(nlp, model_root="data/custom_ner", rules=True, skills: Iterable[str] = ()) -> Optional[str]:
+    """
+    Put the CERTIFICATION/TITLE/SKILL_PHRASE recognizer into ``nlp`` itself,
+    ahead of its "ner", so one nlp() call (one tokenization) yields every
+    label: the trained component of the active version, sourced into
+    ``nlp`` without loading the rest of that model, or, until one is
+    trained and with ``rules``, an entity ruler over keyword_patterns. The
+    base ner keeps entities already set and labels around them. Returns
+    (and records in nlp.meta) the version, "rules" or None.
+    """
+    before = "ner" if "ner" in nlp.pipe_names else None
+    path = current_model_dir(model_root)
+    source = None
+    if path is not None and (path / "config.cfg").exists():
+        pipeline = spacy.util.load_config(path / "config.cfg")["nlp"]["pipeline"]
+        if PIPE_NAME in pipeline:
+            trained = spacy.load(path, exclude=[name for name in pipeline if name != PIPE_NAME])
+            nlp.add_pipe(PIPE_NAME, source=trained, before=before)
+            source = current_version(model_root)
+    if source is None and rules:
+        ruler = nlp.add_pipe("entity_ruler", name=RULER_NAME, before=before,
+                             config={"phrase_matcher_attr": "LOWER", "validate": False})
+        ruler.add_patterns(keyword_patterns(skills))
+        source = "rules"
+    nlp.meta[META_KEY] = source
+    return source
@@ -0,0 +1,187 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only embedding store shared by every worker on the host.
+
+    ``vectors.f32`` is a raw float32 matrix read through a memory map and
+    ``keys.idx`` holds one ``<key> <row>`` line per vector. Writers append
+    under an flock (vector first, then its key line), so readers never see a
+    key whose row is missing; readers only pick up complete lines and remap
+    the matrix when it grows. Nothing is ever rewritten in place, which keeps
+    concurrent readers lock-free and lets the store survive restarts.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._vectors = self.path / "vectors.f32"
+        self._keys = self.path / "keys.idx"
+        self._lockfile = self.path / "store.lock"
+        meta = self.path / "meta.json"
+        if meta.exists():
+            stored = json.loads(meta.read_text())
+            if stored.get("dim") != dim:
+                raise ValueError(f"{path} holds {stored.get('dim')}-d vectors, expected {dim}")
+        else:
+            meta.write_text(json.dumps({"dim": dim}))
+        self._vectors.touch(exist_ok=True)
+        self._keys.touch(exist_ok=True)
+
+        self._index: Dict[str, int] = {}
+        self._key_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        size = self._keys.stat().st_size
+        if size > self._key_offset:
+            with open(self._keys, "rb") as f:
+                f.seek(self._key_offset)
+                chunk = f.read(size - self._key_offset)
+            complete = chunk.rfind(b"\n") + 1  # a writer may be mid-line
+            for line in chunk[:complete].decode("ascii").splitlines():
+                key, row = line.split()
+                self._index[key] = int(row)
+            self._key_offset += complete
+
+        rows = self._vectors.stat().st_size // (4 * self.dim)
+        if rows != self._rows:
+            self._mmap = np.memmap(self._vectors, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+            self._rows = rows
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None or row >= self._rows:
+                self._refresh()
+                row = self._index.get(key)
+            if row is None or row >= self._rows:
+                return None
+            return np.array(self._mmap[row])
+
+    def put_many(self, items: Sequence) -> None:
+        """Append (key, vector) pairs not already stored by this or another worker."""
+        with self._lock, open(self._lockfile, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                fresh = [(k, v) for k, v in items if k not in self._index]
+                if not fresh:
+                    return
+                row_bytes = 4 * self.dim
+                size = self._vectors.stat().st_size
+                if size % row_bytes:
+                    # drop a partial row left by a writer that died mid-append
+                    os.truncate(self._vectors, size - size % row_bytes)
+                with open(self._vectors, "ab") as f:
+                    first = f.tell() // row_bytes
+                    for _, vec in fresh:
+                        f.write(np.asarray(vec, dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._keys, "a", encoding="ascii") as f:
+                    f.write("".join(f"{k} {first + i}\n" for i, (k, _) in enumerate(fresh)))
+                self._refresh()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of sentence embeddings.
+
+    Keys are a hash of (model name, whitespace-normalized text). Lookups go
+    to an in-process LRU bounded by ``max_bytes`` first, then to the optional
+    DiskEmbeddingStore shared across workers.
+    """
+
+    def __init__(self, model_name: str, dim: int, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.disk = None
+        if disk_dir:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self.disk = DiskEmbeddingStore(os.path.join(disk_dir, slug), dim)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{_normalize(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return
+        self._lru[key] = vec
+        self._bytes += vec.nbytes
+        while self._bytes > self.max_bytes and self._lru:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def get_many(self, texts: Iterable[str]) -> List[Optional[np.ndarray]]:
+        out = []
+        for text in texts:
+            key = self.key(text)
+            with self._lock:
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    out.append(vec)
+                    continue
+            vec = self.disk.get(key) if self.disk is not None else None
+            with self._lock:
+                if vec is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vec)
+                else:
+                    self.misses += 1
+            out.append(vec)
+        return out
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        items = [(self.key(t), np.asarray(v, dtype=np.float32)) for t, v in zip(texts, vectors)]
+        with self._lock:
+            for key, vec in items:
+                self._remember(key, vec)
+        if self.disk is not None:
+            self.disk.put_many(items)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._lru),
+            "bytes": self._bytes,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+        }
@@ -1,14 +1,38 @@
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
 import phonenumbers
-import spacy
-from ats_nlp.models import Entities
-
-# Load base English model for PERSON/ORG/DATE/LOC
-NLP = spacy.load("en_core_web_sm")
+from ats_nlp.models import Entities, EntitySpan
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.metrics import timed
+from ats_nlp.nlp.model_registry import spacy_pipeline, spacy_version
+from ats_nlp.nlp.normalize import OffsetMap, phone_text
+from ats_nlp.nlp.section_cache import section_values
 
 EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
 
+# Default phone region per detected language (langdetect codes). Languages spoken
+# in many countries (es, pt, ar, ...) are left out; pass a region hint for those.
+LANGUAGE_REGIONS = {
+    "en": "US", "de": "DE", "fr": "FR", "it": "IT", "nl": "NL", "pl": "PL", "sv": "SE", "da": "DK",
+    "no": "NO", "fi": "FI", "cs": "CZ", "hu": "HU", "ro": "RO", "el": "GR", "tr": "TR", "ru": "RU",
+    "uk": "UA", "he": "IL", "ja": "JP", "ko": "KR", "zh-cn": "CN", "zh-tw": "TW",
+}
+# Fewest digits in any valid number written with a country code (e.g. +49 and a 4-digit number)
+MIN_PHONE_DIGITS = 6
+# Chars kept around each candidate run: the matcher looks at neighbours (a letter
+# before, ":30" after, "ext. 12") to accept or reject it.
+PHONE_CONTEXT = 32
+# Punctuation and plus signs phonenumbers accepts inside a number (a char-class body).
+# Its own constants are private, so a release may rename them: fall back to a copy.
+try:
+    from phonenumbers.phonenumberutil import _PLUS_CHARS, _VALID_PUNCTUATION
+except ImportError:
+    _PLUS_CHARS = "+\uff0b"
+    _VALID_PUNCTUATION = ("-x\u2010-\u2015\u2212\u30fc\uff0d-\uff0f \u00a0\u00ad\u200b\u2060\u3000"
+                          "()\uff08\uff09\uff3b\uff3d.\\[\\]/~\u2053\u223c\uff5e")
+_PHONE_PUNCT = f"[{_VALID_PUNCTUATION}{_PLUS_CHARS}]"
+
 
 def _dedup(seq: List[str]) -> List[str]:
     return list(dict.fromkeys([s.strip() for s in seq if s and s.strip()]))
@@ -27,73 +51,151 @@ def _clean_orgs(orgs: List[str]) -> List[str]:
     return [o for o in orgs if o.lower() not in blacklist and len(o) > 2]
 
 
-def load_custom_if_available(path: str):
-    """Helper used by main.py to lazily load a custom spaCy NER model if present."""
-    try:
-        from pathlib import Path
-        p = Path(path)
-        if p.exists() and any(p.iterdir()):
-            return spacy.load(path)
-    except Exception:
-        pass
-    return None
-
-
-def extract_contacts_and_entities(text: str, custom_model: Optional[spacy.Language] = None) -> Entities:
-    emails = _dedup(EMAIL_RE.findall(text))
-    # Normalize weird spaces and dashes before phone parsing
-    text = (
-        text.replace("\u00A0", " ")   # non-breaking space
-            .replace("\u2009", " ")   # thin space
-            .replace("\u2002", " ")   # en space
-            .replace("–", "-")        # en-dash
-            .replace("—", "-")        # em-dash
-            .replace("（", "(")       # full-width left paren
-            .replace("）", ")")       # full-width right paren
-    )
-    phones = []
-    default_region = "US"
-    for match in phonenumbers.PhoneNumberMatcher(text, default_region):
-        try:
-            e164 = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
-            phones.append(e164)
-        except Exception:
+def _span(label: str, start: int, end: int, original: str, offsets: Optional[OffsetMap]) -> EntitySpan:
+    if offsets is not None:
+        start, end = offsets.span(start, end)
+    return EntitySpan(label=label, text=original[start:end], start=start, end=end)
+
+
+def phone_region(language: Optional[str] = None, hint: Optional[str] = None) -> str:
+    """Region for national-format numbers: the caller's hint, else the language's country, else US."""
+    if hint and hint.upper() in phonenumbers.SUPPORTED_REGIONS:
+        return hint.upper()
+    return LANGUAGE_REGIONS.get(language or "", "US")
+
+
+@lru_cache(maxsize=None)
+def _national_digits(region: str) -> int:
+    """Fewest digits a number of ``region`` can be written with without a plus sign."""
+    metadata = phonenumbers.PhoneMetadata.metadata_for_region(region)
+    national = min([n for n in metadata.general_desc.possible_length if n > 0] or [1])
+    idd = metadata.international_prefix or ""
+    # "011 290 2222": an international prefix followed by the shortest number with a country code
+    international = len(idd) if idd.isdigit() else 2
+    return min(national, international + MIN_PHONE_DIGITS)
+
+
+@lru_cache(maxsize=None)
+def _phone_run_re(digits: int) -> re.Pattern:
+    # a run of phone punctuation and digits holding at least ``digits`` digits
+    return re.compile(rf"(?:{_PHONE_PUNCT}*\d){{{digits}}}(?:{_PHONE_PUNCT}|\d)*")
+
+
+def _phone_windows(text: str, region: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    Stretches of text that can hold a valid number when read with ``region``:
+    runs with a plus sign and enough digits for a country code + number, or
+    (with a region) enough digits for a national number. Each keeps
+    PHONE_CONTEXT chars around it; overlapping windows are merged.
+    """
+    national = _national_digits(region) if region else None
+    windows: List[Tuple[int, int]] = []
+    for m in _phone_run_re(min(MIN_PHONE_DIGITS, national or MIN_PHONE_DIGITS)).finditer(text):
+        run = m.group()
+        digits = sum(ch.isdigit() for ch in run)
+        has_plus = any(ch in _PLUS_CHARS for ch in run)
+        if not ((has_plus and digits >= MIN_PHONE_DIGITS) or (national is not None and digits >= national)):
             continue
-
-# If still empty, try again without default region (handles +91, +44, etc.)
-    if not phones:
-        for match in phonenumbers.PhoneNumberMatcher(text, None):
-            try:
-                e164 = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
-                phones.append(e164)
-            except Exception:
-                continue
-    phones = _dedup(phones)
-
-    # Base NER
-    doc = NLP(text)
+        start, end = max(0, m.start() - PHONE_CONTEXT), min(len(text), m.end() + PHONE_CONTEXT)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def find_phones(text: str, region: Optional[str] = "US") -> List[Tuple[str, int, int]]:
+    """
+    (E164, start, end) for phone numbers in text, in order.
+
+    Same result as PhoneNumberMatcher over the whole text with ``region`` and,
+    if that finds nothing, again with no region (handles +91, +44, etc.), but
+    the matcher only sees the windows a regex pre-scan keeps (usually the
+    header block), not every date, year and ID in the resume.
+    """
+    for default_region in ([region, None] if region else [None]):
+        phones = []
+        for start, end in _phone_windows(text, default_region):
+            for match in phonenumbers.PhoneNumberMatcher(text[start:end], default_region):
+                try:
+                    e164 = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+                    phones.append((e164, start + match.start, start + match.end))
+                except Exception:
+                    continue
+        if phones:
+            return phones
+    return []
+
+
+def _section_entities(ctx: DocumentContext) -> List[Tuple[str, int, int]]:
+    """(label, start, end) in ``ctx.cleaned`` from the NER-routed sections, each parsed only on a section cache miss."""
+    parts = ctx.routed_parts("ner")
+
+    def compute(todo):
+        ctx.parse_parts(todo, entities=True)
+        return [[(ent.label_, ent.start_char, ent.end_char) for ent in part.doc.ents] for part in todo]
+
+    found = section_values(ctx, "entities", parts, compute, spacy_version())
+    return [(label, part.start + start, part.start + end)
+            for part, ents in zip(parts, found) for label, start, end in ents]
+
+
+@timed()
+def extract_contacts_and_entities(
+    text: Union[str, DocumentContext],
+    language: Optional[str] = None,
+    region: Optional[str] = None
+) -> Entities:
+    """
+    Contacts via regex/phonenumbers plus spaCy entities. The shared
+    pipeline carries the custom CERTIFICATION/TITLE/SKILL_PHRASE recognizer
+    next to the base ner (see custom_ner.add_custom_ner), so one parse
+    yields every label. Given a DocumentContext, only its NER-routed sections
+    are read (routing.py), and a section seen before is not parsed again
+    (section_cache.py). ``spans`` are then offsets into the context's
+    original text. Phone numbers without a country code are
+    read as numbers of ``region`` (a hint such as "GB") or of the language's
+    country; by default US.
+    """
+    ctx = text if isinstance(text, DocumentContext) else None
+    original, offsets = (ctx.text, ctx.offsets) if ctx is not None else (text, None)
+    if ctx is not None:
+        text = ctx.cleaned
+    found = list(EMAIL_RE.finditer(text))
+    emails = _dedup([m.group() for m in found])
+    spans = [_span("EMAIL", m.start(), m.end(), original, offsets) for m in found]
+    # Normalize weird spaces and dashes before phone parsing (same length, offsets still hold)
+    text = phone_text(text)
+    found_phones = find_phones(text, phone_region(language, region))
+    phones = _dedup([e164 for e164, _, _ in found_phones])
+    spans += [_span("PHONE", start, end, original, offsets) for _, start, end in found_phones]
+
+    # Base NER for PERSON/ORG/DATE/LOC and custom CERTIFICATION/TITLE/SKILL_PHRASE, one pass
+    if ctx is not None:
+        found, source = _section_entities(ctx), ctx.cleaned
+    else:
+        found, source = [(ent.label_, ent.start_char, ent.end_char) for ent in spacy_pipeline()(text).ents], text
     names, orgs, dates, locs = [], [], [], []
-    for ent in doc.ents:
-        if ent.label_ == "PERSON":
-            names.append(ent.text)
-        elif ent.label_ == "ORG":
-            orgs.append(ent.text)
-        elif ent.label_ == "DATE":
-            dates.append(ent.text)
-        elif ent.label_ in ("GPE", "LOC"):
-            locs.append(ent.text)
-
-    # Custom model (if available)
     certifications, titles, skill_phrases = [], [], []
-    if custom_model:
-        cdoc = custom_model(text)
-        for ent in cdoc.ents:
-            if ent.label_ == "CERTIFICATION":
-                certifications.append(ent.text)
-            elif ent.label_ == "TITLE":
-                titles.append(ent.text)
-            elif ent.label_ == "SKILL_PHRASE":
-                skill_phrases.append(ent.text)
+    for label, start, end in found:
+        value = source[start:end]
+        if label == "PERSON":
+            names.append(value)
+        elif label == "ORG":
+            orgs.append(value)
+        elif label == "DATE":
+            dates.append(value)
+        elif label in ("GPE", "LOC"):
+            locs.append(value)
+        elif label == "CERTIFICATION":
+            certifications.append(value)
+        elif label == "TITLE":
+            titles.append(value)
+        elif label == "SKILL_PHRASE":
+            skill_phrases.append(value)
+        else:
+            continue
+        spans.append(_span(label, start, end, original, offsets))
 
     return Entities(
         names=_dedup(_clean_names(names)),
@@ -105,4 +207,5 @@ def extract_contacts_and_entities(text: str, custom_model: Optional[spacy.Langua
         certifications=_dedup(certifications),
         titles=_dedup(titles),
         skill_phrases=_dedup(skill_phrases),
+        spans=spans,
     )
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import re
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+# fp32 torch (reference), dynamically int8-quantized torch, exported ONNX Runtime graph
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_DIR = os.getenv("ATS_ONNX_DIR", "data/onnx")
+
+
+def sbert_backend() -> str:
+    backend = os.getenv("ATS_SBERT_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"ATS_SBERT_BACKEND must be one of {', '.join(BACKENDS)}, got {backend!r}")
+    return backend
+
+
+def load_sentence_model(name: str, backend: str = "torch"):
+    """A SentenceTransformer (or a drop-in encoder) running on the requested CPU backend."""
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(name)
+    model = SentenceTransformer(name, device="cpu")
+    if backend == "int8":
+        import torch
+        # Linear layers carry nearly all of MiniLM's FLOPs; weights int8, activations quantized per batch
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if backend == "onnx":
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        return OnnxSentenceEncoder(model, Path(ONNX_DIR) / slug)
+    raise ValueError(f"unknown SBERT backend {backend!r}")
+
+
+def export_onnx(model, path: Path) -> None:
+    """Export the transformer of a SentenceTransformer (token embeddings out) with dynamic batch/sequence axes."""
+    import torch
+
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(names, inputs)), return_dict=False)[0]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _TokenEmbeddings(), tuple(sample[n] for n in names), str(tmp),
+            input_names=names, output_names=["token_embeddings"],
+            dynamic_axes={n: axes for n in [*names, "token_embeddings"]}, opset_version=14,
+        )
+    os.replace(tmp, path)
+
+
+class OnnxSentenceEncoder:
+    """
+    Mean-pooled SentenceTransformer (e.g. MiniLM) served by ONNX Runtime.
+
+    The transformer is exported once to ``path/model.onnx`` and reused by
+    later starts and other workers; tokenization, mean pooling and
+    normalization mirror the SentenceTransformer modules so vectors match
+    the torch model. Exposes the part of the SentenceTransformer API
+    score.py uses (``encode``, ``get_sentence_embedding_dimension``).
+    """
+
+    def __init__(self, model, path: Path):
+        import onnxruntime as ort
+        from sentence_transformers.models import Normalize, Pooling
+
+        pooling = next((m for m in model if isinstance(m, Pooling)), None)
+        if pooling is None or pooling.get_pooling_mode_str() != "mean":
+            raise ValueError("the onnx backend supports mean-pooled sentence models only")
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.dim = model.get_sentence_embedding_dimension()
+        self.normalize = any(isinstance(m, Normalize) for m in model)
+
+        onnx_path = Path(path) / "model.onnx"
+        if not onnx_path.exists():
+            export_onnx(model, onnx_path)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = os.getenv("ATS_TORCH_THREADS")
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(str(onnx_path), opts, providers=["CPUExecutionProvider"])
+        self._inputs = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **_) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([-len(t) for t in texts], kind="stable")  # similar lengths per batch, less padding
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            enc = self.tokenizer([texts[i] for i in idx], padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors="np")
+            tokens = self.session.run(None, {n: enc[n].astype(np.int64) for n in self._inputs})[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            emb = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize or normalize_embeddings:
+                emb /= np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out[idx] = emb
+        return out[0] if single else out
@@ -0,0 +1,196 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.score import document_embedding, jd_term_vectors
+
+
+class JobProfile(DocumentContext):
+    """
+    A job description indexed once and scored against many resumes.
+
+    It is a DocumentContext whose JD-side artifacts (lemma tokens, embedding,
+    suggestion term matrix) are computed up front by ``warm``; the spaCy Docs
+    (held by ``parts``) and the normalized text are dropped afterwards, so a
+    stored job costs a few KB.
+    """
+
+    def __init__(self, job_id: str, text: str, required_skills: Optional[List[str]] = None,
+                 created_at: Optional[float] = None):
+        super().__init__(text)
+        self.job_id = job_id
+        self.required_skills = [s.lower() for s in (required_skills or [])]
+        self.created_at = created_at or time.time()
+
+    def warm(self) -> "JobProfile":
+        self.lemma_tokens  # the one spaCy pass over the JD
+        document_embedding(self)
+        jd_term_vectors(self)
+        # only text, lemmas and the artifacts above are used to score against a job
+        for name in ("docs", "parts", "_normalized", "cleaned", "offsets"):
+            self.__dict__.pop(name, None)
+        return self
+
+    def to_dict(self) -> Dict:
+        """The persisted record; embedding and term matrix are rebuilt from ``lemmas`` when first needed."""
+        return {
+            "jobId": self.job_id,
+            "text": self.text,
+            "requiredSkills": self.required_skills,
+            "createdAt": self.created_at,
+            "lemmas": self.lemmas,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "JobProfile":
+        job = cls(data["jobId"], data["text"], data.get("requiredSkills"), data.get("createdAt"))
+        job.lemmas = data["lemmas"]
+        return job
+
+
+class JobRegistry:
+    """
+    Bounded LRU of JobProfiles, optionally persisted to a local JSONL log.
+
+    A create appends the job's record (text, required skills, lemmas), a
+    delete or an eviction appends a ``{"jobId", "deleted": true}`` tombstone.
+    Each worker applies whatever the log grew by since its last read, so jobs
+    registered (or deleted) through one uvicorn worker are seen by all of
+    them. The log is rewritten with the live jobs only once dead records
+    outnumber them.
+    """
+
+    def __init__(self, max_jobs: int = 1000, persist_path: Optional[str] = None,
+                 on_evict: Optional[Callable[[List[str]], None]] = None):
+        self.max_jobs = max_jobs
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.on_evict = on_evict  # called with the ids a create pushed out of the LRU
+        self._jobs: "OrderedDict[str, JobProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._log: Optional[BinaryIO] = None  # held open so a compacted log never reuses its inode
+        self._offset = 0                   # bytes of the log applied so far
+        self._records = 0                  # records in those bytes, live or dead
+        self._reload()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, job_id: str) -> bool:
+        with self._lock:
+            self._reload()
+            return job_id in self._jobs
+
+    def create(self, text: str, required_skills: Optional[List[str]] = None,
+               job_id: Optional[str] = None) -> JobProfile:
+        job = JobProfile(job_id or uuid.uuid4().hex, text, required_skills).warm()
+        with self._lock, self._file_lock():
+            self._reload()
+            self._jobs[job.job_id] = job
+            self._jobs.move_to_end(job.job_id)
+            evicted = self._evict()
+            self._append([job.to_dict()] + [{"jobId": i, "deleted": True} for i in evicted])
+        if evicted and self.on_evict is not None:
+            self.on_evict(evicted)
+        return job
+
+    def get(self, job_id: str) -> Optional[JobProfile]:
+        with self._lock:
+            self._reload()  # one stat() unless another worker appended to the log
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock, self._file_lock():
+            self._reload()
+            if self._jobs.pop(job_id, None) is None:
+                return False
+            self._append([{"jobId": job_id, "deleted": True}])
+            return True
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize appends and compactions of the persisted log across workers."""
+        if self.persist_path is None:
+            yield
+            return
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.persist_path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _evict(self) -> List[str]:
+        evicted = []
+        while len(self._jobs) > self.max_jobs:
+            evicted.append(self._jobs.popitem(last=False)[0])
+        return evicted
+
+    def _append(self, records: List[Dict]) -> None:
+        """Append under the file lock, right after a _reload (so the log ends at our offset)."""
+        if self.persist_path is None:
+            return
+        if self._records + len(records) > 2 * len(self._jobs) + 64:
+            self._compact()
+            return
+        with open(self.persist_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+            self._offset = f.tell()
+        if self._log is None:
+            self._log = open(self.persist_path, "rb")
+        self._records += len(records)
+
+    def _compact(self) -> None:
+        """Rewrite the log with one record per live job (those in memory, just reloaded)."""
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.persist_path.with_name(f"{self.persist_path.name}.tmp-{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in self._jobs.values():
+                f.write(json.dumps(job.to_dict()) + "\n")
+        os.replace(tmp, self.persist_path)
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.persist_path, "rb")
+        self._offset, self._records = os.fstat(self._log.fileno()).st_size, len(self._jobs)
+
+    def _reload(self) -> None:
+        """Apply records appended by another worker since our last read (all of them after a compaction)."""
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+        stat = self.persist_path.stat()
+        previous = self._jobs
+        if self._log is None or os.fstat(self._log.fileno()).st_ino != stat.st_ino:
+            if self._log is not None:
+                self._log.close()
+            self._log = open(self.persist_path, "rb")
+            self._jobs, self._offset, self._records = OrderedDict(), 0, 0
+        elif stat.st_size == self._offset:
+            return
+        self._log.seek(self._offset)
+        chunk = self._log.read(stat.st_size - self._offset)
+        complete = chunk.rfind(b"\n") + 1
+        for line in chunk[:complete].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            self._records += 1
+            local = previous.get(data["jobId"])
+            self._jobs.pop(data["jobId"], None)
+            if data.get("deleted"):
+                continue
+            # the on-disk record wins unless it is the very registration we hold (and have warmed)
+            same = local is not None and local.created_at == data.get("createdAt") and local.text == data["text"]
+            self._jobs[data["jobId"]] = local if same else JobProfile.from_dict(data)
+        self._offset += complete
+        self._evict()
@@ -0,0 +1,224 @@
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ats_nlp.nlp.inference import load_sentence_model, sbert_backend
+from ats_nlp.nlp.metrics import METRICS
+
+logger = logging.getLogger("ats-nlp")
+
+SPACY_MODEL = "en_core_web_sm"
+SBERT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Known up front so caches and indexes can be opened before the model loads
+SBERT_DIM = int(os.getenv("ATS_SBERT_DIM", "384"))
+SBERT_BACKEND = sbert_backend()
+# Cached vectors are only reused by the backend that produced them
+SBERT_CACHE_ID = SBERT_MODEL if SBERT_BACKEND == "torch" else f"{SBERT_MODEL}#{SBERT_BACKEND}"
+# Versioned: CUSTOM_NER_DIR/CURRENT names the active model directory (see custom_ner.py)
+CUSTOM_NER_DIR = os.getenv("ATS_CUSTOM_NER_DIR", "data/custom_ner")
+# Keyword rules for CERTIFICATION/TITLE/SKILL_PHRASE while no custom model is trained; 0 turns them off
+CUSTOM_NER_RULES = os.getenv("ATS_CUSTOM_NER_RULES", "1") != "0"
+SKILLS_DB = "data/skills_db.txt"
+
+MODEL_LOAD_SECONDS = METRICS.histogram("ats_model_load_seconds", "Model load (and hot-swap reload) wall time.",
+                                       ["model"])
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # peak, KB on Linux
+
+
+class ModelRegistry:
+    """
+    Loads each model once, on first use or during an explicit warm-up.
+
+    Loaders are registered by name; ``get`` loads under a per-model lock so
+    concurrent first requests share one load. Load wall time and the RSS
+    growth it caused are recorded for /health. A model registered with a
+    ``version`` callable (what is on disk now) is reloaded by ``refresh``
+    when that moves, which is how a model activated by another worker or a
+    retrain process reaches this one. Callbacks added with ``on_replace``
+    run after every swap, to drop state built on the old instance.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._versions: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._on_replace: List[Callable[[str], None]] = []
+
+    def register(self, name: str, loader: Callable[[], Any], version: Optional[Callable[[], Any]] = None) -> None:
+        self._loaders[name] = loader
+        if version is not None:
+            self._versions[name] = version
+        self._locks.setdefault(name, threading.Lock())
+        self._info.setdefault(name, {"status": "not_loaded"})
+
+    def get(self, name: str) -> Any:
+        if name in self._models:
+            return self._models[name]
+        with self._locks[name]:
+            if name not in self._models:
+                self._info[name] = {"status": "loading"}
+                rss, start = rss_mb(), time.perf_counter()
+                try:
+                    version = self._versions[name]() if name in self._versions else None
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._info[name] = {"status": "error", "error": str(e)}
+                    raise
+                self._models[name] = model
+                MODEL_LOAD_SECONDS.observe(time.perf_counter() - start, name)
+                self._info[name] = {
+                    "status": "ready" if model is not None else "absent",
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "rss_mb": round(rss_mb() - rss, 1),
+                    **({"version": version} if name in self._versions else {}),
+                }
+                logger.info("📦 Model %s loaded in %.2fs", name, self._info[name]["load_seconds"])
+        return self._models[name]
+
+    def loaded(self, name: str) -> bool:
+        return self._models.get(name) is not None
+
+    def replace(self, name: str, model: Any, version: Any = None) -> None:
+        """
+        Swap in a new instance (e.g. a retrained model) without reloading from the loader.
+        Requests already holding the old instance finish with it.
+        """
+        with self._locks[name]:
+            self._models[name] = model
+            self._info[name] = {**self._info.get(name, {}), "status": "ready" if model is not None else "absent",
+                                "replaced_at": time.time()}
+            if version is not None:
+                self._info[name]["version"] = version
+        for callback in self._on_replace:
+            try:
+                callback(name)
+            except Exception as e:
+                logger.error(f"❌ Replace callback failed for model {name}: {e}")
+
+    def on_replace(self, callback: Callable[[str], None]) -> None:
+        self._on_replace.append(callback)
+
+    def refresh(self, name: str) -> bool:
+        """Reload a loaded model whose on-disk version changed; True if it was swapped."""
+        if name not in self._versions or name not in self._models:
+            return False
+        version = self._versions[name]()
+        if version == self._info[name].get("version"):
+            return False
+        start = time.perf_counter()
+        model = self._loaders[name]()  # loaded outside the lock; requests keep using the old one meanwhile
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - start, name)
+        self.replace(name, model, version)
+        logger.info("🔁 Model %s switched to version %s", name, version)
+        return True
+
+    def watch(self, names: Iterable[str], interval: float = 5.0) -> threading.Thread:
+        """Daemon thread calling ``refresh`` on ``names`` every ``interval`` seconds."""
+        names = list(names)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                for name in names:
+                    try:
+                        self.refresh(name)
+                    except Exception as e:
+                        logger.error(f"❌ Failed to refresh model {name}: {e}")
+
+        thread = threading.Thread(target=run, name="model-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = False) -> Optional[threading.Thread]:
+        """Load the given (default: all) models now, or on a daemon thread when ``background``."""
+        names = list(names or self._loaders)
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"❌ Failed to load model {name}: {e}")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(info) for name, info in self._info.items()}
+
+
+def _skill_terms():
+    try:
+        with open(SKILLS_DB, "r", encoding="utf-8") as f:
+            return [line.strip().lower() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _load_spacy():
+    # one pipeline for every entity label; a new custom NER version means a new assembled pipeline
+    import spacy
+    from ats_nlp.nlp.custom_ner import add_custom_ner
+    nlp = spacy.load(SPACY_MODEL)
+    add_custom_ner(nlp, CUSTOM_NER_DIR, rules=CUSTOM_NER_RULES, skills=_skill_terms())
+    return nlp
+
+
+def _load_sbert():
+    model = load_sentence_model(SBERT_MODEL, SBERT_BACKEND)
+    dim = model.get_sentence_embedding_dimension()
+    if dim != SBERT_DIM:
+        raise ValueError(f"{SBERT_MODEL} produces {dim}-d embeddings but ATS_SBERT_DIM is {SBERT_DIM}")
+    return model
+
+
+def _custom_ner_version():
+    from ats_nlp.nlp.custom_ner import current_version
+    return current_version(CUSTOM_NER_DIR)
+
+
+MODELS = ModelRegistry()
+MODELS.register("spacy", _load_spacy, version=_custom_ner_version)
+MODELS.register("sbert", _load_sbert)
+
+
+def spacy_pipeline():
+    """The one shared spaCy pipeline; callers disable components per call instead of loading copies."""
+    return MODELS.get("spacy")
+
+
+def spacy_version() -> str:
+    """Identifies the assembled pipeline (base model, custom NER version) in cache keys."""
+    return f"{SPACY_MODEL}@{MODELS.stats()['spacy'].get('version')}"
+
+
+def custom_ner_source() -> Optional[str]:
+    """Custom NER version in the loaded pipeline, "rules", or None (none, or spaCy not loaded yet)."""
+    if not MODELS.loaded("spacy"):
+        return None
+    from ats_nlp.nlp.custom_ner import META_KEY
+    return MODELS.get("spacy").meta.get(META_KEY)
+
+
+def sbert():
+    return MODELS.get("sbert")
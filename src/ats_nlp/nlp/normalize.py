@@ -0,0 +1,185 @@
+import re
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, List, Tuple, Union
+
+BULLET_CHARS = "•·●■▪▶►●⦿◆➤➣➢"
+ARROW_CHARS = "➔→⇒➤➣➢"
+
+# Control characters become spaces and CR becomes LF; both same-length, applied per rewritten run
+CTRL_TRANSLATION = str.maketrans({**{chr(c): " " for c in [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20)]},
+                                  "\r": "\n"})
+# Spaces and dashes phonenumbers does not understand. Same-length, so offsets still hold.
+# str.replace beats str.translate here: translate goes char by char through a dict on non-ASCII text.
+PHONE_REPLACEMENTS = (
+    ("\u00A0", " "),  # non-breaking space
+    ("\u2009", " "),  # thin space
+    ("\u2002", " "),  # en space
+    ("\u2013", "-"),  # en-dash
+    ("\u2014", "-"),  # em-dash
+    ("\uFF08", "("),  # full-width left paren
+    ("\uFF09", ")"),  # full-width right paren
+)
+
+# Everything clean_text rewrites after NFKC is a run of whitespace, control chars and
+# bullets/arrows: any such run of 2+ chars, or a single char other than a space or LF.
+# The pattern starts with a char class so the regex engine scans for it at C speed;
+# single spaces and newlines (most of a resume) never reach Python.
+_MARKS = re.escape("".join(dict.fromkeys(BULLET_CHARS + ARROW_CHARS)))
+_RUN = rf"[ \t\n\r\x00-\x08\x0b\x0c\x0e-\x1f{_MARKS}]"
+REWRITE_RE = re.compile(rf"{_RUN}(?:(?<=[^ \n]){_RUN}*|{_RUN}+)")
+_MARK_RE = re.compile(rf"[{_MARKS}]")
+_NEWLINES_RE = re.compile(r"\n{3,}")
+_BLANKS_RE = re.compile(r"[ \t]+")
+_TRAILING_RE = re.compile(r" +\n")
+_NON_ASCII_RE = re.compile(r".?[^\x00-\x7f]+", re.DOTALL)
+
+Anchors = Tuple[List[int], List[int]]
+
+
+def phone_text(text: str) -> str:
+    for old, new in PHONE_REPLACEMENTS:
+        text = text.replace(old, new)
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _rewrite(run: str) -> str:
+    # the legacy passes, in order, on one short whitespace/bullet run; runs repeat a lot ("\r\n", "  ")
+    run = _MARK_RE.sub(" - ", run.translate(CTRL_TRANSLATION))
+    run = _NEWLINES_RE.sub("\n\n", run)
+    run = _BLANKS_RE.sub(" ", run)
+    return _TRAILING_RE.sub("\n", run)
+
+
+class OffsetMap:
+    """
+    Maps positions in normalized text back to the original text.
+
+    Each stage that changed lengths keeps two int lists of anchor points
+    (normalized pos, source pos), one per rewritten stretch, at its end;
+    between anchors text was copied 1:1, so a lookup is a bisect per stage.
+    Stages that kept every length add nothing, and the NFKC stage is only
+    worked out on the first lookup.
+    """
+
+    def __init__(self):
+        self._stages: List[Union[Anchors, Callable[[], Anchors]]] = []
+
+    def _push(self, clean: List[int], source: List[int]) -> None:
+        if any(c != s for c, s in zip(clean, source)):
+            self._stages.append((clean, source))
+
+    @staticmethod
+    def _lookup(clean: List[int], source: List[int], pos: int) -> int:
+        i = bisect_right(clean, pos) - 1
+        if i < 0:
+            return pos
+        mapped = source[i] + (pos - clean[i])
+        # inside a stretch that grew (a ligature, " - " for a bullet) stay on its last source char
+        return min(mapped, source[i + 1] - 1) if i + 1 < len(source) else mapped
+
+    def to_original(self, pos: int) -> int:
+        for i in range(len(self._stages) - 1, -1, -1):
+            if callable(self._stages[i]):
+                self._stages[i] = self._stages[i]()
+            pos = self._lookup(*self._stages[i], pos)
+        return pos
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """Original [start, end) of a normalized [start, end)."""
+        o_start = self.to_original(start)
+        return o_start, self.to_original(end - 1) + 1 if end > start else o_start
+
+
+def _nfkc_anchors(text: str) -> Anchors:
+    # NFKC never composes across a following ASCII char, so each non-ASCII run
+    # (plus the char before it, for combining marks) normalizes on its own.
+    # Inside a run that changed length, anchors go per character cluster
+    # (a starter and its combining marks) unless clusters do not add up
+    # (e.g. Hangul jamo composing), then one anchor at the end of the run.
+    clean, source = [0], [0]
+    last = size = 0
+    for m in _NON_ASCII_RE.finditer(text):
+        run = m.group()
+        size += m.start() - last
+        normalized = unicodedata.normalize("NFKC", run)
+        if normalized == run:
+            size += len(run)
+            last = m.end()
+            continue
+        starts = [i for i, ch in enumerate(run) if i == 0 or not unicodedata.combining(ch)]
+        bounds = list(zip(starts, starts[1:] + [len(run)]))
+        lengths = [len(unicodedata.normalize("NFKC", run[a:b])) for a, b in bounds]
+        if sum(lengths) != len(normalized):
+            bounds, lengths = [(0, len(run))], [len(normalized)]
+        for (_, end), n in zip(bounds, lengths):
+            size += n
+            last = m.start() + end
+            if size - last != clean[-1] - source[-1]:
+                clean.append(size)
+                source.append(last)
+    return clean, source
+
+
+def _nfkc(text: str, offsets: OffsetMap) -> str:
+    if text.isascii():
+        return text
+    normalized = unicodedata.normalize("NFKC", text)
+    if normalized != text:
+        offsets._stages.append(lambda: _nfkc_anchors(text))
+    return normalized
+
+
+def normalize(text: str, keep_case: bool = False) -> Tuple[str, OffsetMap]:
+    """
+    The cleaning done by ``preprocess.clean_text`` in one compiled pass, plus an
+    OffsetMap from the result back to ``text``.
+
+    NFKC (skipped for ASCII text), one regex pass that rewrites runs of
+    whitespace, control characters, bullets and arrows, then strip and the
+    optional lowercase.
+    """
+    offsets = OffsetMap()
+    if not text:
+        return "", offsets
+    text = _nfkc(text, offsets)
+
+    clean, source = [0], [0]
+    shift = 0
+
+    def rewrite(m: re.Match) -> str:
+        nonlocal shift
+        run = m.group()
+        piece = _rewrite(run)
+        if len(piece) != len(run):
+            shift += len(piece) - len(run)
+            clean.append(m.end() + shift)
+            source.append(m.end())
+        return piece
+
+    text = REWRITE_RE.sub(rewrite, text)
+
+    stripped = text.strip()
+    if len(stripped) != len(text):
+        lead = len(text) - len(text.lstrip())
+        start = OffsetMap._lookup(clean, source, lead)
+        keep = [(c - lead, s) for c, s in zip(clean, source) if c > lead]
+        clean, source = [0, *(c for c, _ in keep)], [start, *(s for _, s in keep)]
+    offsets._push(clean, source)
+    text = stripped
+
+    if not keep_case:
+        lowered = text.lower()
+        if len(lowered) != len(text):  # a few non-ASCII letters lowercase to two chars
+            clean, source = [0], [0]
+            size = 0
+            for i, ch in enumerate(text):
+                size += len(ch.lower())
+                if len(ch.lower()) != 1:
+                    clean.append(size)
+                    source.append(i + 1)
+            offsets._push(clean, source)
+        text = lowered
+    return text, offsets
@@ -1,21 +1,17 @@
-import re
-import unicodedata
 from langdetect import detect, LangDetectException
-import spacy
-
-# Load spaCy pipeline without NER for faster token ops
-NLP = spacy.load("en_core_web_sm", disable=["ner"])
-
-CTRL = r"[\u0000-\u0008\u000B\u000C\u000E-\u001F]"
-BULLETS = re.compile(r"[•·●■▪▶►●⦿◆➤➣➢]")
-ARROWS = re.compile(r"[➔→⇒➤➣➢]")
+from ats_nlp.nlp.context import TOKEN_DISABLE
+from ats_nlp.nlp.metrics import timed
+from ats_nlp.nlp.model_registry import spacy_pipeline
+from ats_nlp.nlp.normalize import normalize
 
+@timed()
 def detect_language(text: str) -> str:
     try:
         return detect(text)
     except LangDetectException:
         return "unknown"
 
+@timed()
 def clean_text(
     text: str,
     keep_case: bool = False,
@@ -25,20 +21,12 @@ def clean_text(
     if not text:
         return ""
 
-    text = unicodedata.normalize("NFKC", text)
-    text = re.sub(CTRL, " ", text)
-    text = BULLETS.sub(" - ", text)
-    text = ARROWS.sub(" - ", text)
-    text = text.replace("\r", "\n")
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r" +\n", "\n", text)
-    text = text.strip()
-    if not keep_case:
-        text = text.lower()
+    # NFKC, control chars, bullets/arrows, whitespace, case: see normalize.py
+    text, _ = normalize(text, keep_case=keep_case)
 
     if remove_stopwords or lemmatize:
-        doc = NLP(text)
+        # shared pipeline, NER skipped for faster token ops
+        doc = spacy_pipeline()(text, disable=list(TOKEN_DISABLE))
         tokens = []
         for tok in doc:
             if remove_stopwords and tok.is_stop:
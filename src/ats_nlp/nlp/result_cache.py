@@ -0,0 +1,147 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of the parts (strings, numbers, None, JSON-able values), NUL-separated."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update((part if isinstance(part, str) else json.dumps(part, sort_keys=True)).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison): "*", one tag or a comma-separated list."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return any(t == "*" or t.removeprefix("W/") == f'"{etag}"' for t in tags)
+
+
+class SqliteResultStore:
+    """
+    Result store shared by every worker on the host: one SQLite file in WAL
+    mode, a connection per thread, rows expire after the cache TTL. Expired
+    rows are deleted every ``prune_every`` writes, and the oldest rows once
+    ``max_rows`` is exceeded.
+    """
+
+    def __init__(self, path: str, max_rows: int = 100_000, prune_every: int = 500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS results "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # a lost write only costs a recompute
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        row = self._conn().execute("SELECT value, expires FROM results WHERE key = ? AND expires > ?",
+                                   (key, time.time())).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, key: str, value: Dict, expires: float) -> None:
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)",
+                         (key, json.dumps(value), expires))
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                conn.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+                conn.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY expires DESC "
+                             "LIMIT -1 OFFSET ?)", (self.max_rows,))
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """
+    Cache of endpoint results (JSON-able dicts) by content key.
+
+    An in-process LRU of ``max_entries`` with a per-entry TTL, backed by an
+    optional SqliteResultStore so workers share results. Callers put
+    everything the result depends on (text hash, model and skills-DB
+    versions, options) into the key, so nothing is invalidated explicitly:
+    a retrain or DB reload just stops matching old keys, which age out.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 3600.0, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = SqliteResultStore(sqlite_path) if sqlite_path else None
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and entry[1] > now:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._lru[key]
+        entry = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._remember(key, *entry)
+        return entry[0]
+
+    def put(self, key: str, value: Dict) -> None:
+        if not self.enabled:
+            return
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires)
+        if self.store is not None:
+            self.store.put(key, value, expires)
+
+    def _remember(self, key: str, value: Dict, expires: float) -> None:
+        self._lru[key] = (value, expires)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._lru),
+            "store_entries": len(self.store) if self.store is not None else 0,
+        }
+
@@ -0,0 +1,244 @@
+"""
+Custom NER retraining as background jobs.
+
+A job runs in its own process (``python -m ats_nlp.nlp.retrain <status file>``)
+so training never holds an API worker. Its state lives in a JSON status
+file under RETRAIN_DIR, which any worker can read; the process rewrites it
+atomically as it moves through bootstrap -> train -> activate. The model is
+saved to a new version directory under the model root and becomes live by
+rewriting the CURRENT pointer, which every worker picks up through
+``MODELS.refresh``. One job runs at a time per model root.
+"""
+import fcntl
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ats_nlp.nlp.custom_ner import activate_version, current_model_dir, prune_versions
+
+RETRAIN_DIR = os.getenv("ATS_RETRAIN_DIR", "data/retrain_jobs")
+# Versions kept on disk for rollback, the active one included
+KEEP_VERSIONS = int(os.getenv("ATS_CUSTOM_NER_KEEP", "3"))
+RAW_DIR = "data/raw_resumes"
+DATA_FILE = "data/custom_ner.jsonl"
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _status_lock(path: Path):
+    """Serializes read-modify-write of one job's status file between the API workers and the job process."""
+    with open(path.with_suffix(".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_json(path: Path) -> Dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RetrainJobs:
+    """Starts, tracks and cancels retrain processes; state is shared with other workers through status files."""
+
+    def __init__(self, model_root: str, jobs_dir: str = RETRAIN_DIR, keep: int = KEEP_VERSIONS,
+                 raw_dir: str = RAW_DIR, data_file: str = DATA_FILE):
+        self.model_root = model_root
+        self.jobs_dir = Path(jobs_dir)
+        self.keep = keep
+        self.raw_dir = raw_dir
+        self.data_file = data_file
+        self._procs: Dict[str, subprocess.Popen] = {}  # started by this worker, reaped on poll
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def start(self) -> Dict:
+        """Launch a retrain process and return its status; a job already running is returned instead."""
+        with self._lock:
+            running = self.active()
+            if running is not None:
+                return running
+            self.jobs_dir.mkdir(parents=True, exist_ok=True)
+            job_id = uuid.uuid4().hex[:12]
+            status = {
+                "jobId": job_id, "state": "queued", "stage": None, "createdAt": time.time(),
+                "modelRoot": self.model_root, "rawDir": self.raw_dir, "dataFile": self.data_file,
+                "keep": self.keep, "progress": {}, "metrics": {},
+            }
+            _write_json(self._path(job_id), status)
+            log = open(self.jobs_dir / f"{job_id}.log", "ab")
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "ats_nlp.nlp.retrain", str(self._path(job_id))],
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=True,  # survives a worker restart
+            )
+            log.close()
+            self._procs[job_id] = proc
+            status["pid"] = proc.pid
+            with _status_lock(self._path(job_id)):
+                # so every worker can tell a job that died before reporting in; unless it already did
+                on_disk = _read_json(self._path(job_id))
+                if on_disk["state"] == "queued":
+                    _write_json(self._path(job_id), {**on_disk, "pid": proc.pid})
+                else:
+                    status = on_disk
+            return status
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+        status = json.loads(path.read_text(encoding="utf-8"))
+        proc = self._procs.get(job_id)
+        exited = proc is not None and proc.poll() is not None
+        if exited:
+            self._procs.pop(job_id, None)
+        if status["state"] in ACTIVE_STATES and (exited or (status.get("pid") and not _alive(status["pid"]))):
+            status = json.loads(path.read_text(encoding="utf-8"))  # it may have finished since the first read
+            if status["state"] in ACTIVE_STATES:
+                status.update(state="failed", error="retrain process exited unexpectedly", finishedAt=time.time())
+                _write_json(path, status)
+        return status
+
+    def list(self) -> List[Dict]:
+        if not self.jobs_dir.is_dir():
+            return []
+        jobs = [self.get(p.stem) for p in self.jobs_dir.glob("*.json")]
+        return sorted((j for j in jobs if j), key=lambda j: j["createdAt"], reverse=True)
+
+    def active(self) -> Optional[Dict]:
+        return next((j for j in self.list() if j["state"] in ACTIVE_STATES), None)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Stop a queued or running job; its half-written version is discarded and CURRENT is untouched."""
+        status = self.get(job_id)
+        if status is None or status["state"] not in ACTIVE_STATES:
+            return status
+        path = self._path(job_id)
+        with _status_lock(path):
+            status = _read_json(path)
+            if status["state"] == "queued":  # the process sees this before it starts running, and exits
+                status.update(state="cancelled", finishedAt=time.time())
+                _write_json(path, status)
+        proc = self._procs.get(job_id)
+        pid = status.get("pid") or (proc.pid if proc is not None else None)
+        if _alive(pid):
+            os.kill(pid, signal.SIGTERM)  # a started job records "cancelled" itself
+            for _ in range(50):
+                if (proc.poll() is not None) if proc is not None else not _alive(pid):
+                    break
+                time.sleep(0.1)
+        self._procs.pop(job_id, None)
+        with _status_lock(path):
+            status = _read_json(path)
+            if status["state"] in ACTIVE_STATES:  # killed before it could write
+                status.update(state="cancelled", finishedAt=time.time())
+                _write_json(path, status)
+        return status
+
+
+def run_job(status_path: str) -> None:
+    """Body of the retrain process: bootstrap labels, train into a fresh version dir, activate, prune."""
+    from ats_nlp.nlp.bootstrap_ner import bootstrap_directory
+    from ats_nlp.nlp.custom_ner import train_custom_ner
+
+    path = Path(status_path)
+    status = _read_json(path)
+    if status["state"] == "cancelled":  # cancelled before the process got here
+        return
+    root = Path(status["modelRoot"])
+    version = time.strftime("v%Y%m%d-%H%M%S") + f"-{status['jobId'][:6]}"
+    staging = root / f".staging-{status['jobId']}"
+
+    def update(**fields):
+        with _status_lock(path):
+            status.update(fields)
+            _write_json(path, status)
+
+    def cancelled(signum, frame):
+        raise JobCancelled()
+
+    signal.signal(signal.SIGTERM, cancelled)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / ".retrain.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            update(state="failed", error="another retrain job holds the model directory", finishedAt=time.time())
+            return
+        with _status_lock(path):
+            if _read_json(path)["state"] == "cancelled":  # cancelled while the process was starting
+                return
+            status.update(state="running", pid=os.getpid(), startedAt=time.time(), stage="bootstrap")
+            _write_json(path, status)
+        try:
+            started = time.perf_counter()
+            labels = bootstrap_directory(status["rawDir"], status["dataFile"])
+            status["metrics"]["documents"] = labels["records"]
+            status["metrics"]["labelled"] = labels["labelled"]
+            status["metrics"]["bootstrap_seconds"] = round(time.perf_counter() - started, 3)
+            if not labels["records"]:
+                raise ValueError(f"no *.txt resumes in {status['rawDir']}")
+
+            update(stage="train")
+            # fine-tune the active model on what it has not seen yet
+            metrics = train_custom_ner(model_out=str(staging), data_file=status["dataFile"],
+                                       resume_from=current_model_dir(str(root)),
+                                       progress=lambda p: update(progress=p))
+            status["metrics"].update(metrics)
+            if not metrics["new_examples"]:
+                update(state="succeeded", stage=None, version=None, finishedAt=time.time())
+                return
+
+            update(stage="activate")
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)  # past this point the version is complete
+            os.replace(staging, root / version)
+            activate_version(str(root), version)
+            pruned = prune_versions(str(root), status["keep"])
+            update(state="succeeded", stage=None, version=version, pruned=pruned, finishedAt=time.time())
+        except JobCancelled:
+            update(state="cancelled", finishedAt=time.time())
+        except Exception as e:
+            update(state="failed", error=str(e), finishedAt=time.time())
+            raise
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_job(sys.argv[1])
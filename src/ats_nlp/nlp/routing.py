@@ -0,0 +1,51 @@
+import os
+from typing import Dict, FrozenSet, List, Tuple
+
+# Which resume sections each stage reads (names from sections.section_spans;
+# "header" is everything above the first section: name, contacts). A resume
+# without recognized headers, or without any of a stage's sections, is read
+# whole. ATS_SECTION_ROUTING=0 runs every stage on the whole text again.
+ROUTING = os.getenv("ATS_SECTION_ROUTING", "1") != "0"
+ROUTES: Dict[str, Tuple[str, ...]] = {
+    "ner": ("header", "experience", "education", "certifications"),
+    "skills": ("skills", "experience"),
+    # priority order: what is embedded first when a resume has more than EMBED_MAX_CHUNKS chunks
+    "embed": ("summary", "skills", "experience", "projects", "education", "certifications"),
+}
+
+# MiniLM reads 256 word pieces; stop-word-free lemmas take ~1.5 pieces each
+EMBED_CHUNK_TOKENS = int(os.getenv("ATS_EMBED_CHUNK_TOKENS", "128"))
+EMBED_MAX_CHUNKS = int(os.getenv("ATS_EMBED_MAX_CHUNKS", "8"))
+
+
+def routes_id() -> str:
+    """Part of result cache keys: extractions and scores depend on the routes."""
+    if not ROUTING:
+        return "whole"
+    return ";".join(f"{stage}={','.join(names)}" for stage, names in sorted(ROUTES.items())) + \
+        f";chunk={EMBED_CHUNK_TOKENS}x{EMBED_MAX_CHUNKS}"
+
+
+def route(text: str, sections: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int, FrozenSet[str]]]:
+    """
+    (section, start, end, stages) for the sections of ``text``: the stages
+    whose routes name the section. A stage none of whose sections is
+    present runs on every section. Without routing: the whole text, every stage.
+    """
+    if not ROUTING:
+        return [("all", 0, len(text), frozenset(ROUTES))]
+    routed = [(name, start, end, {stage for stage, names in ROUTES.items()
+                                  if name in names and not text[start:end].isspace()})
+              for name, start, end in sections]
+    for stage in ROUTES:
+        if not any(stage in stages for *_, stages in routed):
+            for *_, stages in routed:
+                stages.add(stage)
+    return [(name, start, end, frozenset(stages)) for name, start, end, stages in routed]
+
+
+def lemma_chunks(doc) -> List[Tuple[str, int]]:
+    """(lemmas, token count) chunks of at most EMBED_CHUNK_TOKENS stop-word-free tokens of one section."""
+    words = [tok.lemma_.lower() for tok in doc if not tok.is_stop and not tok.is_space]
+    return [(" ".join(words[i:i + EMBED_CHUNK_TOKENS]), len(words[i:i + EMBED_CHUNK_TOKENS]))
+            for i in range(0, len(words), EMBED_CHUNK_TOKENS)]
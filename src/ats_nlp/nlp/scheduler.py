@@ -0,0 +1,157 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ats_nlp.nlp.metrics import BATCH_SIZE
+
+logger = logging.getLogger("ats-nlp")
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces model calls from concurrent requests into batched forward passes.
+
+    Requests submit a list of inputs and get a Future for their outputs. One
+    dedicated worker thread drains the queue: it takes everything already
+    waiting, keeps collecting for up to ``max_wait_ms`` while the batch is
+    below ``max_batch`` items, runs ``fn`` once on the lot and resolves every
+    request's future with its slice of the results. Work that arrives while
+    a batch is running simply queues up for the next one, so batches grow
+    with load instead of N requests contending for the same torch threads.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], Sequence[Any]], max_batch: int = 64,
+                 max_wait_ms: float = 2.0, torch_threads: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.torch_threads = torch_threads
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.max_batch_seen = 0
+        self._sizes = BATCH_SIZE.labels(name)
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[Any]) -> Future:
+        fut: Future = Future()
+        if not items:
+            fut.set_result([])
+            return fut
+        with self._submit_lock:
+            if not self._closed:
+                self._queue.put((list(items), fut))
+                return fut
+        # closed (e.g. its model was swapped out): a caller still holding it runs unbatched
+        try:
+            fut.set_result(list(self.fn(items)))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def __call__(self, items: List[Any]) -> List[Any]:
+        """Blocking call for sync code (e.g. endpoints running in the threadpool)."""
+        return self.submit(items).result()
+
+    def close(self) -> None:
+        """Stop the worker once everything already queued has run."""
+        with self._submit_lock:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_seen,
+            "queue_depth": self.queue_depth,
+        }
+
+    def _loop(self) -> None:
+        if self.torch_threads:
+            try:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+            except ImportError:
+                pass
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            pending = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                pending.append(nxt)
+                size += len(nxt[0])
+            self._run(pending, size)
+
+    def _run(self, pending: List, size: int) -> None:
+        batch = [item for items, _ in pending for item in items]
+        try:
+            results = self.fn(batch)
+        except Exception as e:
+            logger.exception("Batched %s call failed (%s items)", self.name, size)
+            if len(pending) == 1:
+                pending[0][1].set_exception(e)
+                return
+            # one bad input must not fail the requests it was coalesced with: retry each on its own
+            for items, fut in pending:
+                try:
+                    fut.set_result(list(self.fn(items)))
+                except Exception as item_error:
+                    fut.set_exception(item_error)
+            return
+        self.batches += 1
+        self.items += size
+        self.last_batch_size = size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self._sizes.observe(size)
+        start = 0
+        for items, fut in pending:
+            fut.set_result(results[start:start + len(items)])
+            start += len(items)
+
+
+def microbatching_enabled() -> bool:
+    return os.getenv("ATS_MICROBATCH", "1") != "0"
+
+
+def make_batcher(name: str, fn: Callable[[List[Any]], Sequence[Any]]) -> Optional[MicroBatcher]:
+    """A MicroBatcher configured from ATS_BATCH_* env vars, or None when micro-batching is off."""
+    if not microbatching_enabled():
+        return None
+    threads = os.getenv("ATS_TORCH_THREADS")
+    return MicroBatcher(
+        name,
+        fn,
+        max_batch=int(os.getenv("ATS_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.getenv("ATS_BATCH_MAX_WAIT_MS", "2")),
+        torch_threads=int(threads) if threads else None,
+    )
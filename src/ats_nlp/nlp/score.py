@@ -1,53 +1,174 @@
-from typing import List, Dict, Tuple
-from sentence_transformers import SentenceTransformer, util
-from ats_nlp.nlp.preprocess import clean_text
+import os
+from typing import List, Dict, Tuple, Union
+import numpy as np
+from ats_nlp.nlp.context import DocumentContext, as_context
+from ats_nlp.nlp.embedding_cache import EmbeddingCache
+from ats_nlp.nlp.metrics import timed
+from ats_nlp.nlp.model_registry import SBERT_CACHE_ID, SBERT_DIM, SBERT_MODEL, sbert, spacy_version
+from ats_nlp.nlp import routing
+from ats_nlp.nlp.section_cache import section_values
+from ats_nlp.nlp.scheduler import make_batcher
+from ats_nlp.nlp.vocab import TermVocabulary
 
-_SBERT = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+# Same JDs and resumes are scored over and over; ATS_EMBED_CACHE_DIR enables
+# the on-disk store shared by all uvicorn workers on the host.
+# The SBERT model itself is loaded by the model registry on first encode.
+EMBED_CACHE = EmbeddingCache(
+    SBERT_CACHE_ID,
+    dim=SBERT_DIM,
+    max_bytes=int(os.getenv("ATS_EMBED_CACHE_MB", "64")) * 1024 * 1024,
+    disk_dir=os.getenv("ATS_EMBED_CACHE_DIR") or None,
+)
 
-def semantic_match_score(resume_text: str, jd_text: str) -> float:
-    if not resume_text or not jd_text:
+# Term embeddings for suggestions: skills DB + frequently seen JD terms,
+# loaded/built by main.py at startup (see load_or_build).
+TERM_VOCAB_DIR = os.getenv("ATS_TERM_VOCAB_DIR", "data/term_vocab")
+TERM_VOCAB = TermVocabulary(SBERT_CACHE_ID, dim=EMBED_CACHE.dim)
+
+TextOrContext = Union[str, DocumentContext]
+
+@timed("sbert_encode")
+def _model_encode(texts: List[str]) -> np.ndarray:
+    return sbert().encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32, copy=False)
+
+# Concurrent requests' cache misses are coalesced into batched forward passes
+ENCODE_BATCHER = make_batcher("sbert", _model_encode)
+
+def encode(texts: List[str]) -> np.ndarray:
+    """L2-normalized float32 embeddings (one row per text); only cache misses hit the model."""
+    if not texts:
+        return np.zeros((0, EMBED_CACHE.dim), dtype=np.float32)
+    vecs = EMBED_CACHE.get_many(texts)
+    missing = [i for i, v in enumerate(vecs) if v is None]
+    if missing:
+        todo = [texts[i] for i in missing]
+        fresh = ENCODE_BATCHER(todo) if ENCODE_BATCHER is not None else _model_encode(todo)
+        EMBED_CACHE.put_many([texts[i] for i in missing], fresh)
+        for i, vec in zip(missing, fresh):
+            vecs[i] = vec
+    return np.stack(vecs)
+
+def document_embedding(ctx: DocumentContext) -> np.ndarray:
+    """SBERT embedding of the document's lemmatized text, encoded once per context."""
+    return ctx.cached("embedding", lambda: encode([ctx.lemmas])[0])
+
+def resume_chunks(ctx: DocumentContext) -> List[Tuple[str, int]]:
+    """
+    routing.lemma_chunks of the embed-routed sections, cached per section
+    (section_cache.py), in ROUTES priority and at most EMBED_MAX_CHUNKS.
+    """
+    parts = ctx.routed_parts("embed")
+
+    def compute(todo):
+        ctx.parse_parts(todo, tokens=True)
+        return [routing.lemma_chunks(part.lower) for part in todo]
+
+    # "lower": chunks are lemmatized from lowercased text (older cached ones were not)
+    found = section_values(ctx, "chunks", parts, compute, spacy_version(), routing.EMBED_CHUNK_TOKENS, "lower")
+    order = {name: i for i, name in enumerate(routing.ROUTES["embed"])}
+    ranked = sorted(zip(parts, found), key=lambda pf: order.get(pf[0].name, len(order)))  # stable: text order within
+    return [(text, n) for _, chunks in ranked for text, n in chunks][:routing.EMBED_MAX_CHUNKS]
+
+def resume_embeddings(contexts: List[DocumentContext]) -> np.ndarray:
+    """
+    Resume embeddings that cover the whole resume rather than its first 256
+    word pieces: resume_chunks averaged by token count and re-normalized.
+    The chunks of every resume not yet embedded go through one encode call;
+    unchanged sections hit the embedding cache. Without routing, document_embeddings.
+    """
+    if not routing.ROUTING:
+        return document_embeddings(contexts)
+    todo = [c for c in contexts if "resume_embedding" not in c._artifacts]
+    chunks = [resume_chunks(c) for c in todo]
+    vecs = encode([text for doc in chunks for text, _ in doc])
+    pos = 0
+    for ctx, doc in zip(todo, chunks):
+        if not doc:  # nothing but stop words
+            ctx._artifacts["resume_embedding"] = document_embedding(ctx)
+            continue
+        weights = np.array([n for _, n in doc], dtype=np.float32)
+        vec = weights @ vecs[pos:pos + len(doc)]
+        ctx._artifacts["resume_embedding"] = vec / (np.linalg.norm(vec) or 1.0)
+        pos += len(doc)
+    if not contexts:
+        return np.zeros((0, EMBED_CACHE.dim), dtype=np.float32)
+    return np.stack([c._artifacts["resume_embedding"] for c in contexts])
+
+def resume_embedding(ctx: DocumentContext) -> np.ndarray:
+    return resume_embeddings([ctx])[0]
+
+@timed()
+def semantic_match_score(resume_text: TextOrContext, jd_text: TextOrContext) -> float:
+    resume, jd = as_context(resume_text), as_context(jd_text)
+    if not resume.text or not jd.text:
         return 0.0
-    resume_clean = clean_text(resume_text, remove_stopwords=True, lemmatize=True)
-    jd_clean = clean_text(jd_text, remove_stopwords=True, lemmatize=True)
-    e1 = _SBERT.encode(resume_clean, convert_to_tensor=True)
-    e2 = _SBERT.encode(jd_clean, convert_to_tensor=True)
-    sim = float(util.cos_sim(e1, e2).item())
+    sim = float(np.dot(resume_embedding(resume), document_embedding(jd)))  # cosine, both normalized
     return max(0.0, min(1.0, sim))  # clamp 0..1
 
-def suggest_relevant_terms(resume_skills: List[str], jd_text: str, top_n: int = 5) -> List[str]:
-    if not jd_text:
+def jd_term_vectors(jd: DocumentContext) -> Tuple[List[str], np.ndarray]:
+    """The JD's unique lemma tokens and their embedding rows, looked up once per context."""
+    terms = jd.cached("terms", lambda: sorted(jd.lemma_tokens))
+    return terms, jd.cached("term_matrix", lambda: TERM_VOCAB.vectors(terms, encode))
+
+@timed()
+def suggest_relevant_terms(resume_skills: List[str], jd_text: TextOrContext, top_n: int = 5) -> List[str]:
+    jd = as_context(jd_text)
+    if not jd.text:
         return []
-    jd_tokens = list(set(clean_text(jd_text, remove_stopwords=True, lemmatize=True).split()))
     cand = set(s.lower() for s in (resume_skills or []))
+    jd_tokens, matrix = jd_term_vectors(jd)
     if not jd_tokens:
         return []
 
-    embeddings = _SBERT.encode(jd_tokens, convert_to_tensor=True)
-    resume_emb = _SBERT.encode(" ".join(sorted(cand)) or " ", convert_to_tensor=True)
+    resume_emb = encode([" ".join(sorted(cand)) or " "])[0]
+    sims = matrix @ resume_emb  # cosine: rows and query are normalized
+    if cand:
+        sims[[i for i, tok in enumerate(jd_tokens) if tok in cand]] = -np.inf
 
-    sims = []
-    for tok, emb in zip(jd_tokens, embeddings):
-        if tok in cand:
-            continue
-        sims.append((tok, float(util.cos_sim(resume_emb, emb.unsqueeze(0)).item())))
-    ranked = sorted(sims, key=lambda x: x[1], reverse=True)
-    return [tok for tok, _ in ranked[:top_n]]
+    k = min(top_n, int(np.isfinite(sims).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-sims, k - 1)[:k]
+    top = top[np.argsort(-sims[top], kind="stable")]
+    return [jd_tokens[i] for i in top]
+
+SECTION_KEYS = ["education", "experience", "skills", "projects", "summary"]
+WEIGHTS = {"skills": 40, "required": 25, "semantic": 20, "sections": 10, "format": 5}
 
 def _section_bonus(resume_text: str) -> float:
     bonus = 0
     t = resume_text.lower()
-    for key in ["education", "experience", "skills", "projects", "summary"]:
+    for key in SECTION_KEYS:
         if key in t:
             bonus += 2
     return min(bonus, 10) / 10.0
 
+def _weighted_sum(skills_cov, required_cov, sem, sections_cov):
+    # Weights (sum 100); works on floats and on numpy arrays alike
+    return (skills_cov * WEIGHTS["skills"] + required_cov * WEIGHTS["required"] + sem * WEIGHTS["semantic"]
+            + sections_cov * WEIGHTS["sections"] + WEIGHTS["format"])
+
+def _breakdown(matched: List[str], skills_cov: float, required_cov: float, sem: float, sections_cov: float) -> Dict:
+    return {
+        "matched_skills": matched,
+        "weights": dict(WEIGHTS),
+        "components": {
+            "skills_cov": round(skills_cov, 3),
+            "required_cov": round(required_cov, 3),
+            "semantic": round(sem, 3),
+            "sections_cov": round(sections_cov, 3)
+        }
+    }
+
+@timed()
 def compute_ats_score(
     resume_skills: List[str],
-    jd_text: str,
+    jd_text: TextOrContext,
     required_skills: List[str] | None,
     semantic: float = 0.0
 ) -> Tuple[float, Dict, List[str], List[str]]:
-    jd_tokens = set(clean_text(jd_text, remove_stopwords=True, lemmatize=True).split())
+    jd = as_context(jd_text)
+    jd_tokens = jd.lemma_tokens
     cand = set(s.lower() for s in (resume_skills or []))
 
     # 1) skills matched in JD tokens (heuristic)
@@ -63,22 +184,99 @@ def compute_ats_score(
     sem = semantic
 
     # 4) section completeness bonus (proxy)
-    sections_cov = _section_bonus(" ".join([*resume_skills, jd_text]))
+    sections_cov = _section_bonus(" ".join([*(resume_skills or []), jd.text]))
 
-    # Weights (sum 100)
-    score = skills_cov * 40 + required_cov * 25 + sem * 20 + sections_cov * 10 + 5
+    score = _weighted_sum(skills_cov, required_cov, sem, sections_cov)
     total = round(min(100.0, score), 2)
+    breakdown = _breakdown(matched, skills_cov, required_cov, sem, sections_cov)
 
-    breakdown = {
-        "matched_skills": matched,
-        "weights": {"skills": 40, "required": 25, "semantic": 20, "sections": 10, "format": 5},
-        "components": {
-            "skills_cov": round(skills_cov, 3),
-            "required_cov": round(required_cov, 3),
-            "semantic": round(sem, 3),
-            "sections_cov": round(sections_cov, 3)
-        }
-    }
+    suggestions = suggest_relevant_terms(resume_skills, jd, top_n=5)
+    return total, breakdown, missing, suggestions
+
+def document_embeddings(contexts: List[DocumentContext]) -> np.ndarray:
+    """Embeddings for many documents; everything not yet on its context goes through one encode call."""
+    todo = [c for c in contexts if "embedding" not in c._artifacts]
+    if todo:
+        for ctx, vec in zip(todo, encode([c.lemmas for c in todo])):
+            ctx._artifacts["embedding"] = vec
+    if not contexts:
+        return np.zeros((0, EMBED_CACHE.dim), dtype=np.float32)
+    return np.stack([document_embedding(c) for c in contexts])
+
+@timed()
+def rank_candidates(
+    resumes: List[DocumentContext],
+    resume_skills: List[List[str]],
+    jd_text: TextOrContext,
+    required_skills: List[str] | None,
+    top_k: int = 10
+) -> List[Tuple[int, float, Dict, List[str], List[str]]]:
+    """
+    compute_ats_score + semantic_match_score for N resumes against one JD.
+
+    Resumes are embedded in batched encode calls (section chunks, see
+    resume_embeddings) and compared to the JD with
+    one matrix-vector product. Skill coverage is evaluated once per distinct
+    skill and spread over candidates with an incidence matrix. Only the top_k
+    get breakdowns and suggestions. Returns (index, total, breakdown,
+    missing, suggestions) for each, best first.
+    """
+    jd = as_context(jd_text)
+    n = len(resumes)
+    if n == 0:
+        return []
+
+    # 3) semantic: N x d @ d
+    sem = np.zeros(n, dtype=np.float32)
+    if jd.text:
+        live = [i for i, r in enumerate(resumes) if r.text]
+        if live:
+            sims = resume_embeddings([resumes[i] for i in live]) @ document_embedding(jd)
+            sem[live] = np.clip(sims, 0.0, 1.0)
+
+    # candidate x skill incidence over the distinct skills of all candidates
+    cands = [sorted(set(s.lower() for s in (skills or []))) for skills in resume_skills]
+    vocab = sorted(set().union(*cands))
+    col = {s: j for j, s in enumerate(vocab)}
+    incidence = np.zeros((n, len(vocab)), dtype=np.float32)
+    for i, skills in enumerate(cands):
+        incidence[i, [col[s] for s in skills]] = 1.0
+
+    # 1) skills matched in JD tokens, decided once per distinct skill
+    jd_tokens = jd.lemma_tokens
+    in_jd = np.array([any(tok in s or s in tok for tok in jd_tokens) for s in vocab], dtype=np.float32)
+    skills_cov = np.minimum(incidence @ in_jd, 20) / 20.0
+
+    # 2) required coverage: covered[i, r] = some skill of i contains r
+    req = [r.lower() for r in (required_skills or [])]
+    if req:
+        contains = np.array([[r in s for s in vocab] for r in req], dtype=np.float32).reshape(len(req), len(vocab))
+        covered = (incidence @ contains.T) > 0
+        required_cov = covered.sum(axis=1) / len(req)
+    else:
+        covered = np.zeros((n, 0), dtype=bool)
+        required_cov = np.ones(n)
+
+    # 4) section bonus: keys found in the JD apply to everyone
+    jd_keys = {k for k in SECTION_KEYS if k in jd.text.lower()}
+    sections_cov = np.array([
+        min(2 * len(jd_keys | {k for k in SECTION_KEYS if k in " ".join(skills or []).lower()}), 10) / 10.0
+        for skills in resume_skills
+    ])
+
+    totals = np.minimum(100.0, _weighted_sum(skills_cov, required_cov, sem, sections_cov))
+    k = min(top_k, n)
+    if k <= 0:
+        return []
+    top = np.argpartition(-totals, k - 1)[:k]
+    top = top[np.lexsort((top, -totals[top]))]  # best first, input order on ties
 
-    suggestions = suggest_relevant_terms(resume_skills, jd_text, top_n=5)
-    return total, breakdown, missing, suggestions
\ No newline at end of file
+    ranked = []
+    for i in top:
+        matched = [s for s in cands[i] if in_jd[col[s]]]
+        missing = [r for r, ok in zip(req, covered[i]) if not ok]
+        breakdown = _breakdown(matched, float(skills_cov[i]), float(required_cov[i]), float(sem[i]),
+                               float(sections_cov[i]))
+        suggestions = suggest_relevant_terms(resume_skills[i], jd, top_n=5)
+        ranked.append((int(i), round(float(totals[i]), 2), breakdown, missing, suggestions))
+    return ranked
@@ -0,0 +1,46 @@
+import os
+from typing import Any, Callable, List, TypeVar
+
+from ats_nlp.nlp.context import DocumentContext, Part
+from ats_nlp.nlp.result_cache import ResultCache, content_key
+
+T = TypeVar("T")
+
+# Per-section artifacts (entities, matched skills, embedding chunks, language)
+# by section content: re-analysing an edited resume only recomputes the
+# sections that changed. ATS_RESULT_CACHE_DB shares them across workers.
+SECTION_CACHE = ResultCache(
+    max_entries=int(os.getenv("ATS_SECTION_CACHE_SIZE", "16384")),
+    ttl=float(os.getenv("ATS_RESULT_CACHE_TTL", "3600")),
+    sqlite_path=os.getenv("ATS_RESULT_CACHE_DB") or None,
+)
+
+
+def section_values(
+    ctx: DocumentContext,
+    artifact: str,
+    parts: List[Part],
+    compute: Callable[[List[Part]], List[T]],
+    *versions: Any
+) -> List[T]:
+    """
+    ``artifact`` of each part: from the cache when a section with the same
+    name and text was seen under the same ``versions`` (models, skills DB,
+    options), else from ``compute``, called once with all the other parts.
+    Values must be JSON-able. Parts computed here count as recomputed.
+    """
+    keys = [content_key(artifact, part.name, ctx.cleaned[part.start:part.end], *versions) for part in parts]
+    entries = [SECTION_CACHE.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    if missing:
+        for i, value in zip(missing, compute([parts[i] for i in missing])):
+            entries[i] = {"value": value}
+            SECTION_CACHE.put(keys[i], entries[i])
+        ctx.cached("recomputed", set).update(id(parts[i]) for i in missing)
+    return [entry["value"] for entry in entries]
+
+
+def recomputed_sections(ctx: DocumentContext) -> List[str]:
+    """Names of the sections that missed the cache for some artifact so far, in text order."""
+    recomputed = ctx.cached("recomputed", set)
+    return list(dict.fromkeys(part.name for part in ctx.parts if id(part) in recomputed))
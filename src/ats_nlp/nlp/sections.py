@@ -1,6 +1,7 @@
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from ats_nlp.models import Sections
+from ats_nlp.nlp.metrics import timed
 
 # Recognized headers
 HEADERS = [
@@ -14,6 +15,34 @@ HEADER_RE = re.compile(
     re.IGNORECASE | re.MULTILINE
 )
 
+# Header word -> section name in section_spans (longest first: "work experience" before "experience")
+HEADER_WORD_RE = re.compile(
+    rf"^\s*({'|'.join(map(re.escape, sorted(HEADERS, key=len, reverse=True)))})",
+    re.IGNORECASE | re.MULTILINE
+)
+SECTION_NAMES = {"work experience": "experience", "professional experience": "experience", "objective": "summary"}
+
+SectionSpan = Tuple[str, int, int]
+
+
+def section_spans(text: str) -> List[SectionSpan]:
+    """
+    (section, start, end) ranges covering all of ``text``, in order: "header"
+    for whatever precedes the first recognized header line (name, contacts;
+    the whole text when there is none), then one range per header line up
+    to the next one, header line included. Same header lines as split_sections.
+    """
+    spans: List[SectionSpan] = []
+    last_name, last_start = "header", 0
+    for m in HEADER_RE.finditer(text):
+        word = HEADER_WORD_RE.match(text, m.start()).group(1).lower()
+        if m.start() > last_start or last_name != "header":
+            spans.append((last_name, last_start, m.start()))
+        last_name, last_start = SECTION_NAMES.get(word, word), m.start()
+    spans.append((last_name, last_start, len(text)))
+    return spans
+
+@timed()
 def split_sections(text: str) -> Sections:
     """
     Extracts major resume sections based on headers.
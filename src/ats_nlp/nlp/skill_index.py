@@ -0,0 +1,148 @@
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+# Words and single punctuation marks, so "node.js" -> ["node", ".", "js"]
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_END = None  # trie key marking "a skill ends here"
+
+
+def _keys(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Tokenize text into trie keys with their char spans.
+    A token separated from the previous one by whitespace gets a leading
+    space in its key, so "spring boot" and "springboot" stay distinct.
+    """
+    keys = []
+    prev_end = -1
+    for m in TOKEN_RE.finditer(text):
+        tok = m.group(0)
+        if keys and m.start() != prev_end:
+            tok = " " + tok
+        keys.append((tok, m.start(), m.end()))
+        prev_end = m.end()
+    return keys
+
+
+class ExactSkillMatcher:
+    """
+    Token trie over the skills DB, built once and matched in a single pass.
+
+    Tokens are maximal word runs, so every hit sits on word boundaries
+    ("java" does not fire inside "javascript"). Cost depends on the text
+    length and the longest skill, not on the number of skills.
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self._root: Dict = {}
+        self.size = 0
+        for skill in skills:
+            self.add(skill)
+
+    def add(self, skill: str) -> None:
+        keys = _keys(skill)
+        if not keys:
+            return
+        node = self._root
+        for tok, _, _ in keys:
+            node = node.setdefault(tok, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = skill
+
+    def find(self, text: str) -> Set[str]:
+        """Return every skill that occurs verbatim in text on token boundaries."""
+        found = set()
+        keys = _keys(text)
+        for i, (first, start, _) in enumerate(keys):
+            # a match may start after whitespace; the trie stores the bare first token
+            node = self._root.get(first.lstrip(" "))
+            j = i
+            while node is not None:
+                skill = node.get(_END)
+                if skill is not None and text[start:keys[j][2]] == skill:
+                    found.add(skill)
+                j += 1
+                if j >= len(keys):
+                    break
+                node = node.get(keys[j][0])
+        return found
+
+
+class FuzzySkillIndex:
+    """
+    Character q-gram inverted index used to prune fuzzy candidates.
+
+    A skill of length L that reaches ``partial_ratio >= threshold`` against
+    some window of the text is at most ``d = (100 - threshold) / 50 * L``
+    indel edits away from that window, so it shares at least
+    ``(L - q + 1) - q * d`` of its positional q-grams with it (q-gram lemma).
+    The text is cut into overlapping windows at least as long as the longest
+    skill; only skills meeting that count in some window are scored. The
+    filter never drops a true match, so scoring the survivors with the same
+    scorer gives exactly the unpruned result.
+    """
+
+    def __init__(self, skills: Iterable[str], q: int = 3, window: int = 256):
+        self.skills = list(skills)
+        self.q = q
+        self._grams: Dict[str, int] = {}
+        postings: List[Tuple[int, int, int]] = []  # (gram id, skill id, multiplicity)
+        for sid, skill in enumerate(self.skills):
+            counts: Dict[str, int] = {}
+            for j in range(len(skill) - q + 1):
+                g = skill[j:j + q]
+                counts[g] = counts.get(g, 0) + 1
+            for g, c in counts.items():
+                postings.append((self._grams.setdefault(g, len(self._grams)), sid, c))
+
+        postings.sort()
+        self._indptr = np.zeros(len(self._grams) + 1, dtype=np.int64)
+        for gid, _, _ in postings:
+            self._indptr[gid + 1] += 1
+        self._indptr = np.cumsum(self._indptr)
+        self._skill_ids = np.array([p[1] for p in postings], dtype=np.int64)
+        self._mult = np.array([p[2] for p in postings], dtype=np.float64)
+
+        self._lengths = np.array([len(s) for s in self.skills], dtype=np.int64)
+        self._n_grams = np.maximum(self._lengths - q + 1, 0)
+        self.overlap = int(self._lengths.max()) if self.skills else 0
+        self.window = max(window, 2 * self.overlap)
+        self._need_cache: Dict[float, np.ndarray] = {}
+
+    def _need(self, threshold: float):
+        need = self._need_cache.get(threshold)
+        if need is None:
+            dmax = np.floor((100.0 - threshold) / 50.0 * self._lengths + 1e-9)
+            need = self._n_grams - self.q * dmax
+            self._need_cache[threshold] = need
+        return need
+
+    def _windows(self, text: str):
+        step = self.window - self.overlap
+        for start in range(0, max(len(text) - self.overlap, 1), step):
+            yield text[start:start + self.window]
+
+    def candidates(self, text: str, threshold: float) -> List[str]:
+        """Skills that may reach ``threshold`` against text; a superset of the true hits."""
+        n = len(self.skills)
+        if not n or not text:
+            return []
+        need = self._need(threshold)
+        # skills longer than the text get swapped into the haystack role by
+        # partial_ratio, and very short ones have no q-grams to filter on
+        keep = (need <= 0) | (self._lengths > len(text))
+
+        q = self.q
+        for chunk in self._windows(text):
+            gids = {self._grams.get(chunk[j:j + q]) for j in range(len(chunk) - q + 1)}
+            gids.discard(None)
+            if not gids:
+                continue
+            idx = np.concatenate([self._skill_ids[self._indptr[g]:self._indptr[g + 1]] for g in gids])
+            w = np.concatenate([self._mult[self._indptr[g]:self._indptr[g + 1]] for g in gids])
+            keep |= np.bincount(idx, weights=w, minlength=n) >= need
+
+        return [self.skills[i] for i in np.flatnonzero(keep)]
@@ -1,9 +1,13 @@
+import hashlib
 from typing import Iterable, List, Optional
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from ats_nlp.nlp.metrics import timed
+from ats_nlp.nlp.skill_index import ExactSkillMatcher, FuzzySkillIndex
 
 class SkillsEngine:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, fuzzy_threshold: float = 90):
         self.db = []
+        self.fuzzy_threshold = fuzzy_threshold
         try:
             with open(db_path, "r", encoding="utf-8") as f:
                 for line in f:
@@ -12,24 +16,36 @@ class SkillsEngine:
                         self.db.append(s.lower())
         except FileNotFoundError:
             self.db = []
+        # compiled once; extract() no longer scans the text once per skill
+        self.matcher = ExactSkillMatcher(self.db)
+        self.fuzzy_index = FuzzySkillIndex(self.db)
+        # identifies this DB + threshold in cache keys; a reloaded or edited DB gets a new one
+        content = "\n".join([str(fuzzy_threshold), *self.db])
+        self.version = hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
 
-    def extract(self, text: str, skills_section: Optional[str] = None) -> List[str]:
+    @timed("skills_extract")
+    def extract(
+        self,
+        text: str,
+        skills_section: Optional[str] = None,
+        threshold: Optional[float] = None
+    ) -> List[str]:
         """
         Baseline extractor:
-        - lookup known skills in normalized text
-        - fuzzy match near-misses
+        - lookup known skills in normalized text (single pass over the trie)
+        - fuzzy match near-misses, scoring only q-gram index candidates
         """
         text_l = (skills_section or text or "").lower()
-        found = set()
+        threshold = self.fuzzy_threshold if threshold is None else threshold
+        found = self.matcher.find(text_l)
 
-        for skill in self.db:
-            if skill in text_l:
-                found.add(skill)
-            else:
-                if fuzz.partial_ratio(skill, text_l) >= 90:
-                    found.add(skill)
+        # also catches substrings inside larger words ("java" in "javascript")
+        cands = [s for s in self.fuzzy_index.candidates(text_l, threshold) if s not in found]
+        if cands:
+            scores = process.cdist([text_l], cands, scorer=fuzz.partial_ratio, score_cutoff=threshold)[0]
+            found.update(s for s, sc in zip(cands, scores) if sc >= threshold)
 
         return sorted(found)
 
     def all(self) -> List[str]:
-        return list(self.db)
\ No newline at end of file
+        return list(self.db)
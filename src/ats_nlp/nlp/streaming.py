@@ -0,0 +1,106 @@
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON = "application/x-ndjson"
+
+# Yielded by ndjson_lines in place of a line longer than max_line_bytes
+OVERSIZED = b""
+
+
+async def ndjson_lines(request: Request, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Non-blank lines of the request body as the chunks arrive. At most one
+    line is buffered; a line over ``max_line_bytes`` is dropped as it grows
+    and reported once as OVERSIZED.
+    """
+    buf = bytearray()
+    skipping = False
+    async for chunk in request.stream():
+        parts = chunk.split(b"\n")
+        for part in parts[:-1]:  # each of these ends a line
+            if not skipping:
+                buf += part
+                if len(buf) > max_line_bytes:
+                    yield OVERSIZED
+                elif buf.strip():
+                    yield bytes(buf)
+            skipping = False
+            buf.clear()
+        if not skipping:
+            buf += parts[-1]
+            if len(buf) > max_line_bytes:
+                yield OVERSIZED
+                skipping = True
+                buf.clear()
+    if not skipping and buf.strip():
+        yield bytes(buf)
+
+
+async def stream_ndjson(
+    request: Request,
+    handle: Callable[[int, bytes], str],
+    concurrency: int,
+    max_line_bytes: int,
+    on_done: Optional[Callable[[int], None]] = None
+) -> AsyncIterator[str]:
+    """
+    Run ``handle(index, line)`` on the threadpool for every NDJSON record,
+    at most ``concurrency`` at a time, and yield its output as soon as it
+    completes: reading the next line and the records in flight are awaited
+    together, so a finished record goes out without waiting for more input.
+    The body is only read while a slot is free and the next result is only
+    produced once the client took the previous one, so a slow client or a
+    slow pipeline stalls the upload instead of growing buffers. ``handle``
+    reports per-record failures in its output rather than raising.
+    ``on_done`` gets the record count at the end.
+    """
+    lines = ndjson_lines(request, max_line_bytes)
+    pending = set()
+    next_line = None  # task reading the next line, while a slot is free
+    index = 0
+    eof = False
+    try:
+        while not eof or pending:
+            if next_line is None and not eof and len(pending) < concurrency:
+                next_line = asyncio.ensure_future(lines.__anext__())
+            waiting = pending | {next_line} if next_line is not None else pending
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if next_line in done:
+                done.discard(next_line)
+                try:
+                    line = next_line.result()
+                except StopAsyncIteration:
+                    eof = True
+                else:
+                    pending.add(asyncio.ensure_future(run_in_threadpool(handle, index, line)))
+                    index += 1
+                next_line = None
+            pending -= done
+            for task in done:
+                yield task.result()
+        if on_done is not None:
+            on_done(index)
+    finally:
+        if next_line is not None:
+            next_line.cancel()
+        for task in pending:  # client went away; in-flight records finish on their threads, unreported
+            task.cancel()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that may start answering while the request body is
+    still being read by its iterator. The stock one listens for disconnects
+    on ``receive`` concurrently, which would swallow body chunks; here the
+    body reader sees the disconnect instead (ClientDisconnect).
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,262 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+MetaFilter = Callable[[str, Dict[str, Any]], bool]  # (id, meta) -> keep?
+
+
+class VectorIndex:
+    """
+    Persistent index of normalized embeddings (one row per job).
+
+    On disk: ``vectors.f32`` (raw float32 rows, memory-mapped for search) and
+    ``ids.jsonl`` (an append-only log of ``{"id", "row", "meta"}`` records and
+    ``{"id", "deleted": true}`` tombstones). Adds and deletes only append, so
+    they are incremental and safe across workers (writes hold an exclusive
+    flock; readers take a shared one to catch up whenever a file changed).
+    Once dead rows (deleted or replaced) outnumber live ones, both files are
+    rewritten with the live rows only, renumbered.
+
+    Search is exact brute force (one matrix-vector product over the mmap)
+    unless ``train`` has been called with ``nlist > 0``: then rows are
+    bucketed by their nearest of ``nlist`` spherical k-means centroids and a
+    query only scores the rows in its ``nprobe`` closest buckets (IVF).
+    """
+
+    def __init__(self, path: str, dim: int, nprobe: int = 8):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.nprobe = nprobe
+        self._vectors = self.path / "vectors.f32"
+        self._log = self.path / "ids.jsonl"
+        self._centroids_file = self.path / "centroids.npy"
+        self._vectors.touch(exist_ok=True)
+        self._log.touch(exist_ok=True)
+
+        self._rows: Dict[str, int] = {}       # live id -> row
+        self._ids: Dict[int, str] = {}        # live row -> id
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._log_file: Optional[BinaryIO] = None  # held open so a compacted log never reuses its inode
+        self._log_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._n_rows = 0
+        self._live = np.zeros(0, dtype=bool)  # row -> referenced by a live id
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._assigned = 0  # rows [0, _assigned) are bucketed
+        self._centroids_mtime = 0.0
+        self._lock = threading.RLock()
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def mode(self) -> str:
+        return "ivf" if self._centroids is not None else "exact"
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        with open(self.path / "index.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _changed(self) -> bool:
+        log = self._log.stat()
+        if self._log_file is None or log.st_size != self._log_offset:
+            return True
+        if os.fstat(self._log_file.fileno()).st_ino != log.st_ino:
+            return True
+        if self._vectors.stat().st_size // (4 * self.dim) != self._n_rows:
+            return True
+        mtime = self._centroids_file.stat().st_mtime if self._centroids_file.exists() else 0.0
+        return mtime != self._centroids_mtime
+
+    def _refresh(self) -> None:
+        """Catch up with rows appended, trained or compacted by any worker; a few stat() calls otherwise."""
+        if self._changed():
+            with self._file_lock(shared=True):
+                self._catch_up()
+
+    def _catch_up(self) -> None:
+        """Apply new log records and remap the vectors; the caller holds the file lock."""
+        stat = self._log.stat()
+        if self._log_file is None or os.fstat(self._log_file.fileno()).st_ino != stat.st_ino:
+            # first load, or compacted by some worker: rows were renumbered, start over
+            if self._log_file is not None:
+                self._log_file.close()
+            self._log_file = open(self._log, "rb")
+            self._rows, self._ids, self._meta = {}, {}, {}
+            self._log_offset, self._n_rows, self._assigned = 0, -1, 0
+            self._lists = [[] for _ in self._lists]
+        size = os.fstat(self._log_file.fileno()).st_size
+        if size > self._log_offset:
+            self._log_file.seek(self._log_offset)
+            chunk = self._log_file.read(size - self._log_offset)
+            complete = chunk.rfind(b"\n") + 1
+            for line in chunk[:complete].decode("utf-8").splitlines():
+                rec = json.loads(line)
+                old = self._rows.pop(rec["id"], None)
+                if old is not None:
+                    self._ids.pop(old, None)
+                self._meta.pop(rec["id"], None)
+                if not rec.get("deleted"):
+                    self._rows[rec["id"]] = rec["row"]
+                    self._ids[rec["row"]] = rec["id"]
+                    self._meta[rec["id"]] = rec.get("meta") or {}
+            self._log_offset += complete
+
+        if self._centroids_file.exists() and self._centroids_file.stat().st_mtime != self._centroids_mtime:
+            # (re)trained, possibly by another worker: rebucket everything
+            self._centroids_mtime = self._centroids_file.stat().st_mtime
+            self._centroids = np.load(self._centroids_file)
+            self._lists = [[] for _ in range(len(self._centroids))]
+            self._assigned = 0
+
+        n_rows = self._vectors.stat().st_size // (4 * self.dim)
+        if n_rows != self._n_rows:
+            self._mmap = np.memmap(self._vectors, dtype=np.float32, mode="r", shape=(n_rows, self.dim)) if n_rows else None
+            self._n_rows = n_rows
+        self._live = np.zeros(self._n_rows, dtype=bool)
+        self._live[[r for r in self._ids if r < self._n_rows]] = True
+        self._assign_new_rows()
+
+    def _assign_new_rows(self) -> None:
+        if self._centroids is None or self._assigned >= self._n_rows:
+            return
+        rows = np.arange(self._assigned, self._n_rows)
+        nearest = np.argmax(self._mmap[rows] @ self._centroids.T, axis=1)
+        for row, bucket in zip(rows, nearest):
+            self._lists[bucket].append(int(row))
+        self._assigned = self._n_rows
+
+    def _append(self, records: List[Dict[str, Any]], vectors: Optional[np.ndarray] = None) -> None:
+        with self._lock, self._file_lock():
+            self._catch_up()
+            if vectors is not None and len(vectors):
+                row_bytes = 4 * self.dim
+                size = self._vectors.stat().st_size
+                if size % row_bytes:
+                    os.truncate(self._vectors, size - size % row_bytes)
+                with open(self._vectors, "ab") as f:
+                    first = f.tell() // row_bytes
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                for i, rec in enumerate(r for r in records if not r.get("deleted")):
+                    rec["row"] = first + i
+            with open(self._log, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in records))
+            self._catch_up()
+            if self._n_rows > 2 * len(self._rows) + 1024:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite both files with the live rows only, renumbered in row order; under the write lock."""
+        live = sorted(self._ids)
+        vectors = self.path / f"vectors.tmp-{os.getpid()}.f32"
+        log = self.path / f"ids.tmp-{os.getpid()}.jsonl"
+        with open(vectors, "wb") as f:
+            for start in range(0, len(live), 4096):
+                f.write(np.ascontiguousarray(self._mmap[live[start:start + 4096]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(log, "w", encoding="utf-8") as f:
+            for row, old in enumerate(live):
+                item_id = self._ids[old]
+                f.write(json.dumps({"id": item_id, "row": row, "meta": self._meta[item_id]}) + "\n")
+        os.replace(vectors, self._vectors)
+        os.replace(log, self._log)
+        self._catch_up()
+
+    def add(self, item_id: str, vector: np.ndarray, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or replace one item; the vector must be L2-normalized."""
+        self.add_many([(item_id, vector, meta)])
+
+    def add_many(self, items: List[Tuple[str, np.ndarray, Optional[Dict[str, Any]]]]) -> None:
+        if not items:
+            return
+        vectors = np.stack([np.asarray(v, dtype=np.float32).reshape(self.dim) for _, v, _ in items])
+        self._append([{"id": i, "meta": m or {}} for i, _, m in items], vectors)
+
+    def delete(self, item_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            if item_id not in self._rows:
+                return False
+        self._append([{"id": item_id, "deleted": True}])
+        return True
+
+    def meta(self, item_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._meta.get(item_id)
+
+    def train(self, nlist: int, iterations: int = 10, sample: int = 50_000, seed: int = 0) -> None:
+        """Switch to IVF: spherical k-means over live rows, then bucket every row."""
+        with self._lock:
+            self._refresh()
+            live = np.fromiter(self._ids.keys(), dtype=np.int64)
+            if len(live) < nlist:
+                raise ValueError(f"need at least {nlist} vectors to train {nlist} lists, have {len(live)}")
+            rnd = np.random.default_rng(seed)
+            data = np.asarray(self._mmap[np.sort(rnd.choice(live, min(sample, len(live)), replace=False))])
+            centroids = data[rnd.choice(len(data), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                nearest = np.argmax(data @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = data[nearest == c]
+                    if len(members):
+                        mean = members.sum(axis=0)
+                        centroids[c] = mean / max(np.linalg.norm(mean), 1e-12)
+            tmp = self.path / f"centroids.tmp-{os.getpid()}.npy"
+            np.save(tmp, centroids)
+            os.replace(tmp, self._centroids_file)
+            self._refresh()
+
+    def search(self, query: np.ndarray, k: int = 10, where: Optional[MetaFilter] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Top-k (id, cosine similarity, meta) for a normalized query vector, best first."""
+        with self._lock:
+            self._refresh()
+            if not self._rows or k <= 0:
+                return []
+            if self._centroids is None:
+                # one pass over the contiguous mmap (no copy of the rows), dead rows dropped afterwards
+                rows = np.flatnonzero(self._live)
+                scores = np.asarray(self._mmap @ query)[rows]
+            else:
+                probes = np.argsort(-(self._centroids @ query))[:nprobe or self.nprobe]
+                rows = np.array([r for p in probes for r in self._lists[p] if self._live[r]], dtype=np.int64)
+                rows.sort()  # sequential reads from the mmap
+                scores = np.asarray(self._mmap[rows] @ query) if len(rows) else rows
+            if not len(rows):
+                return []
+
+            hits: List[Tuple[str, float, Dict[str, Any]]] = []
+            want = min(len(rows), max(4 * k, k + 16))
+            seen = 0
+            while True:
+                order = np.argpartition(-scores, want - 1)[:want]
+                order = order[np.argsort(-scores[order], kind="stable")]
+                for j in order[seen:]:
+                    item_id = self._ids[int(rows[j])]
+                    meta = self._meta[item_id]
+                    if where is None or where(item_id, meta):
+                        hits.append((item_id, float(scores[j]), meta))
+                        if len(hits) == k:
+                            return hits
+                seen = want
+                if want == len(rows):
+                    return hits
+                want = min(len(rows), want * 4)  # filters were selective: widen the shortlist
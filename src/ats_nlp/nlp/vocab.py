@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+class TermVocabulary:
+    """
+    Precomputed embedding matrix for known terms (skills DB + frequent JD terms).
+
+    Rows are L2-normalized float32, so similarity against a query is one
+    matrix-vector product. Out-of-vocabulary tokens are encoded on demand and
+    counted; once a token has been seen ``promote_after`` times it becomes a
+    row of the matrix and is persisted with the next ``save``.
+    """
+
+    def __init__(self, model_name: str, dim: int, promote_after: int = 3):
+        self.model_name = model_name
+        self.dim = dim
+        self.promote_after = promote_after
+        self.terms: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._seen: Dict[str, int] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:len(self.terms)]
+
+    def _append(self, terms: List[str], vectors: np.ndarray) -> None:
+        n = len(self.terms)
+        need = n + len(terms)
+        if need > len(self._matrix):
+            grown = np.zeros((max(need, 2 * len(self._matrix), 1024), self.dim), dtype=np.float32)
+            grown[:n] = self._matrix[:n]
+            self._matrix = grown
+        self._matrix[n:need] = vectors
+        for i, term in enumerate(terms):
+            self.index[term] = n + i
+        self.terms.extend(terms)
+        self._dirty = True
+
+    def add(self, terms: Iterable[str], encode: Encoder) -> None:
+        """Encode and add terms that are not in the vocabulary yet."""
+        fresh = list(dict.fromkeys(t for t in terms if t and t not in self.index))
+        if fresh:
+            vectors = encode(fresh)
+            with self._lock:
+                self._append(fresh, vectors)
+
+    def vectors(self, tokens: List[str], encode: Encoder) -> np.ndarray:
+        """Embedding rows for tokens, in order; only OOV tokens reach ``encode``."""
+        rows = [self.index.get(t) for t in tokens]
+        oov = [t for t, r in zip(tokens, rows) if r is None]
+        out = np.empty((len(tokens), self.dim), dtype=np.float32)
+        known = [i for i, r in enumerate(rows) if r is not None]
+        if known:
+            out[known] = self._matrix[[rows[i] for i in known]]
+        if oov:
+            fresh = encode(oov)
+            out[[i for i, r in enumerate(rows) if r is None]] = fresh
+            self._observe(oov, fresh)
+        return out
+
+    def _observe(self, tokens: List[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            promote, promote_vecs = [], []
+            for tok, vec in zip(tokens, vectors):
+                if tok in self.index:
+                    continue
+                count = self._seen.get(tok, 0) + 1
+                if count >= self.promote_after:
+                    self._seen.pop(tok, None)
+                    promote.append(tok)
+                    promote_vecs.append(vec)
+                else:
+                    self._seen[tok] = count
+            if promote:
+                self._append(promote, np.stack(promote_vecs))
+
+    def save(self, path: str) -> None:
+        """Persist terms + matrix; files are replaced atomically so workers can share the directory."""
+        with self._lock:
+            if not self._dirty:
+                return
+            p = Path(path)
+            p.mkdir(parents=True, exist_ok=True)
+            tmp = f".tmp-{os.getpid()}"
+            np.save(p / f"vectors{tmp}.npy", self.matrix)
+            (p / f"terms{tmp}.txt").write_text("\n".join(self.terms), encoding="utf-8")
+            (p / f"meta{tmp}.json").write_text(json.dumps({"model": self.model_name, "dim": self.dim}))
+            os.replace(p / f"vectors{tmp}.npy", p / "vectors.npy")
+            os.replace(p / f"terms{tmp}.txt", p / "terms.txt")
+            os.replace(p / f"meta{tmp}.json", p / "meta.json")
+            self._dirty = False
+
+    def load(self, path: str) -> bool:
+        """Load a saved vocabulary; returns False if absent or built with another model."""
+        p = Path(path)
+        try:
+            meta = json.loads((p / "meta.json").read_text())
+            if meta.get("model") != self.model_name or meta.get("dim") != self.dim:
+                return False
+            raw = (p / "terms.txt").read_text(encoding="utf-8")
+            terms = raw.split("\n") if raw else []
+            matrix = np.load(p / "vectors.npy")
+        except (FileNotFoundError, ValueError):
+            return False
+        if len(terms) != len(matrix):
+            return False
+        with self._lock:
+            self.terms, self.index = [], {}
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._append(terms, matrix.astype(np.float32, copy=False))
+            self._dirty = False
+        return True
+
+    def load_or_build(self, path: Optional[str], seed_terms: Iterable[str], encode: Encoder) -> None:
+        """Load the persisted matrix, then encode whatever seed terms it is missing."""
+        if path:
+            self.load(path)
+        self.add(seed_terms, encode)
+        if path:
+            self.save(path)
@@ -0,0 +1,81 @@
+from typing import List, Optional
+
+from ats_nlp.models import ResumePayload, ScoreResponse, Sections
+from ats_nlp.nlp import routing
+from ats_nlp.nlp.context import DocumentContext
+from ats_nlp.nlp.entities import extract_contacts_and_entities
+from ats_nlp.nlp.preprocess import detect_language
+from ats_nlp.nlp.section_cache import section_values
+from ats_nlp.nlp.score import TextOrContext, compute_ats_score, semantic_match_score
+from ats_nlp.nlp.sections import split_sections
+from ats_nlp.nlp.skills import SkillsEngine
+
+# Extraction and scoring as run by the API (main.py) and the offline batch runner (batch.py)
+
+
+def extract_skills(ctx: DocumentContext, skills: SkillsEngine, sections: Optional[Sections] = None) -> List[str]:
+    """
+    Skills DB matches in the skills-routed sections (routing.py), matched
+    per section and cached with it (section_cache.py). Without routing, in
+    the skills section or else the whole text.
+    """
+    if not routing.ROUTING:
+        return skills.extract(ctx.cleaned, (sections or split_sections(ctx.cleaned)).skills)
+    parts = ctx.routed_parts("skills")
+    found = section_values(ctx, "skills", parts,
+                           lambda todo: [skills.extract(ctx.cleaned[p.start:p.end]) for p in todo], skills.version)
+    return sorted(set().union(*found))
+
+
+def resume_language(ctx: DocumentContext) -> str:
+    """detect_language on the longest section (the whole text without routing), cached with that section."""
+    longest = max(ctx.parts, key=lambda p: p.end - p.start)
+    return section_values(ctx, "language", [longest],
+                          lambda todo: [detect_language(ctx.cleaned[p.start:p.end]) for p in todo])[0]
+
+
+def extract_resume(payload: ResumePayload, ctx: DocumentContext, skills: SkillsEngine) -> ResumePayload:
+    lang = resume_language(ctx)
+    cleaned = ctx.cleaned  # preserve case for NER
+
+    sections = split_sections(cleaned)  # returns Sections Pydantic model
+    region = payload.metadata.region if payload.metadata else None
+    entities = extract_contacts_and_entities(ctx, language=lang, region=region)  # parses changed NER sections only
+
+    # ✅ FIX: access attribute instead of dict.get()
+    found_skills = extract_skills(ctx, skills, sections)
+
+    if not sections.skills and found_skills:
+        sections.skills = ", ".join(found_skills)
+
+    return ResumePayload(
+        fileName=payload.fileName,
+        text=payload.text,
+        metadata=payload.metadata,
+        sections=sections,
+        entities=entities,
+        normalized_skills=found_skills,
+        language=lang
+    )
+
+
+def score_resume(
+    resume_skills: List[str],
+    resume_ctx: DocumentContext,
+    jd: TextOrContext,
+    required_skills: Optional[List[str]]
+) -> ScoreResponse:
+    """compute_ats_score with the semantic similarity of the two documents (as /nlp/analyze scores)."""
+    total, breakdown, missing, suggestions = compute_ats_score(
+        resume_skills=resume_skills,
+        jd_text=jd,
+        required_skills=required_skills,
+        semantic=semantic_match_score(resume_ctx, jd)
+    )
+    return ScoreResponse(
+        score=total,
+        matched_skills=breakdown["matched_skills"],
+        missing_keywords=missing,
+        suggested_terms=suggestions,
+        details=breakdown
+    )